@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Performance measurements for Eisenstein types - Python 3.x
+
+   ./benchmark.py memory [count]
+   ./benchmark.py array [count]
+   ./benchmark.py gcd [count]
+   ./benchmark.py fractions [scale]
+   ./benchmark.py alloc [count]
+   ./benchmark.py suite [results.json] [baseline.json] [threshold%]
+
+   suite times ring arithmetic, gcd, fraction division, every
+   *_Eisenstein_Fraction operator (warm and cold delta cache), the stream
+   versions and operations.py (plus operations_array.py if numpy is
+   installed) over growing series lengths and delta complexities.
+   Results are written as JSON; keep one file as baseline and later runs
+   report every case slower than baseline by more than threshold percent
+   (default 10) and exit with status 2.
+
+   alloc counts memory blocks and bytes that add_Eisenstein_Fraction and
+   operations.sum (plus operations_array.sum) allocate for their result
+   in every output mode ("pairs" / "strings", "columns", "indexes").
+"""
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+import gc
+import json
+import platform
+import random
+import time
+import tracemalloc
+from fractions import Fraction
+from functools import partial
+from itertools import islice
+
+from eisenstein import Eisenstein, get_dot_product, get_eisenstein_form, gcd
+from eisenstein_fractions import EisensteinFraction, NormalizedEisensteinFraction
+from eisenstein_cache import delta_cache
+import eisenstein_operations
+import eisenstein_streams
+import operations
+import operations_array
+import data_sets
+
+
+class _DictEisenstein:
+    """Pre-__slots__ layout of Eisenstein: two coefficients in __dict__"""
+
+    def __init__(self, co_real, co_omega=0):
+        assert isinstance(co_real, int)
+        assert isinstance(co_omega, int)
+        self.co_real = co_real
+        self.co_omega = co_omega
+
+
+class _DictEisensteinFraction(_DictEisenstein):
+    """Pre-__slots__ layout of EisensteinFraction (four= form only)"""
+
+    def __init__(self, four):
+        (real_num, real_den, omega_num, omega_den) = four
+        self.co_real = Fraction(real_num, real_den)
+        self.co_omega = Fraction(omega_num, omega_den)
+
+
+def _complex_mod(x: Eisenstein, y: Eisenstein):
+    """Former Eisenstein.__mod__: quotient rounded in complex float form"""
+    K = get_eisenstein_form(x.get_complex_form / y.get_complex_form)
+    return x - K * y
+
+
+def _complex_gcd(x: Eisenstein, y: Eisenstein, max_steps: int):
+    """Former gcd (float abs, float dot product, _complex_mod), bounded loop"""
+    if abs(y) > abs(x):
+        x, y = y, x
+    steps = 0
+    while get_dot_product(x, y):
+        x, y = y, _complex_mod(x, y)
+        steps += 1
+        if steps > max_steps:
+            raise ArithmeticError("no convergence")
+    return x
+
+
+def random_eisenstein(bits: int, rnd: random.Random) -> Eisenstein:
+    return Eisenstein(rnd.getrandbits(bits), rnd.getrandbits(bits))
+
+
+def measure(factory, count: int):
+    """
+    Build count objects with factory(i) twice: once timed,
+    once under tracemalloc (tracing distorts timing).
+    :return: (seconds, bytes held by the built list)
+    """
+    gc.collect()
+    start = time.perf_counter()
+    held = [factory(i) for i in range(count)]
+    elapsed = time.perf_counter() - start
+    del held
+
+    gc.collect()
+    tracemalloc.start()
+    held = [factory(i) for i in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return elapsed, size
+
+
+def bench_memory(count: int):
+    cases = [
+        ("Eisenstein (dict)", lambda i: _DictEisenstein(i, i + 1)),
+        ("Eisenstein (slots)", lambda i: Eisenstein(i, i + 1)),
+        (
+            "EisensteinFraction (dict)",
+            lambda i: _DictEisensteinFraction((i, 3, i + 1, 7)),
+        ),
+        (
+            "EisensteinFraction (slots)",
+            lambda i: EisensteinFraction(four=(i, 3, i + 1, 7)),
+        ),
+    ]
+    results = []
+    for name, factory in cases:
+        elapsed, size = measure(factory, count)
+        results.append((name, elapsed, size))
+        print(
+            "%-28s %9d objs %8.3f s %8.1f MiB %6.1f B/obj"
+            % (name, count, elapsed, size / 2 ** 20, size / count)
+        )
+    return results
+
+
+def bench_array(count: int):
+    np = operations_array.np
+    A = np.arange(1, 5 * count)
+    B = np.array(list(map(chr, range(ord("a"), ord("z") + 1))))[A % 26]
+    deltaA = Fraction(3, 2)
+    deltaB = Fraction(1, 2)
+    delta_hash = (deltaA * deltaB) / (deltaA + deltaB)
+    cases = [
+        ("sum", lambda: operations_array.sum(A, deltaA, B, deltaB, count)),
+        ("diff", lambda: operations_array.diff(A, deltaA, deltaB, count)),
+        (
+            "fractionhash",
+            lambda: operations_array.fractionhash(A, deltaA, B, deltaB, count),
+        ),
+        (
+            "dehasheven",
+            lambda: operations_array.dehasheven(A, delta_hash, deltaA, count),
+        ),
+        (
+            "dehashodd",
+            lambda: operations_array.dehashodd(A, delta_hash, deltaB, count),
+        ),
+    ]
+    results = []
+    for name, call in cases:
+        start = time.perf_counter()
+        call()
+        elapsed = time.perf_counter() - start
+        results.append((name, elapsed))
+        print("%-28s %9d samples %8.3f s" % (name, count, elapsed))
+    return results
+
+
+def bench_gcd(count: int):
+    """
+    gcd of count pairs g*u, g*v with all coefficients of given bit size
+    """
+    rnd = random.Random(2020)
+    results = []
+    for bits in (64, 256, 4096):
+        pairs = []
+        for _ in range(count):
+            g = random_eisenstein(bits // 2, rnd)
+            pairs.append(
+                (
+                    g * random_eisenstein(bits // 2, rnd),
+                    g * random_eisenstein(bits // 2, rnd),
+                )
+            )
+        for name, engine in (
+            ("complex float", lambda x, y: _complex_gcd(x, y, 8 * bits)),
+            ("euclid", gcd),
+            ("binary", lambda x, y: gcd(x, y, engine="binary")),
+        ):
+            start = time.perf_counter()
+            wrong = 0
+            try:
+                for x, y in pairs:
+                    d = engine(x, y)
+                    if x % d != 0 or y % d != 0:
+                        wrong += 1
+            except (ArithmeticError, OverflowError) as error:
+                print("%-16s %5d bits  failed: %r" % (name, bits, error))
+                results.append((name, bits, None, None))
+                continue
+            elapsed = time.perf_counter() - start
+            results.append((name, bits, count / elapsed, wrong))
+            print(
+                "%-16s %5d bits %10.0f gcd/s  wrong: %d"
+                % (name, bits, count / elapsed, wrong)
+            )
+    return results
+
+
+def allocations(call):
+    """
+    :return: (blocks, bytes) allocated by call and still held by its result,
+             and peak bytes during call - counted by tracemalloc
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = call()
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del result
+    stats = snapshot.statistics("filename")
+    return sum(s.count for s in stats), sum(s.size for s in stats), peak
+
+
+def bench_alloc(count: int):
+    A = list(range(count))
+    B = [chr(ord("a") + i % 26) for i in range(count)]
+    deltaA = EisensteinFraction(2, 1)
+    deltaB = EisensteinFraction(3, 0)
+    rationalA = Fraction(3, 2)
+    rationalB = Fraction(1, 2)
+    cases = []
+    for output in ("pairs", "columns", "indexes"):
+        cases.append(
+            (
+                "add " + output,
+                partial(
+                    eisenstein_operations.add_Eisenstein_Fraction,
+                    A,
+                    deltaA,
+                    B,
+                    deltaB,
+                    output=output,
+                ),
+            )
+        )
+    for output in ("strings", "columns", "indexes"):
+        cases.append(
+            (
+                "sum " + output,
+                partial(operations.sum, A, rationalA, B, rationalB, output=output),
+            )
+        )
+    if operations_array.np is not None:
+        arrayA = operations_array.np.asarray(A)
+        arrayB = operations_array.np.asarray(B)
+        for output in ("strings", "columns", "indexes"):
+            cases.append(
+                (
+                    "array sum " + output,
+                    partial(
+                        operations_array.sum,
+                        arrayA,
+                        rationalA,
+                        arrayB,
+                        rationalB,
+                        output=output,
+                    ),
+                )
+            )
+
+    results = []
+    for name, call in cases:
+        call()  # delta cache and schedules are not counted
+        blocks, size, peak = allocations(call)
+        results.append((name, blocks, size, peak))
+        print(
+            "%-22s %9d samples %9d blocks %8.2f MiB held %8.2f MiB peak"
+            % (name, count, blocks, size / 2 ** 20, peak / 2 ** 20)
+        )
+    return results
+
+
+def delta_arithmetic(deltaA, deltaB, probe_len: int = 40):
+    """
+    Derived deltas computed by eisenstein_operations.py for one pair
+    """
+    deltaC = (deltaA * deltaB) / (deltaA + deltaB)
+    delta = deltaB / (deltaA + deltaB)
+    for i in range(probe_len):
+        (i * delta).get_norm
+        (i * deltaA / deltaB).get_norm
+    (deltaA * deltaC) / (deltaA - deltaC)
+    deltaB * deltaC / (deltaB - deltaC)
+    return deltaC
+
+
+def bench_fractions(scale: int):
+    """
+    Delta arithmetic on the test_eisenstein_operations.py matrix of given scale
+    """
+    results = []
+    for name, kind in (
+        ("EisensteinFraction", EisensteinFraction),
+        ("NormalizedEisensteinFraction", NormalizedEisensteinFraction),
+    ):
+        pairs = [
+            (kind(i + 1, l), kind(j + 1, k))
+            for l in range(scale)
+            for k in range(scale)
+            for j in range(scale)
+            for i in range(scale)
+        ]
+        start = time.perf_counter()
+        for deltaA, deltaB in pairs:
+            delta_arithmetic(deltaA, deltaB)
+        elapsed = time.perf_counter() - start
+        results.append((name, elapsed))
+        print("%-30s %6d pairs %8.3f s" % (name, len(pairs), elapsed))
+    return results
+
+
+# Delta pairs of growing complexity for the time series operators
+SUITE_DELTAS = [
+    ("integer", EisensteinFraction(1), EisensteinFraction(2)),
+    ("eisenstein", EisensteinFraction(2, 1), EisensteinFraction(3, 0)),
+    (
+        "fraction",
+        EisensteinFraction(four=(7, 3, 2, 5)),
+        EisensteinFraction(four=(5, 2, 1, 3)),
+    ),
+]
+
+# Default regression threshold of suite, percent of baseline time
+SUITE_THRESHOLD = 10.0
+
+
+def best_time(call, min_time: float = 0.05, repeat: int = 5) -> float:
+    """
+    :return: best seconds per call() of repeat runs, each run calls
+             call() as many times as needed to last at least min_time
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_time / elapsed) + 1)
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def _cold(call):
+    """call() with derived deltas and schedules computed again each time"""
+
+    def run():
+        delta_cache.clear()
+        return call()
+
+    return run
+
+
+def _drain(function, args, length: int) -> int:
+    """Consume length samples of the iterator returned by function(*args)"""
+    count = 0
+    for _ in islice(function(*args)[0], length):
+        count += 1
+    return count
+
+
+def suite_cases():
+    """
+    :return: list of (name, call) - names are stable keys of JSON results
+    """
+    rnd = random.Random(2021)
+    cases = []
+
+    for bits in (64, 1024):
+        x = random_eisenstein(bits, rnd)
+        y = random_eisenstein(bits, rnd) + 1
+        g = random_eisenstein(bits // 2, rnd)
+        u = g * random_eisenstein(bits // 2, rnd)
+        v = g * random_eisenstein(bits // 2, rnd)
+        cases += [
+            ("eisenstein.add/%dbit" % bits, lambda x=x, y=y: x + y),
+            ("eisenstein.mul/%dbit" % bits, lambda x=x, y=y: x * y),
+            ("eisenstein.floordiv/%dbit" % bits, lambda x=x, y=y: x // y),
+            ("eisenstein.mod/%dbit" % bits, lambda x=x, y=y: x % y),
+            ("gcd.euclid/%dbit" % bits, lambda u=u, v=v: gcd(u, v)),
+            ("gcd.binary/%dbit" % bits, lambda u=u, v=v: gcd(u, v, "binary")),
+        ]
+
+    for bits in (8, 64):
+        x, y = (
+            EisensteinFraction(
+                four=(
+                    rnd.getrandbits(bits),
+                    rnd.getrandbits(bits) + 1,
+                    rnd.getrandbits(bits),
+                    rnd.getrandbits(bits) + 1,
+                )
+            )
+            for _ in range(2)
+        )
+        cases.append(("fraction.div/%dbit" % bits, lambda x=x, y=y: x / y))
+
+    ops = eisenstein_operations
+    A = data_sets.A
+    B = data_sets.B
+    for name, deltaA, deltaB in SUITE_DELTAS:
+        C, deltaC = ops.hash_Eisenstein_Fraction(A, deltaA, B, deltaB)
+        calls = [
+            ("hash", ops.hash_Eisenstein_Fraction, (A, deltaA, B, deltaB)),
+            ("add", ops.add_Eisenstein_Fraction, (A, deltaA, B, deltaB)),
+            ("diff", ops.diff_Eisenstein_Fraction, (A, deltaA, deltaB)),
+            ("dehasheven", ops.dehasheven_Eisenstein_Fraction, (C, deltaC, deltaA)),
+            ("dehashodd", ops.dehashodd_Eisenstein_Fraction, (C, deltaC, deltaB)),
+        ]
+        for operator, function, args in calls:
+            call = partial(function, *args)
+            cases.append(("operations.%s/%s" % (operator, name), call))
+            cases.append(("operations.%s/%s/cold" % (operator, name), _cold(call)))
+
+    for length in (10 ** 3, 10 ** 4):
+        A = range(1, length + 1)
+        for name, deltaA, deltaB in SUITE_DELTAS:
+            for operator, function in (
+                ("ihash", eisenstein_streams.ihash_Eisenstein_Fraction),
+                ("iadd", eisenstein_streams.iadd_Eisenstein_Fraction),
+            ):
+                cases.append(
+                    (
+                        "streams.%s/%s/n=%d" % (operator, name, length),
+                        partial(_drain, function, (A, deltaA, A, deltaB), length),
+                    )
+                )
+
+    rational = (operations.A, operations.deltaA, operations.B, operations.deltaB)
+    cases += [
+        ("rational.sum", partial(operations.sum, *rational)),
+        (
+            "rational.diff",
+            partial(
+                operations.diff, operations.B, operations.deltaA, operations.deltaB
+            ),
+        ),
+        ("rational.fractionhash", partial(operations.fractionhash, *rational)),
+    ]
+
+    np = operations_array.np
+    if np is not None:
+        deltaA = Fraction(3, 2)
+        deltaB = Fraction(1, 2)
+        for length in (10 ** 3, 10 ** 5):
+            A = np.arange(1, 5 * length)
+            for operator, function in (
+                ("fractionhash", operations_array.fractionhash),
+                ("sum", operations_array.sum),
+            ):
+                cases.append(
+                    (
+                        "array.%s/n=%d" % (operator, length),
+                        partial(function, A, deltaA, A, deltaB, length),
+                    )
+                )
+    return cases
+
+
+def run_suite(select: str = ""):
+    """
+    :return: JSON-ready dict with environment and seconds per call of
+             every suite case whose name contains select
+    """
+    results = {}
+    for name, call in suite_cases():
+        if select not in name:
+            continue
+        seconds = best_time(call)
+        results[name] = seconds
+        print("%-40s %12.3f us" % (name, seconds * 1e6))
+    np = operations_array.np
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "numpy": None if np is None else np.__version__,
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = SUITE_THRESHOLD):
+    """
+    :return: list of (name, baseline seconds, seconds) for cases slower
+             than baseline by more than threshold percent
+    """
+    regressions = []
+    compared = 0
+    for name, seconds in sorted(results["results"].items()):
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        compared += 1
+        change = 100.0 * (seconds - before) / before
+        flag = "REGRESSION" if change > threshold else ""
+        print("%-40s %12.3f us %+8.1f%% %s" % (name, seconds * 1e6, change, flag))
+        if change > threshold:
+            regressions.append((name, before, seconds))
+    print(
+        "%d of %d cases slower than baseline by more than %g%%"
+        % (len(regressions), compared, threshold)
+    )
+    return regressions
+
+
+def bench_suite(output: str = None, baseline: str = None, threshold=SUITE_THRESHOLD):
+    results = run_suite()
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if baseline is None:
+        return []
+    with open(baseline) as f:
+        reference = json.load(f)
+    print()
+    return compare(results, reference, threshold)
+
+
+def main():
+    if len(sys.argv) >= 2 and sys.argv[1] == "memory":
+        count = int(sys.argv[2]) if len(sys.argv) >= 3 else 10 ** 6
+        bench_memory(count)
+    elif len(sys.argv) >= 2 and sys.argv[1] == "array":
+        count = int(sys.argv[2]) if len(sys.argv) >= 3 else 10 ** 7
+        bench_array(count)
+    elif len(sys.argv) >= 2 and sys.argv[1] == "gcd":
+        count = int(sys.argv[2]) if len(sys.argv) >= 3 else 1000
+        bench_gcd(count)
+    elif len(sys.argv) >= 2 and sys.argv[1] == "fractions":
+        scale = int(sys.argv[2]) if len(sys.argv) >= 3 else 5
+        bench_fractions(scale)
+    elif len(sys.argv) >= 2 and sys.argv[1] == "alloc":
+        count = int(sys.argv[2]) if len(sys.argv) >= 3 else 10 ** 6
+        bench_alloc(count)
+    elif len(sys.argv) >= 2 and sys.argv[1] == "suite":
+        output = sys.argv[2] if len(sys.argv) >= 3 else None
+        baseline = sys.argv[3] if len(sys.argv) >= 4 else None
+        threshold = float(sys.argv[4]) if len(sys.argv) >= 5 else SUITE_THRESHOLD
+        if bench_suite(output, baseline, threshold):
+            return 2
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,16 +16,63 @@ if sys.version_info[0] < 3:
     print("You need Python 3 to run this script.")
     sys.exit(1)
 
+
+def _newton_isqrt(n: int) -> int:
+    """
+    :return: floor(sqrt(n)) of int n >= 0 - Newton iteration on integers
+    """
+    if n < 0:
+        raise ValueError("isqrt() argument must be nonnegative")
+    if n == 0:
+        return 0
+    x = 1 << ((n.bit_length() + 1) // 2)
+    while True:
+        y = (x + n // x) // 2
+        if y >= x:
+            return x
+        x = y
+
+
+try:
+    from math import isqrt
+except ImportError:  # math.isqrt is new in Python 3.8
+    isqrt = _newton_isqrt
+
 SQRT_THREE: float = 3.0 ** 0.5
 
 
 class Eisenstein:
+    """
+    Immutable a+bw value type.
+    Coefficients are kept in __slots__ (no per-instance __dict__), so
+    long series of deltas and timestamps stay compact, and instances
+    are hashable - they can be used as dict keys and set members.
+    """
+
+    __slots__ = ("co_real", "co_omega")
+
     def __init__(self, co_real, co_omega=0):
 
         assert isinstance(co_real, int)
         assert isinstance(co_omega, int)
-        self.co_real = co_real
-        self.co_omega = co_omega
+        _set_co_real(self, co_real)
+        _set_co_omega(self, co_omega)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("%s is immutable" % type(self).__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError("%s is immutable" % type(self).__name__)
+
+    def __reduce__(self):
+        return (type(self)._from_coefficients, (self.co_real, self.co_omega))
+
+    @classmethod
+    def _from_coefficients(cls, co_real, co_omega):
+        obj = object.__new__(cls)
+        _set_co_real(obj, co_real)
+        _set_co_omega(obj, co_omega)
+        return obj
 
     def __str__(self):
         if self.co_real.denominator == self.co_omega.denominator == 1:
@@ -49,13 +96,25 @@ class Eisenstein:
 
         if isinstance(other, int):
             other = Eisenstein(other)
+        elif not isinstance(other, Eisenstein):
+            return NotImplemented
 
         return self.co_real == other.co_real and self.co_omega == other.co_omega
 
+    def __hash__(self):
+        # Values equal to an int (b == 0) must hash like that int,
+        # and Eisenstein(1, 2) must hash like EisensteinFraction(1, 2).
+        # Both hold because hash(Fraction(n)) == hash(n).
+        if self.co_omega == 0:
+            return hash(self.co_real)
+        return hash((self.co_real, self.co_omega))
+
     def __add__(self, other):
 
         if isinstance(other, int):
             other = Eisenstein(other)
+        elif not isinstance(other, Eisenstein):
+            return NotImplemented
 
         return Eisenstein(self.co_real + other.co_real, self.co_omega + other.co_omega)
 
@@ -63,6 +122,8 @@ class Eisenstein:
 
         if isinstance(other, int):
             other = Eisenstein(other)
+        elif not isinstance(other, Eisenstein):
+            return NotImplemented
 
         return Eisenstein(self.co_real - other.co_real, self.co_omega - other.co_omega)
 
@@ -72,6 +133,8 @@ class Eisenstein:
 
         if isinstance(other, int):
             other = Eisenstein(other)
+        elif not isinstance(other, Eisenstein):
+            return NotImplemented
 
         return Eisenstein(
             (self.co_real * other.co_real) - (self.co_omega * other.co_omega),
@@ -132,6 +195,8 @@ class Eisenstein:
         """
         if isinstance(other, int):
             other = Eisenstein(other)
+        elif not isinstance(other, Eisenstein):
+            return NotImplemented
 
         co_real = (
             self.co_real * other.co_real
@@ -140,7 +205,8 @@ class Eisenstein:
         )
         co_omega = self.co_omega * other.co_real - self.co_real * other.co_omega
 
-        return Eisenstein(int(co_real / other.get_norm), int(co_omega / other.get_norm))
+        bottom = other.get_norm
+        return Eisenstein(_trunc_div(co_real, bottom), _trunc_div(co_omega, bottom))
 
     def __truediv__(self, other):
         """
@@ -151,18 +217,30 @@ class Eisenstein:
     def __mod__(self, other):
         if isinstance(other, int):
             other = Eisenstein(other)
+        elif not isinstance(other, Eisenstein):
+            return NotImplemented
 
-        K = get_eisenstein_form(self.get_complex_form / other.get_complex_form)
+        # K = self / other rounded to nearest a+bw - formerly computed as
+        # get_eisenstein_form(self.get_complex_form / other.get_complex_form)
+        # Here it is exact for any size of coefficients: no float, no sqrt
+        a = self.co_real
+        b = self.co_omega
+        c = other.co_real
+        d = other.co_omega
+        bottom = other.get_norm
+        k = _round_div(a * c + b * d - a * d, bottom)
+        m = _round_div(b * c - a * d, bottom)
         # This debug code is important - it creates queries for
         # wolframalfa that can be checked if mod function works correctly
 
         # print(
         #    # self = K * other + R
         #    'w = ( -1 + i sqrt(3) ) / 2 ; %r %r + %r ; expected %r'
-        #    % (K, other, self - K * other, self)
+        #    % (Eisenstein(k, m), other, self - Eisenstein(k, m) * other, self)
         # )
 
-        return self - K * other
+        # self - (k + mw) * other, see __mul__
+        return type(self)(a - (k * c - m * d), b - (m * c + k * d - m * d))
 
     def div_mod(self, other):
         if isinstance(other, int):
@@ -181,6 +259,32 @@ class Eisenstein:
         return result
 
 
+def _trunc_div(numerator, denominator: int) -> int:
+    """
+    Exact int(numerator / denominator) for denominator > 0
+    """
+    if numerator < 0:
+        return -(-numerator // denominator)
+    return numerator // denominator
+
+
+def _round_div(numerator, denominator: int) -> int:
+    """
+    Exact round(numerator / denominator) for denominator > 0,
+    ties go to even number like built-in round() does
+    """
+    q, r = divmod(numerator, denominator)
+    if 2 * r > denominator or (2 * r == denominator and q % 2 == 1):
+        q += 1
+    return q
+
+
+# Slot setters used by constructors - plain attribute assignment is blocked
+# by __setattr__ and object.__setattr__ is noticeably slower on hot paths.
+_set_co_real = Eisenstein.co_real.__set__
+_set_co_omega = Eisenstein.co_omega.__set__
+
+
 def get_dot_product(x: Eisenstein, y: Eisenstein):
     """
     Dot product
@@ -199,6 +303,27 @@ def get_dot_product(x: Eisenstein, y: Eisenstein):
     return result
 
 
+def floor_root(norm, i: int = 1) -> int:
+    """
+    int(abs(i * x)) for x with given norm (int or Fraction), on integers only:
+    abs(i * x) = sqrt(i^2 * norm) and floor(sqrt(r)) = isqrt(floor(r)), r >= 0
+
+    :return: floor of modulus of i * x
+    """
+    return isqrt(i * i * norm.numerator // norm.denominator)
+
+
+def ceil_root(norm, i: int = 1) -> int:
+    """
+    :return: ceil of modulus of i * x for x with given norm, see floor_root
+    """
+    scaled = i * i * norm.numerator
+    root = isqrt(scaled // norm.denominator)
+    if root * root * norm.denominator == scaled:
+        return root
+    return root + 1
+
+
 def get_eisenstein_form(var: complex):
     """
     (x,iy) -> (a,bw), where x,y: float, a,b: integer
@@ -209,19 +334,107 @@ def get_eisenstein_form(var: complex):
     return Eisenstein(round(x + y / SQRT_THREE), round((2 * y) / SQRT_THREE))
 
 
-def gcd(x: Eisenstein, y: Eisenstein):
-    """Calculate the Greatest Common Divisor of a and b.
+def euclid_gcd(x: Eisenstein, y: Eisenstein):
+    """
+    Euclidean algorithm with nearest-quotient remainder (see __mod__).
+    """
+
+    # Norms are compared instead of float abs() and the loop runs until
+    # remainder is zero, so integer arithmetic is exact for any size
+    if y.get_norm > x.get_norm:
+        x, y = y, x
+    while y != 0:
+        x, y = y, x % y
+    return x
+
+
+def _divisible_by_lambda(a: int, b: int) -> bool:
+    # lambda = 1 - w and w = 1 (mod lambda), so a + bw = a + b (mod lambda)
+    return (a + b) % 3 == 0
+
+
+def _primary(a: int, b: int):
+    """
+    Multiply a+bw (not divisible by lambda) by a unit w^k
+    so that the result is +-1 (mod 3), i.e. b = 0 (mod 3)
+    """
+    if b % 3 == 0:
+        return a, b
+    if (a - b) % 3 == 0:
+        return -b, a - b  # (a + bw) * w
+    return b - a, -a  # (a + bw) * w^2
+
+
+def binary_gcd(x: Eisenstein, y: Eisenstein):
+    """
+    Binary gcd of Damgard and Frandsen (paper cited in gcd).
+    Works only with division by lambda = 1 - w (norm 3), additions and
+    multiplications by units - there is no division with remainder.
+
+    If a, b are both +-1 (mod 3), one of a - b, a + b is divisible by 3,
+    which is lambda^2 times a unit, so every step divides the larger
+    number's norm by at least 9/4.
+    """
+    a, b = x.co_real, x.co_omega
+    c, d = y.co_real, y.co_omega
+    if a == b == 0:
+        return y
+    if c == d == 0:
+        return x
+
+    # Common power of lambda: (a + bw) / (1 - w) = ((2a - b) + (a + b)w) / 3
+    t = 0
+    while _divisible_by_lambda(a, b) and _divisible_by_lambda(c, d):
+        a, b = (2 * a - b) // 3, (a + b) // 3
+        c, d = (2 * c - d) // 3, (c + d) // 3
+        t += 1
+    while _divisible_by_lambda(a, b):
+        a, b = (2 * a - b) // 3, (a + b) // 3
+    while _divisible_by_lambda(c, d):
+        c, d = (2 * c - d) // 3, (c + d) // 3
+    a, b = _primary(a, b)
+    c, d = _primary(c, d)
+
+    while True:
+        if a * a - a * b + b * b < c * c - c * d + d * d:
+            a, b, c, d = c, d, a, b
+        if (a - c) % 3 == 0:
+            a, b = a - c, b - d
+        else:
+            a, b = a + c, b + d
+        if a == b == 0:
+            break
+        while _divisible_by_lambda(a, b):
+            a, b = (2 * a - b) // 3, (a + b) // 3
+        a, b = _primary(a, b)
+
+    result = Eisenstein(c, d)
+    for _ in range(t):
+        result = result * Eisenstein(1, -1)
+    return result
+
+
+GCD_ENGINES = {"euclid": euclid_gcd, "binary": binary_gcd}
+
+
+def gcd(x: Eisenstein, y: Eisenstein, engine: str = "euclid"):
+    """Calculate the Greatest Common Divisor of x and y.
 
     Paper: Efficient algorithms for gcd and cubic residuosity
            in the ring of Eisenstein integers
     http://cs.au.dk/~gudmund/Documents/cubicres.pdf
 
-    Unless b==0, the result will have the same sign as b (so that when
-    b is divided by it, the result comes out positive).
+    engine selects algorithm from GCD_ENGINES. The gcd is defined up to
+    a unit (+-1, +-w, +-w^2) and engines return different associates:
+    "euclid" - last nonzero remainder of Euclidean loop, not normalized,
+    "binary" - primary associate a+bw (b = 0, a = +-1 mod 3) of the part
+               prime to lambda, times (1 - w)^t for the common power
+               lambda^t of x and y.
+    If x or y is zero, both engines return the other argument as it is.
     """
 
-    if abs(y) > abs(x):
-        x, y = y, x
-    while get_dot_product(x, y):
-        x, y = y, x % y
-    return x
+    try:
+        function = GCD_ENGINES[engine]
+    except KeyError:
+        raise ValueError("Unknown gcd engine: %r" % (engine,))
+    return function(x, y)
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Vectorized Eisenstein integers - Python 3.x
+
+   EisensteinArray keeps many a+bw numbers as two contiguous arrays of
+   coefficients and does ring arithmetic elementwise. Results are equal
+   to the ones of Eisenstein class from eisenstein.py.
+
+   Coefficients are int64 while their magnitude is below SAFE_LIMIT, so
+   no intermediate product of an operation can overflow. Larger values
+   are kept as Python ints (object arrays) - exact, but slower.
+"""
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+from eisenstein import Eisenstein, SQRT_THREE
+
+try:
+    import numpy as np
+except ImportError:  # array types are optional
+    np = None
+
+# |a|, |b| < 2^30 keeps a*c + b*d - a*d (norms, products) within int64
+SAFE_LIMIT = 2 ** 30
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("eisenstein_array requires numpy")
+
+
+def _fits(var) -> bool:
+    # True if int64 arithmetic on var is safe
+    if isinstance(var, int):
+        return -SAFE_LIMIT < var < SAFE_LIMIT
+    if var.dtype == object:
+        return False
+    return var.size == 0 or int(np.abs(var).max()) < SAFE_LIMIT
+
+
+def _coefficients(var):
+    """
+    :return: int64 array of var, or object array if values are too big
+    """
+    if isinstance(var, np.ndarray) and var.dtype.kind in "iu":
+        array = var.astype(np.int64, copy=False)
+    else:
+        array = np.asarray(var, dtype=object)
+        if all(-SAFE_LIMIT < int(x) < SAFE_LIMIT for x in array.flat):
+            array = array.astype(np.int64)
+    if not _fits(array):
+        array = array.astype(object)
+    return array
+
+
+def _round_div(numerator, denominator):
+    """
+    Elementwise round(numerator / denominator) for denominator > 0,
+    ties to even - same as eisenstein._round_div
+    """
+    q = numerator // denominator
+    r = numerator - q * denominator
+    up = (2 * r > denominator) | ((2 * r == denominator) & (q % 2 == 1))
+    return q + up.astype(np.int64)
+
+
+def _trunc_div(numerator, denominator):
+    """
+    Elementwise int(numerator / denominator) for denominator > 0
+    """
+    q = numerator // denominator
+    fix = (numerator < 0) & (q * denominator != numerator)
+    return q + fix.astype(np.int64)
+
+
+class EisensteinArray:
+    """
+    One dimensional array of Eisenstein integers
+    """
+
+    __slots__ = ("co_real", "co_omega")
+
+    def __init__(self, co_real, co_omega=None):
+        _require_numpy()
+        co_real = _coefficients(co_real)
+        if co_omega is None:
+            co_omega = np.zeros(len(co_real), dtype=np.int64)
+        else:
+            co_omega = _coefficients(co_omega)
+        assert co_real.ndim == co_omega.ndim == 1
+        assert len(co_real) == len(co_omega)
+        if co_real.dtype != co_omega.dtype:
+            co_real = co_real.astype(object)
+            co_omega = co_omega.astype(object)
+        self.co_real = co_real
+        self.co_omega = co_omega
+
+    @classmethod
+    def from_list(cls, values):
+        """
+        :param values: sequence of Eisenstein (or int)
+        """
+        values = [Eisenstein(x) if isinstance(x, int) else x for x in values]
+        return cls([x.co_real for x in values], [x.co_omega for x in values])
+
+    @classmethod
+    def from_complex(cls, values):
+        """
+        Elementwise get_eisenstein_form of complex array
+        """
+        _require_numpy()
+        values = np.asarray(values, dtype=complex)
+        x = values.real
+        y = values.imag
+        return cls(
+            np.round(x + y / SQRT_THREE).astype(np.int64),
+            np.round((2 * y) / SQRT_THREE).astype(np.int64),
+        )
+
+    def tolist(self) -> list:
+        return [
+            Eisenstein(int(a), int(b)) for a, b in zip(self.co_real, self.co_omega)
+        ]
+
+    def __len__(self):
+        return len(self.co_real)
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return Eisenstein(int(self.co_real[key]), int(self.co_omega[key]))
+        return EisensteinArray(self.co_real[key], self.co_omega[key])
+
+    def __str__(self):
+        return "EisensteinArray(%s)" % ", ".join(str(x) for x in self.tolist())
+
+    def __repr__(self):
+        return str(self)
+
+    def _operands(self, other):
+        """
+        :return: (a, b, c, d) - coefficients of self and other in common dtype
+        """
+        if isinstance(other, int):
+            other = Eisenstein(other)
+        if isinstance(other, EisensteinArray):
+            c = other.co_real
+            d = other.co_omega
+            if (c.dtype == object) != (self.co_real.dtype == object):
+                return (
+                    self.co_real.astype(object),
+                    self.co_omega.astype(object),
+                    c.astype(object),
+                    d.astype(object),
+                )
+            return self.co_real, self.co_omega, c, d
+        if isinstance(other, Eisenstein):
+            c = other.co_real
+            d = other.co_omega
+            assert isinstance(c, int) and isinstance(d, int)
+            if self.co_real.dtype != object and not (_fits(c) and _fits(d)):
+                return self.co_real.astype(object), self.co_omega.astype(object), c, d
+            return self.co_real, self.co_omega, c, d
+        return NotImplemented
+
+    def __eq__(self, other):
+        operands = self._operands(other)
+        if operands is NotImplemented:
+            return NotImplemented
+        a, b, c, d = operands
+        return (a == c) & (b == d)
+
+    __hash__ = None
+
+    def __add__(self, other):
+        operands = self._operands(other)
+        if operands is NotImplemented:
+            return NotImplemented
+        a, b, c, d = operands
+        return EisensteinArray(a + c, b + d)
+
+    def __sub__(self, other):
+        operands = self._operands(other)
+        if operands is NotImplemented:
+            return NotImplemented
+        a, b, c, d = operands
+        return EisensteinArray(a - c, b - d)
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __neg__(self):
+        return EisensteinArray(-self.co_real, -self.co_omega)
+
+    def __mul__(self, other):
+        # (a+bw)(c+dw)=(ac-bd)+(bc+ad-db)w
+        operands = self._operands(other)
+        if operands is NotImplemented:
+            return NotImplemented
+        a, b, c, d = operands
+        return EisensteinArray(a * c - b * d, b * c + a * d - b * d)
+
+    __rmul__ = __mul__
+    __radd__ = __add__
+
+    def _quotient_numerators(self, other):
+        # self * conj(other) = e + fw, self / other = (e + fw) / norm(other)
+        operands = self._operands(other)
+        if operands is NotImplemented:
+            return NotImplemented
+        a, b, c, d = operands
+        bottom = c * c - c * d + d * d
+        if np.any(bottom == 0):
+            raise ZeroDivisionError("Eisenstein division by zero")
+        return a * c + b * d - a * d, b * c - a * d, bottom, a, b, c, d
+
+    def __floordiv__(self, other):
+        quotient = self._quotient_numerators(other)
+        if quotient is NotImplemented:
+            return NotImplemented
+        e, f, bottom = quotient[:3]
+        return EisensteinArray(_trunc_div(e, bottom), _trunc_div(f, bottom))
+
+    def _scalar_array(self, other):
+        # int or Eisenstein as array of len(self) - left operand of // and %
+        operands = self._operands(other)
+        if operands is NotImplemented:
+            return NotImplemented
+        a, b, c, d = operands
+        return EisensteinArray(np.full_like(a, c), np.full_like(b, d))
+
+    def __rfloordiv__(self, other):
+        other = self._scalar_array(other)
+        if other is NotImplemented:
+            return NotImplemented
+        return other // self
+
+    def __truediv__(self, other):
+        """
+        This operation is not allowed in Eisenstein numbers
+        """
+        assert False
+
+    def __mod__(self, other):
+        quotient = self._quotient_numerators(other)
+        if quotient is NotImplemented:
+            return NotImplemented
+        e, f, bottom, a, b, c, d = quotient
+        k = _round_div(e, bottom)
+        m = _round_div(f, bottom)
+        return EisensteinArray(a - (k * c - m * d), b - (m * c + k * d - m * d))
+
+    def __rmod__(self, other):
+        other = self._scalar_array(other)
+        if other is NotImplemented:
+            return NotImplemented
+        return other % self
+
+    def div_mod(self, other):
+        quotient = self._quotient_numerators(other)
+        if quotient is NotImplemented:
+            return NotImplemented
+        e, f, bottom = quotient[:3]
+        return (
+            EisensteinArray(e // bottom, f // bottom),
+            EisensteinArray(e % bottom, f % bottom),
+        )
+
+    def __abs__(self):
+        """
+        Elementwise abs() - same formula as Eisenstein.__abs__
+        """
+        a = self.co_real
+        b = self.co_omega
+        return np.asarray(
+            ((a - (b / 2)) ** 2 + 3 * (b ** 2) / 4) ** 0.5, dtype=np.float64
+        )
+
+    @property
+    def get_complex_form(self):
+        """
+        :return: complex array, elementwise Eisenstein.get_complex_form
+        """
+        a = self.co_real.astype(np.float64)
+        b = self.co_omega.astype(np.float64)
+        return (a - (b / 2)) + 1j * ((b * SQRT_THREE) / 2)
+
+    @property
+    def get_norm(self):
+        a = self.co_real
+        b = self.co_omega
+        return a * a - a * b + b * b
+
+
+def get_dot_product(x, y):
+    """
+    Elementwise eisenstein.get_dot_product, x and y may be
+    EisensteinArray or Eisenstein (broadcasting)
+    """
+    if isinstance(x, EisensteinArray):
+        a, b, c, d = x._operands(y)
+    else:
+        c, d, a, b = y._operands(x)
+    return a * c + b * d - (b * c + a * d) / 2
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Asyncio Eisenstein Time Series operators - Python 3.x
+
+   Feed is an async iterable of samples together with its delta.
+   Operators are async generators wrapped into Feeds: hash, add, diff and
+   dehash await exactly the next input sample that the schedule of their
+   list version (eisenstein_operations.py) needs, using the same index
+   sequences as eisenstein_streams.py. Output ends when an input that is
+   needed next is exhausted.
+
+   QueueFeed is a Feed filled by producers through a bounded asyncio.Queue,
+   so a fast producer waits in put() until operators consume its samples.
+   buffered() decouples two stages of a pipeline by such queue.
+
+   Operators own their input feeds: when an operator ends (an input ran
+   out, or its own feed was closed) it closes its inputs with aclose(),
+   so tasks of buffered() feeds upstream are cancelled and none of them
+   stays blocked in put(). Producers that fill a QueueFeed themselves
+   run their own tasks and end them.
+
+   Example - many live feeds merged in one event loop:
+
+       a = QueueFeed(EisensteinFraction(2, 1), maxsize=64)
+       b = QueueFeed(EisensteinFraction(3, 0), maxsize=64)
+       # producer tasks: await a.put(sample) ... await a.close()
+       async for sample in ahash_Eisenstein_Fraction(a, b):
+           ...
+"""
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+import asyncio
+
+from eisenstein_fractions import EisensteinFraction
+from eisenstein_schedule import HashSchedule, compile_hash_schedule
+from eisenstein_operations import (
+    add_deltas,
+    diff_deltas,
+    dehasheven_deltas,
+    dehashodd_deltas,
+)
+from eisenstein_streams import _resample_indexes, _select_indexes, _first_flags
+
+QUEUE_SIZE = 256
+
+
+class Feed:
+    """
+    Async iterable of samples with its delta
+    """
+
+    __slots__ = ("delta", "_source")
+
+    def __init__(self, source, delta):
+        if not isinstance(delta, EisensteinFraction):
+            delta = EisensteinFraction(delta)
+        self.delta = delta
+        self._source = source
+
+    def __aiter__(self):
+        return self._source.__aiter__()
+
+    async def aclose(self):
+        """
+        Close the source (async generator of operator closes its inputs)
+        """
+        close = getattr(self._source, "aclose", None)
+        if close is not None:
+            await close()
+
+    def __str__(self):
+        return "Feed(delta=%s)" % self.delta
+
+    def __repr__(self):
+        return str(self)
+
+
+class _Closed:
+    # Queue item that ends QueueFeed, error is raised to the consumer
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+
+class QueueFeed(Feed):
+    """
+    Feed filled by producers through bounded queue
+    """
+
+    __slots__ = ("_queue", "_done", "_task")
+
+    def __init__(self, delta, maxsize: int = QUEUE_SIZE):
+        super().__init__(self, delta)
+        self._queue = asyncio.Queue(maxsize)
+        self._done = False
+        self._task = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._done:
+            raise StopAsyncIteration
+        sample = await self._queue.get()
+        if isinstance(sample, _Closed):
+            self._done = True
+            if sample.error is not None:
+                raise sample.error
+            raise StopAsyncIteration
+        return sample
+
+    async def put(self, sample):
+        """
+        Append sample, waits while the queue is full
+        """
+        await self._queue.put(sample)
+
+    async def close(self, error: BaseException = None):
+        """
+        End the feed after queued samples; error is raised to the consumer
+        """
+        await self._queue.put(_Closed(error))
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    async def aclose(self):
+        """
+        Stop the task filling this feed (see buffered)
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+async def _samples(iterable):
+    for sample in iterable:
+        yield sample
+
+
+def from_iterable(iterable, delta) -> Feed:
+    """
+    Feed of samples of list or other (sync) iterable
+    """
+    return Feed(_samples(iterable), delta)
+
+
+async def _pump(feed: Feed, queue: QueueFeed):
+    try:
+        async for sample in feed:
+            await queue.put(sample)
+    except asyncio.CancelledError:
+        raise
+    except Exception as error:
+        await queue.close(error)
+    else:
+        await queue.close()
+    finally:
+        await feed.aclose()
+
+
+def buffered(feed: Feed, maxsize: int = QUEUE_SIZE) -> QueueFeed:
+    """
+    Run feed in its own task that stays at most maxsize samples ahead of
+    the consumer. Must be called with running event loop.
+    """
+    queue = QueueFeed(feed.delta, maxsize)
+    queue._task = asyncio.ensure_future(_pump(feed, queue))
+    return queue
+
+
+async def collect(feed: Feed, limit: int = None) -> list:
+    """
+    :return: list of samples of feed, at most limit of them
+    """
+    result = []
+    if limit is not None and limit <= 0:
+        return result
+    async for sample in feed:
+        result.append(sample)
+        if len(result) == limit:
+            break
+    return result
+
+
+async def _interlace(A: Feed, B: Feed, schedule: HashSchedule):
+    a = A.__aiter__()
+    b = B.__aiter__()
+    try:
+        for from_a, _ in schedule.sources():
+            try:
+                sample = await (a.__anext__() if from_a else b.__anext__())
+            except StopAsyncIteration:
+                return
+            yield sample
+    finally:
+        await A.aclose()
+        await B.aclose()
+
+
+async def _resample(fast: Feed, slow: Feed, ratio, fast_first: bool):
+    a = fast.__aiter__()
+    b = slow.__aiter__()
+    position = -1
+    value = None
+    try:
+        for idx in _resample_indexes(ratio):
+            try:
+                sample = await a.__anext__()
+                while position < idx:
+                    value = await b.__anext__()
+                    position += 1
+            except StopAsyncIteration:
+                return
+            if fast_first:
+                yield (sample, value)
+            else:
+                yield (value, sample)
+    finally:
+        await fast.aclose()
+        await slow.aclose()
+
+
+async def _select(C: Feed, indexes):
+    c = C.__aiter__()
+    position = -1
+    value = None
+    try:
+        for idx in indexes:
+            try:
+                while position < idx:
+                    value = await c.__anext__()
+                    position += 1
+            except StopAsyncIteration:
+                return
+            yield value
+    finally:
+        await C.aclose()
+
+
+async def _deinterlace(C: Feed, delta: EisensteinFraction, take_first: bool):
+    flags = _first_flags(delta)
+    try:
+        async for sample in C:
+            if next(flags) == take_first:
+                yield sample
+    finally:
+        await C.aclose()
+
+
+def ahash_Eisenstein_Fraction(A: Feed, B: Feed) -> Feed:
+    """
+    Async version of hash_Eisenstein_Fraction.
+    :return: Feed of interlaced series with deltaC
+    """
+
+    schedule = compile_hash_schedule(A.delta, B.delta)
+    return Feed(_interlace(A, B, schedule), schedule.deltaC)
+
+
+def aadd_Eisenstein_Fraction(A: Feed, B: Feed) -> Feed:
+    """
+    Async version of add_Eisenstein_Fraction.
+    :return: Feed of (first, second) pairs with deltaC
+    """
+
+    deltaC, ratio = add_deltas(A.delta, B.delta)
+
+    if deltaC == A.delta:
+        return Feed(_resample(A, B, ratio, True), deltaC)
+    return Feed(_resample(B, A, ratio, False), deltaC)
+
+
+def adiff_Eisenstein_Fraction(
+    C: Feed, deltaA: EisensteinFraction, deltaB: EisensteinFraction
+) -> Feed:
+    """
+    Async version of diff_Eisenstein_Fraction.
+    :return: Feed of selected samples with deltaC
+    """
+
+    deltaC, ratio = diff_deltas(deltaA, deltaB)
+    return Feed(_select(C, _select_indexes(ratio)), deltaC)
+
+
+def adehasheven_Eisenstein_Fraction(C: Feed, deltaA: EisensteinFraction) -> Feed:
+    """
+    Async version of dehasheven_Eisenstein_Fraction, deltaC is C.delta.
+    :return: Feed of samples of first series with deltaB
+    """
+
+    deltaB, delta = dehasheven_deltas(C.delta, deltaA)
+    return Feed(_deinterlace(C, delta, True), deltaB)
+
+
+def adehashodd_Eisenstein_Fraction(C: Feed, deltaB: EisensteinFraction) -> Feed:
+    """
+    Async version of dehashodd_Eisenstein_Fraction, deltaC is C.delta.
+    :return: Feed of samples of second series with deltaA
+    """
+
+    deltaA, delta = dehashodd_deltas(C.delta, deltaB)
+    return Feed(_deinterlace(C, delta, False), deltaA)
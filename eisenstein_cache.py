@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Memoization of values derived from stream deltas - Python 3.x
+
+   Operators derive the same quantities (deltaC, speed comparison,
+   inverse deltas of dehash, compiled schedules) from a small set of
+   stream rates again and again. They are kept here in one bounded LRU
+   cache keyed by (function, delta pair).
+   Size is taken from parameters.cfg_prm.cache_size (0 disables caching).
+"""
+
+import sys
+from collections import OrderedDict
+from functools import wraps
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+import parameters
+
+
+class DeltaCache:
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def maxsize(self) -> int:
+        return parameters.cfg_prm.cache_size
+
+    def lookup(self, key, compute, *args):
+        """
+        :return: cached value of key, compute(*args) is called and stored on miss
+        """
+        entries = self.entries
+        try:
+            value = entries[key]
+        except KeyError:
+            pass
+        else:
+            entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = compute(*args)
+        maxsize = self.maxsize
+        if maxsize > 0:
+            entries[key] = value
+            while len(entries) > maxsize:
+                entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+        }
+
+
+delta_cache = DeltaCache()
+
+
+def memoize_deltas(function):
+    """
+    Decorator of function(deltaX, deltaY) - results are kept in delta_cache.
+    Deltas are immutable and hashable so they are used directly as a key.
+    """
+
+    @wraps(function)
+    def wrapper(deltaX, deltaY):
+        return delta_cache.lookup((function, deltaX, deltaY), function, deltaX, deltaY)
+
+    return wrapper
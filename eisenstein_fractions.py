@@ -7,36 +7,47 @@ if sys.version_info[0] < 3:
     print("You need Python 3 to run this script.")
     sys.exit(1)
 
-from eisenstein import Eisenstein, SQRT_THREE
+from eisenstein import Eisenstein, SQRT_THREE, _set_co_real, _set_co_omega
 from fractions import Fraction
-from math import floor, ceil, sqrt
+from math import floor, ceil, sqrt, gcd
 from decimal import *
 
 
 class EisensteinFraction(Eisenstein):
+    """
+    Immutable a+bw value type with Fraction coefficients.
+    Storage (co_real, co_omega slots) and hashing are inherited from Eisenstein.
+    """
+
+    __slots__ = ()
+
     def __init__(self, obj=None, optional=0, four=None):
 
         if four is not None:
             (real_num, real_den, omega_num, omega_den) = four
             assert real_den != 0
             assert omega_den != 0
-            self.co_real = Fraction(real_num, real_den)
-            self.co_omega = Fraction(omega_num, omega_den)
+            co_real = Fraction(real_num, real_den)
+            co_omega = Fraction(omega_num, omega_den)
         elif isinstance(obj, (int, Fraction)) and isinstance(optional, (int, Fraction)):
-            self.co_real = Fraction(obj)
-            self.co_omega = Fraction(optional)
+            co_real = Fraction(obj)
+            co_omega = Fraction(optional)
         elif isinstance(obj, (Eisenstein, EisensteinFraction)) and optional == 0:
-            self.co_real = Fraction(obj.co_real)
-            self.co_omega = Fraction(obj.co_omega)
+            co_real = Fraction(obj.co_real)
+            co_omega = Fraction(obj.co_omega)
         else:
             raise TypeError("Arguments should be an ints, Fractions or one Eisenstein")
 
-        assert isinstance(self.co_real, Fraction)
-        assert isinstance(self.co_omega, Fraction)
+        assert isinstance(co_real, Fraction)
+        assert isinstance(co_omega, Fraction)
+        _set_co_real(self, co_real)
+        _set_co_omega(self, co_omega)
 
     def __add__(self, other):
         if isinstance(other, (int, Fraction)):
             other = EisensteinFraction(other)
+        elif not isinstance(other, Eisenstein):
+            return NotImplemented
 
         return EisensteinFraction(
             self.co_real + other.co_real, self.co_omega + other.co_omega
@@ -45,6 +56,8 @@ class EisensteinFraction(Eisenstein):
     def __sub__(self, other):
         if isinstance(other, (int, Fraction)):
             other = EisensteinFraction(other)
+        elif not isinstance(other, Eisenstein):
+            return NotImplemented
 
         return EisensteinFraction(
             self.co_real - other.co_real, self.co_omega - other.co_omega
@@ -53,6 +66,8 @@ class EisensteinFraction(Eisenstein):
     def __mul__(self, other):
         if isinstance(other, (int, Fraction)):
             other = EisensteinFraction(other)
+        elif not isinstance(other, Eisenstein):
+            return NotImplemented
 
         return EisensteinFraction(
             (self.co_real * other.co_real) - (self.co_omega * other.co_omega),
@@ -143,3 +158,162 @@ class EisensteinFraction(Eisenstein):
             int(ceil(self.co_real + self.co_omega / SQRT_THREE)),
             int(ceil(2 * self.co_omega / SQRT_THREE)),
         )
+
+
+# Denominator size (bits) above which results of NormalizedEisensteinFraction
+# arithmetic are reduced by common gcd. Smaller values are left unreduced.
+REDUCE_BITS = 64
+
+
+def _as_triple(var):
+    """
+    :return: (real numerator, omega numerator, common denominator) of var
+    """
+    if isinstance(var, NormalizedEisensteinFraction):
+        return var.num_real, var.num_omega, var.den
+    if isinstance(var, int):
+        return var, 0, 1
+    if isinstance(var, Fraction):
+        return var.numerator, 0, var.denominator
+    if isinstance(var, Eisenstein):
+        co_real = Fraction(var.co_real)
+        co_omega = Fraction(var.co_omega)
+        den = co_real.denominator * co_omega.denominator // gcd(
+            co_real.denominator, co_omega.denominator
+        )
+        return (
+            co_real.numerator * (den // co_real.denominator),
+            co_omega.numerator * (den // co_omega.denominator),
+            den,
+        )
+    raise TypeError("Arguments should be an ints, Fractions or one Eisenstein")
+
+
+class NormalizedEisensteinFraction(EisensteinFraction):
+    """
+    EisensteinFraction kept as (num_real + num_omega w) / den with one integer
+    denominator. Arithmetic works on integers only and reduction by common
+    gcd is deferred until den grows over REDUCE_BITS (or reduced() is called).
+    co_real and co_omega are computed on access, so the public API
+    (four=, floor, ceil, round..., get_norm, str) stays the same.
+    """
+
+    __slots__ = ("num_real", "num_omega", "den")
+
+    def __init__(self, obj=None, optional=0, four=None):
+
+        if four is not None:
+            (real_num, real_den, omega_num, omega_den) = four
+            assert real_den != 0
+            assert omega_den != 0
+            obj = Fraction(real_num, real_den)
+            optional = Fraction(omega_num, omega_den)
+        elif isinstance(obj, (int, Fraction)) and isinstance(optional, (int, Fraction)):
+            pass
+        elif isinstance(obj, Eisenstein) and optional == 0:
+            obj, optional = obj.co_real, obj.co_omega
+        else:
+            raise TypeError("Arguments should be an ints, Fractions or one Eisenstein")
+
+        (num_real, num_omega, den) = _as_triple(EisensteinFraction(obj, optional))
+        _set_num_real(self, num_real)
+        _set_num_omega(self, num_omega)
+        _set_den(self, den)
+
+    @classmethod
+    def _make(cls, num_real: int, num_omega: int, den: int):
+        if den < 0:
+            num_real, num_omega, den = -num_real, -num_omega, -den
+        if den.bit_length() > REDUCE_BITS:
+            common = gcd(gcd(num_real, num_omega), den)
+            num_real //= common
+            num_omega //= common
+            den //= common
+        obj = object.__new__(cls)
+        _set_num_real(obj, num_real)
+        _set_num_omega(obj, num_omega)
+        _set_den(obj, den)
+        return obj
+
+    def __reduce__(self):
+        return (type(self)._make, (self.num_real, self.num_omega, self.den))
+
+    def reduced(self):
+        """
+        :return: same value with gcd(num_real, num_omega, den) == 1
+        """
+        common = gcd(gcd(self.num_real, self.num_omega), self.den)
+        return type(self)._make(
+            self.num_real // common, self.num_omega // common, self.den // common
+        )
+
+    @property
+    def co_real(self) -> Fraction:
+        return Fraction(self.num_real, self.den)
+
+    @property
+    def co_omega(self) -> Fraction:
+        return Fraction(self.num_omega, self.den)
+
+    @property
+    def get_norm(self) -> Fraction:
+        a = self.num_real
+        b = self.num_omega
+        return Fraction(a * a - a * b + b * b, self.den * self.den)
+
+    def __eq__(self, other):
+        if not isinstance(other, (int, Fraction, Eisenstein)):
+            return NotImplemented
+        (a, b, d) = _as_triple(other)
+        return self.num_real * d == a * self.den and self.num_omega * d == b * self.den
+
+    __hash__ = EisensteinFraction.__hash__
+
+    def __add__(self, other):
+        (a, b, d) = _as_triple(other)
+        if d == self.den:
+            return self._make(self.num_real + a, self.num_omega + b, d)
+        return self._make(
+            self.num_real * d + a * self.den,
+            self.num_omega * d + b * self.den,
+            self.den * d,
+        )
+
+    def __sub__(self, other):
+        (a, b, d) = _as_triple(other)
+        if d == self.den:
+            return self._make(self.num_real - a, self.num_omega - b, d)
+        return self._make(
+            self.num_real * d - a * self.den,
+            self.num_omega * d - b * self.den,
+            self.den * d,
+        )
+
+    def __mul__(self, other):
+        if isinstance(other, int):
+            return self._make(self.num_real * other, self.num_omega * other, self.den)
+        (c, e, d) = _as_triple(other)
+        a = self.num_real
+        b = self.num_omega
+        # (a+bw)(c+ew)=(ac-be)+(bc+ae-be)w
+        return self._make(a * c - b * e, b * c + a * e - b * e, self.den * d)
+
+    def __truediv__(self, other):
+        # x / y = x * conj(y) / N(y), conj(c+ew) = (c-e) - ew
+        (c, e, d) = _as_triple(other)
+        a = self.num_real
+        b = self.num_omega
+        norm = c * c - c * e + e * e
+        assert norm != 0
+        f = c - e
+        return self._make(
+            (a * f + b * e) * d, (b * f - a * e + b * e) * d, self.den * norm
+        )
+
+    __rmul__ = __mul__
+    __radd__ = __add__
+
+
+_set_num_real = NormalizedEisensteinFraction.num_real.__set__
+_set_num_omega = NormalizedEisensteinFraction.num_omega.__set__
+_set_den = NormalizedEisensteinFraction.den.__set__
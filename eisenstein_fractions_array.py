@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Vectorized Eisenstein Fractions - Python 3.x
+
+   EisensteinFractionArray keeps many a+bw numbers with rational a, b as
+   numerator and denominator arrays of both coefficients. Arithmetic is
+   exact integer arithmetic done elementwise; every coefficient is kept
+   reduced with positive denominator, as Fraction does. Results are equal
+   to the ones of EisensteinFraction class from eisenstein_fractions.py.
+
+   Each elementary step runs on int64 only if all its inputs are below
+   SAFE_LIMIT (so products and sums cannot overflow), otherwise it falls
+   back to Python ints in object arrays.
+"""
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+from fractions import Fraction
+
+from eisenstein import Eisenstein, SQRT_THREE
+from eisenstein_fractions import EisensteinFraction
+from eisenstein_array import (
+    EisensteinArray,
+    SAFE_LIMIT,
+    np,
+    _require_numpy,
+    _fits,
+    _round_div,
+    _trunc_div,
+)
+
+
+def _integers(var):
+    # int64 array if var fits below SAFE_LIMIT, object array otherwise
+    array = np.asarray(var)
+    if array.dtype.kind not in "iu":
+        array = np.asarray(var, dtype=object)
+        if all(-SAFE_LIMIT < int(x) < SAFE_LIMIT for x in array.flat):
+            return array.astype(np.int64)
+        return array
+    array = array.astype(np.int64, copy=False)
+    return array if _fits(array) else array.astype(object)
+
+
+def _common(*arrays):
+    # Same arrays, all int64 if every one fits, all object otherwise
+    if all(_fits(x) for x in arrays):
+        return arrays
+    return tuple(x.astype(object) for x in arrays)
+
+
+def _reduced(num, den):
+    """
+    :return: (num, den) divided by their gcd, den > 0, int64 when it fits
+    """
+    common = np.gcd(num, den)
+    common = np.where(den < 0, -common, common)
+    return _integers(num // common), _integers(den // common)
+
+
+def _frac_add(x, y):
+    (a, b, c, d) = _common(x[0], x[1], y[0], y[1])
+    return _reduced(a * d + c * b, b * d)
+
+
+def _frac_neg(x):
+    return -x[0], x[1]
+
+
+def _frac_sub(x, y):
+    return _frac_add(x, _frac_neg(y))
+
+
+def _frac_mul(x, y):
+    (a, b, c, d) = _common(x[0], x[1], y[0], y[1])
+    return _reduced(a * c, b * d)
+
+
+def _frac_div(x, y):
+    (a, b, c, d) = _common(x[0], x[1], y[0], y[1])
+    if np.any(c == 0):
+        raise ZeroDivisionError("EisensteinFraction division by zero")
+    return _reduced(a * d, b * c)
+
+
+def _ones_like(var):
+    return np.ones(np.shape(var), dtype=np.int64)
+
+
+class EisensteinFractionArray:
+    """
+    One dimensional array of Eisenstein Fractions
+    """
+
+    __slots__ = ("real_num", "real_den", "omega_num", "omega_den")
+
+    def __init__(self, real_num, real_den, omega_num, omega_den):
+        _require_numpy()
+        real = _reduced(*_common(_integers(real_num), _integers(real_den)))
+        omega = _reduced(*_common(_integers(omega_num), _integers(omega_den)))
+        assert np.all(real[1] != 0)
+        assert np.all(omega[1] != 0)
+        assert real[0].ndim == 1
+        assert len(real[0]) == len(real[1]) == len(omega[0]) == len(omega[1])
+        (self.real_num, self.real_den) = real
+        (self.omega_num, self.omega_den) = omega
+
+    @classmethod
+    def _from_pairs(cls, real, omega):
+        # real, omega are already reduced (num, den) pairs - no gcd again
+        obj = object.__new__(cls)
+        (obj.real_num, obj.real_den, obj.omega_num, obj.omega_den) = (
+            np.array(x) for x in np.broadcast_arrays(*real, *omega)
+        )
+        return obj
+
+    @classmethod
+    def from_list(cls, values):
+        """
+        :param values: sequence of EisensteinFraction, Eisenstein, Fraction or int
+        """
+        values = [_as_fraction(x) for x in values]
+        return cls(
+            [x.co_real.numerator for x in values],
+            [x.co_real.denominator for x in values],
+            [x.co_omega.numerator for x in values],
+            [x.co_omega.denominator for x in values],
+        )
+
+    def tolist(self) -> list:
+        return [
+            EisensteinFraction(four=(int(a), int(b), int(c), int(d)))
+            for a, b, c, d in zip(
+                self.real_num, self.real_den, self.omega_num, self.omega_den
+            )
+        ]
+
+    def __len__(self):
+        return len(self.real_num)
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return EisensteinFraction(
+                four=(
+                    int(self.real_num[key]),
+                    int(self.real_den[key]),
+                    int(self.omega_num[key]),
+                    int(self.omega_den[key]),
+                )
+            )
+        return EisensteinFractionArray(
+            self.real_num[key],
+            self.real_den[key],
+            self.omega_num[key],
+            self.omega_den[key],
+        )
+
+    def __str__(self):
+        return "EisensteinFractionArray(%s)" % ", ".join(
+            str(x) for x in self.tolist()
+        )
+
+    def __repr__(self):
+        return str(self)
+
+    @property
+    def real(self):
+        return self.real_num, self.real_den
+
+    @property
+    def omega(self):
+        return self.omega_num, self.omega_den
+
+    def _other(self, other):
+        """
+        :return: (real pair, omega pair) of other; scalars broadcast
+        """
+        if isinstance(other, EisensteinFractionArray):
+            return other.real, other.omega
+        if isinstance(other, EisensteinArray):
+            return (
+                (other.co_real, _ones_like(other.co_real)),
+                (other.co_omega, _ones_like(other.co_omega)),
+            )
+        if isinstance(other, (int, Fraction, Eisenstein)):
+            other = _as_fraction(other)
+            return (
+                (
+                    _integers([other.co_real.numerator]),
+                    _integers([other.co_real.denominator]),
+                ),
+                (
+                    _integers([other.co_omega.numerator]),
+                    _integers([other.co_omega.denominator]),
+                ),
+            )
+        return None
+
+    def __eq__(self, other):
+        operand = self._other(other)
+        if operand is None:
+            return NotImplemented
+        (real, omega) = operand
+        return (
+            (self.real_num == real[0])
+            & (self.real_den == real[1])
+            & (self.omega_num == omega[0])
+            & (self.omega_den == omega[1])
+        )
+
+    __hash__ = None
+
+    def __add__(self, other):
+        operand = self._other(other)
+        if operand is None:
+            return NotImplemented
+        (real, omega) = operand
+        return self._from_pairs(
+            _frac_add(self.real, real), _frac_add(self.omega, omega)
+        )
+
+    def __sub__(self, other):
+        operand = self._other(other)
+        if operand is None:
+            return NotImplemented
+        (real, omega) = operand
+        return self._from_pairs(
+            _frac_sub(self.real, real), _frac_sub(self.omega, omega)
+        )
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __neg__(self):
+        return self._from_pairs(_frac_neg(self.real), _frac_neg(self.omega))
+
+    def _multiply(self, real, omega):
+        # (a+bw)(c+dw)=(ac-bd)+(bc+ad-bd)w
+        bd = _frac_mul(self.omega, omega)
+        return self._from_pairs(
+            _frac_sub(_frac_mul(self.real, real), bd),
+            _frac_sub(
+                _frac_add(_frac_mul(self.omega, real), _frac_mul(self.real, omega)),
+                bd,
+            ),
+        )
+
+    def __mul__(self, other):
+        operand = self._other(other)
+        if operand is None:
+            return NotImplemented
+        return self._multiply(*operand)
+
+    __rmul__ = __mul__
+    __radd__ = __add__
+
+    def __truediv__(self, other):
+        # x / y = x * ((c - d) - dw) / norm(y), same as EisensteinFraction
+        operand = self._other(other)
+        if operand is None:
+            return NotImplemented
+        (c, d) = operand
+        norm = _frac_add(
+            _frac_sub(_frac_mul(c, c), _frac_mul(c, d)), _frac_mul(d, d)
+        )
+        return self._multiply(
+            _frac_div(_frac_sub(c, d), norm), _frac_div(_frac_neg(d), norm)
+        )
+
+    @property
+    def get_norm(self):
+        """
+        :return: (numerator, denominator) arrays of a^2 - ab + b^2
+        """
+        a = self.real
+        b = self.omega
+        return _frac_add(_frac_sub(_frac_mul(a, a), _frac_mul(a, b)), _frac_mul(b, b))
+
+    # Rounding to Eisenstein integers - see comments in EisensteinFraction
+
+    @property
+    def floor(self) -> EisensteinArray:
+        return EisensteinArray(
+            _trunc_div(self.real_num, self.real_den),
+            _trunc_div(self.omega_num, self.omega_den),
+        )
+
+    @property
+    def ceil(self) -> EisensteinArray:
+        return EisensteinArray(
+            -(-self.real_num // self.real_den), -(-self.omega_num // self.omega_den)
+        )
+
+    @property
+    def round(self) -> EisensteinArray:
+        return EisensteinArray(
+            _round_div(self.real_num, self.real_den),
+            _round_div(self.omega_num, self.omega_den),
+        )
+
+    def _float_forms(self):
+        # Same float steps as EisensteinFraction.round2:
+        # co_real + co_omega / SQRT_THREE and 2 * co_omega / SQRT_THREE
+        real = np.asarray(self.real_num / self.real_den, dtype=np.float64)
+        omega = np.asarray(self.omega_num / self.omega_den, dtype=np.float64)
+        double_omega = np.asarray(
+            (2 * self.omega_num) / self.omega_den, dtype=np.float64
+        )
+        return real + omega / SQRT_THREE, double_omega / SQRT_THREE
+
+    @property
+    def round2(self) -> EisensteinArray:
+        x, y = self._float_forms()
+        return EisensteinArray(
+            np.round(x).astype(np.int64), np.round(y).astype(np.int64)
+        )
+
+    @property
+    def floor2(self) -> EisensteinArray:
+        x, y = self._float_forms()
+        return EisensteinArray(
+            np.trunc(x).astype(np.int64), np.trunc(y).astype(np.int64)
+        )
+
+    @property
+    def ceil2(self) -> EisensteinArray:
+        x, y = self._float_forms()
+        return EisensteinArray(
+            np.ceil(x).astype(np.int64), np.ceil(y).astype(np.int64)
+        )
+
+
+def _as_fraction(var) -> EisensteinFraction:
+    if isinstance(var, EisensteinFraction):
+        return var
+    return EisensteinFraction(var)
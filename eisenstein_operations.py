@@ -9,22 +9,205 @@
 """
 
 import sys
-import math
 
 if sys.version_info[0] < 3:
     print("You need Python 3 to run this script.")
     sys.exit(1)
 
+from array import array
+
+from eisenstein import floor_root, ceil_root, isqrt
 from eisenstein_fractions import EisensteinFraction
-from eisenstein import get_dot_product
+from eisenstein_schedule import compile_hash_schedule, compile_interlace_schedule
+from eisenstein_cache import delta_cache, memoize_deltas
+
+
+@memoize_deltas
+def add_deltas(deltaA: EisensteinFraction, deltaB: EisensteinFraction):
+    """
+    :return: (deltaC, ratio) - faster of two deltas and step of the index
+             into the slower series per one output sample
+    """
+    # Norms are compared - same order as abs() without float rounding
+    if deltaA.get_norm < deltaB.get_norm:
+        deltaC = deltaA
+    else:
+        deltaC = deltaB
+
+    if deltaC == deltaA:
+        return deltaC, deltaA / deltaB
+    return deltaC, deltaB / deltaA
+
+
+def _multiadd_deltas(deltas: tuple):
+    deltaC = deltas[0]
+    for delta in deltas[1:]:
+        deltaC = add_deltas(deltaC, delta)[0]
+    return deltaC, tuple(deltaC / delta for delta in deltas)
+
+
+def multiadd_deltas(deltas: list):
+    """
+    :return: (deltaC, ratios) - fastest of deltas (the one add_deltas folded
+             from the left keeps) and step of the index into each series
+             per one output sample
+    """
+    deltas = tuple(deltas)
+    return delta_cache.lookup((multiadd_deltas, deltas), _multiadd_deltas, deltas)
+
+
+@memoize_deltas
+def diff_deltas(deltaA: EisensteinFraction, deltaB: EisensteinFraction):
+    """
+    :return: (deltaC, ratio) - ratio is None when no probes are dropped
+    """
+    normA = deltaA.get_norm
+    normB = deltaB.get_norm
+    if normA < normB:
+        deltaC = deltaA
+    else:
+        deltaC = deltaB
+
+    if normA > normB:
+        return deltaC, deltaA / deltaB
+    return deltaC, None
+
+
+@memoize_deltas
+def dehasheven_deltas(deltaC: EisensteinFraction, deltaA: EisensteinFraction):
+    """
+    :return: (deltaB, delta) - delta is the one used by interlace
+    """
 
-# Length of tested probe. Based on this value following functions will create
-# loops that will return combined series of data.
-PROBE_LEN = 40
+    # This condition should be true because Hashed TS should be faster than argument
+    assert deltaA.get_norm > deltaC.get_norm
+
+    deltaB = (deltaA * deltaC) / (deltaA - deltaC)
+
+    assert deltaB.get_norm > deltaC.get_norm
+
+    return deltaB, deltaB / (deltaA + deltaB)
+
+
+@memoize_deltas
+def dehashodd_deltas(deltaC: EisensteinFraction, deltaB: EisensteinFraction):
+    """
+    :return: (deltaA, delta) - delta is the one used by interlace
+    """
+
+    # This condition should be true because Hashed TS should be faster than argument
+    assert deltaB.get_norm > deltaC.get_norm
+
+    deltaA = deltaB * deltaC / (deltaB - deltaC)
+
+    # This condition should be true because Hashed TS should be faster than argument
+    assert deltaA.get_norm > deltaC.get_norm
+
+    return deltaA, deltaB / (deltaA + deltaB)
+
+
+# Output lengths. Operator functions return as many samples as their
+# inputs allow (or limit if it is smaller); lengths are known up front
+# from input lengths and deltas, so no input is read past its end.
+
+
+def _limited(length: int, limit: int) -> int:
+    if limit is None:
+        return length
+    assert limit >= 0
+    return min(length, limit)
+
+
+def hash_length(
+    length_a: int, deltaA: EisensteinFraction, length_b: int, deltaB: EisensteinFraction
+) -> int:
+    """
+    :return: length of hash of series of these lengths
+    """
+    return compile_hash_schedule(deltaA, deltaB).max_length(length_a, length_b)
+
+
+def interlace_length(lengths: list, deltas: list) -> int:
+    """
+    :return: length of interlace of series of these lengths
+    """
+    return compile_interlace_schedule(*deltas).max_length(lengths)
+
+
+def _resampled_length(length: int, norm) -> int:
+    # Number of i with floor_root(norm, i) < length:
+    # floor_root(norm, i) < length  <=>  i * i * norm < length * length
+    if length == 0:
+        return 0
+    return isqrt((length * length * norm.denominator - 1) // norm.numerator) + 1
+
+
+def add_length(
+    length_a: int, deltaA: EisensteinFraction, length_b: int, deltaB: EisensteinFraction
+) -> int:
+    """
+    :return: length of add of series of these lengths
+    """
+    deltaC, ratio = add_deltas(deltaA, deltaB)
+    if deltaC == deltaA:
+        (fast, slow) = (length_a, length_b)
+    else:
+        (fast, slow) = (length_b, length_a)
+    return min(fast, _resampled_length(slow, ratio.get_norm))
+
+
+def multiadd_length(lengths: list, deltas: list) -> int:
+    """
+    :return: length of multiadd of series of these lengths
+    """
+    ratios = multiadd_deltas(deltas)[1]
+    return min(
+        _resampled_length(length, ratio.get_norm)
+        for length, ratio in zip(lengths, ratios)
+    )
+
+
+def diff_length(
+    length_c: int, deltaA: EisensteinFraction, deltaB: EisensteinFraction
+) -> int:
+    """
+    :return: length of diff of series of length_c
+    """
+    ratio = diff_deltas(deltaA, deltaB)[1]
+    if ratio is None or length_c == 0:
+        return length_c
+    # ceil_root(norm, i) < length_c  <=>  i * i * norm <= (length_c - 1) ** 2
+    norm = ratio.get_norm
+    return isqrt((length_c - 1) ** 2 * norm.denominator // norm.numerator) + 1
+
+
+def dehasheven_length(
+    length_c: int, deltaC: EisensteinFraction, deltaA: EisensteinFraction
+) -> int:
+    """
+    :return: length of dehasheven of series of length_c
+    """
+    # first series gave floor_root(norm, n) of first n interlaced samples
+    delta = dehasheven_deltas(deltaC, deltaA)[1]
+    return floor_root(delta.get_norm, length_c)
+
+
+def dehashodd_length(
+    length_c: int, deltaC: EisensteinFraction, deltaB: EisensteinFraction
+) -> int:
+    """
+    :return: length of dehashodd of series of length_c
+    """
+    delta = dehashodd_deltas(deltaC, deltaB)[1]
+    return length_c - floor_root(delta.get_norm, length_c)
 
 
 def hash_Eisenstein_Fraction(
-    A: list, deltaA: EisensteinFraction, B: list, deltaB: EisensteinFraction
+    A: list,
+    deltaA: EisensteinFraction,
+    B: list,
+    deltaB: EisensteinFraction,
+    limit: int = None,
 ):
     """
     This is hash function for Time series that interwave two Time Series that
@@ -34,51 +217,139 @@ def hash_Eisenstein_Fraction(
     hash_b is declared in operations.py (for rational coefficients)
     """
 
-    # get_dot_product works for Eisenstein and EisensteinFraction
-    # this requirement was invented during experimental work with equations
-    assert get_dot_product(deltaA, deltaB) > 0
+    # A/B pattern is decided once per delta pair (see eisenstein_schedule.py)
+    # Schedule also checks get_dot_product(deltaA, deltaB) > 0 - this requirement
+    # was invented during experimental work with equations
+    schedule = compile_hash_schedule(deltaA, deltaB)
+    length = _limited(schedule.max_length(len(A), len(B)), limit)
+    return schedule.apply(A, B, length), schedule.deltaC
 
-    result = []
-    delta = deltaB / (deltaA + deltaB)
 
-    for i in range(PROBE_LEN):
-        di = i * delta
-        if int(abs(di)) == int(abs(di + delta)):
-            result.append(B[i - int(abs(di))])
-        else:
-            result.append(A[int(abs(di))])
+def interlace_Eisenstein_Fraction(pairs: list, limit: int = None):
+    """
+    k-way hash - pairs is list of (series, delta), result is equal to
+    nested hash_Eisenstein_Fraction of them taken from the left, without
+    lists of intermediate levels.
+    :return: interlaced series and its delta
+    """
 
-    deltaC = (deltaA * deltaB) / (deltaA + deltaB)
-    return result, deltaC
+    series = [samples for samples, _ in pairs]
+    schedule = compile_interlace_schedule(*(delta for _, delta in pairs))
+    length = _limited(schedule.max_length([len(s) for s in series]), limit)
+    return schedule.apply(series, length), schedule.deltaC
+
+
+def deinterlace_Eisenstein_Fraction(C: list, deltas: list) -> list:
+    """
+    Inverse of interlace_Eisenstein_Fraction, deltas are deltas of its inputs
+    :return: list of (series, delta) - samples of every input found in C
+    """
+
+    schedule = compile_interlace_schedule(*deltas)
+    result = [[] for _ in deltas]
+    for (k, _), sample in zip(schedule.sources(), C):
+        result[k].append(sample)
+    return list(zip(result, deltas))
 
 
 def add_Eisenstein_Fraction(
-    A: list, deltaA: EisensteinFraction, B: list, deltaB: EisensteinFraction
+    A: list,
+    deltaA: EisensteinFraction,
+    B: list,
+    deltaB: EisensteinFraction,
+    limit: int = None,
+    output: str = "pairs",
 ):
     """
     Function combine two series. If values of first comming slower
     Data will be duplicated to faster series.
+
+    output selects form of result:
+    "pairs" - list of (first, second) tuples,
+    "columns" - (firsts, seconds), two lists of samples,
+    "indexes" - (indexes in A, indexes in B), nothing is copied from inputs.
     """
 
+    if output == "columns":
+        columns, deltaC = multiadd_Eisenstein_Fraction(
+            [(A, deltaA), (B, deltaB)], limit
+        )
+        return tuple(columns), deltaC
+    if output == "indexes":
+        columns, deltaC = multiadd_indexes(
+            [len(A), len(B)], [deltaA, deltaB], limit
+        )
+        return tuple(columns), deltaC
+    if output != "pairs":
+        raise ValueError("Unknown add output: %r" % (output,))
+
     result = []
-    if abs(deltaA) < abs(deltaB):
-        deltaC = deltaA
-    else:
-        deltaC = deltaB
+    deltaC, ratio = add_deltas(deltaA, deltaB)
+    # int(abs(i * ratio)) computed exactly from the norm of ratio
+    norm = ratio.get_norm
+    length = _limited(add_length(len(A), deltaA, len(B), deltaB), limit)
 
-    for i in range(PROBE_LEN):
+    for i in range(length):
         if deltaC == deltaA:
             first = A[i]
-            second = B[int(abs((i * deltaA / deltaB)))]
+            second = B[floor_root(norm, i)]
         else:
-            first = A[int(abs((i * deltaB / deltaA)))]
+            first = A[floor_root(norm, i)]
             second = B[i]
         result.append((first, second))
     return result, deltaC
 
 
+def _floor_roots(norm, length: int):
+    # floor_root(norm, i) for i in range(length) - range or lazy iterator
+    if norm == 1:
+        return range(length)
+    r = isqrt(norm.numerator)
+    s = isqrt(norm.denominator)
+    if r * r == norm.numerator and s * s == norm.denominator:
+        # abs(ratio) = r/s - integer floor division only
+        return (i * r // s for i in range(length))
+    return (floor_root(norm, i) for i in range(length))
+
+
+def multiadd_indexes(lengths: list, deltas: list, limit: int = None):
+    """
+    :return: (list of index columns, one per series, deltaC) - indexes of
+             samples of every series taken by multiadd_Eisenstein_Fraction;
+             column of series that is not resampled is a range, other
+             columns are array("q")
+    """
+    deltaC, ratios = multiadd_deltas(deltas)
+    length = _limited(multiadd_length(lengths, deltas), limit)
+    columns = []
+    for ratio in ratios:
+        indexes = _floor_roots(ratio.get_norm, length)
+        columns.append(indexes if isinstance(indexes, range) else array("q", indexes))
+    return columns, deltaC
+
+
+def multiadd_Eisenstein_Fraction(pairs: list, limit: int = None):
+    """
+    N-ary add - pairs is list of (series, delta). Every series is resampled
+    at the rate of the fastest one, column k is equal to the k-th series
+    part of add_Eisenstein_Fraction of the fastest series and series k.
+    :return: (list of columns, one per series, deltaC)
+    """
+
+    deltas = [delta for _, delta in pairs]
+    deltaC, ratios = multiadd_deltas(deltas)
+    length = _limited(multiadd_length([len(s) for s, _ in pairs], deltas), limit)
+    columns = []
+    for (series, _), ratio in zip(pairs, ratios):
+        if ratio.get_norm == 1:
+            columns.append(list(series[:length]))
+        else:
+            columns.append([series[j] for j in _floor_roots(ratio.get_norm, length)])
+    return columns, deltaC
+
+
 def diff_Eisenstein_Fraction(
-    C: list, deltaA: EisensteinFraction, deltaB: EisensteinFraction
+    C: list, deltaA: EisensteinFraction, deltaB: EisensteinFraction, limit: int = None
 ):
     """
     Function gets primary form argument based on given deltas.
@@ -89,81 +360,101 @@ def diff_Eisenstein_Fraction(
 
     result = []
     # deltaC = min(deltaA, deltaB)
-    if abs(deltaA) < abs(deltaB):
-        deltaC = deltaA
-    else:
-        deltaC = deltaB
+    deltaC, ratio = diff_deltas(deltaA, deltaB)
+    norm = ratio.get_norm if ratio is not None else None
+    length = _limited(diff_length(len(C), deltaA, deltaB), limit)
 
-    for i in range(PROBE_LEN):
-        if abs(deltaA) > abs(deltaB):
-            idx = int(math.ceil(abs(i * deltaA / deltaB)))
+    for i in range(length):
+        if ratio is not None:
+            idx = ceil_root(norm, i)
         else:
             idx = i
-        if idx >= len(C):
-            return result, deltaC
         result.append(C[idx])
     return result, deltaC
 
 
-def dehasheven_Eisenstein_Fraction(
-    C: list, deltaC: EisensteinFraction, deltaA: EisensteinFraction
-):
-    # result.append(C[i + int(ceil((i + 1) * deltaA / deltaB))])
+# Positions of deinterlaced samples. Sample i of C belongs to the first
+# series when floor(i * x) != floor((i + 1) * x), x = abs(delta) < 1 and
+# x * x = num / den. n-th sample of the first series is at the smallest i
+# with floor((i + 1) * x) = n + 1, n-th sample of the second one at
+# floor(n / (1 - x)) = floor((n * den + n * den * x) / (den - num)).
 
-    result = []
 
-    # This condition should be true because Hashed TS should be faster than argument
-    assert abs(deltaA) > abs(deltaC)
+def _even_index(n: int, num: int, den: int) -> int:
+    # (i + 1) ** 2 * num >= (n + 1) ** 2 * den
+    return isqrt(-(-(n + 1) * (n + 1) * den // num) - 1)
 
-    deltaB = (deltaA * deltaC) / (deltaA - deltaC)
 
-    assert abs(deltaB) > abs(deltaC)
+def _odd_index(n: int, num: int, den: int) -> int:
+    return (n * den + isqrt(n * n * den * num)) // (den - num)
+
 
-    delta = deltaB / (deltaA + deltaB)
+def dehasheven_index(
+    n: int, deltaC: EisensteinFraction, deltaA: EisensteinFraction
+) -> int:
+    """
+    :return: index in C of n-th sample of dehasheven_Eisenstein_Fraction
+    """
+    norm = dehasheven_deltas(deltaC, deltaA)[1].get_norm
+    return _even_index(n, norm.numerator, norm.denominator)
 
-    for i in range(PROBE_LEN):
 
-        di = i * delta
+def dehashodd_index(
+    n: int, deltaC: EisensteinFraction, deltaB: EisensteinFraction
+) -> int:
+    """
+    :return: index in C of n-th sample of dehashodd_Eisenstein_Fraction
+    """
+    norm = dehashodd_deltas(deltaC, deltaB)[1].get_norm
+    return _odd_index(n, norm.numerator, norm.denominator)
 
-        idx = i
-        if int(abs(di)) == int(abs(di + delta)):
-            continue
 
-        if idx >= len(C):
-            return result, deltaA
-        result.append(C[idx])
-    return result, deltaB
+def dehasheven_slice(
+    C: list, deltaC: EisensteinFraction, deltaA: EisensteinFraction, start, stop
+):
+    """
+    :return: samples start .. stop - 1 of dehasheven_Eisenstein_Fraction
+             and deltaB, O(stop - start)
+    """
+    deltaB, delta = dehasheven_deltas(deltaC, deltaA)
+    norm = delta.get_norm
+    (num, den) = (norm.numerator, norm.denominator)
+    assert start >= 0
+    stop = min(stop, dehasheven_length(len(C), deltaC, deltaA))
+    return [C[_even_index(n, num, den)] for n in range(start, stop)], deltaB
 
 
-def dehashodd_Eisenstein_Fraction(
-    C: list, deltaC: EisensteinFraction, deltaB: EisensteinFraction
+def dehashodd_slice(
+    C: list, deltaC: EisensteinFraction, deltaB: EisensteinFraction, start, stop
 ):
+    """
+    :return: samples start .. stop - 1 of dehashodd_Eisenstein_Fraction
+             and deltaA, O(stop - start)
+    """
+    deltaA, delta = dehashodd_deltas(deltaC, deltaB)
+    norm = delta.get_norm
+    (num, den) = (norm.numerator, norm.denominator)
+    assert start >= 0
+    stop = min(stop, dehashodd_length(len(C), deltaC, deltaB))
+    return [C[_odd_index(n, num, den)] for n in range(start, stop)], deltaA
 
-    result = []
 
-    # This condition should be true because Hashed TS should be faster than argument
-    assert abs(deltaB) > abs(deltaC)
+def dehasheven_Eisenstein_Fraction(
+    C: list, deltaC: EisensteinFraction, deltaA: EisensteinFraction, limit: int = None
+):
+    # result.append(C[i + int(ceil((i + 1) * deltaA / deltaB))])
 
-    deltaA = deltaB * deltaC / (deltaB - deltaC)
+    length = _limited(dehasheven_length(len(C), deltaC, deltaA), limit)
+    return dehasheven_slice(C, deltaC, deltaA, 0, length)
 
-    # This condition should be true because Hashed TS should be faster than argument
-    assert abs(deltaA) > abs(deltaC)
+
+def dehashodd_Eisenstein_Fraction(
+    C: list, deltaC: EisensteinFraction, deltaB: EisensteinFraction, limit: int = None
+):
 
     # source:
     # odd  result.append(C[i + int(i            * deltaB / deltaA) ])
     # even result.append(C[i + int(ceil((i + 1) * deltaA / deltaB))])
 
-    delta = deltaB / (deltaA + deltaB)
-
-    for i in range(PROBE_LEN):
-
-        di = i * delta
-
-        idx = i
-        if int(abs(di)) != int(abs(di + delta)):
-            continue
-
-        if idx >= len(C):
-            return result, deltaA
-        result.append(C[idx])
-    return result, deltaA
+    length = _limited(dehashodd_length(len(C), deltaC, deltaB), limit)
+    return dehashodd_slice(C, deltaC, deltaB, 0, length)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Compiled index schedules for Eisenstein Time Series interlace - Python 3.x
+
+   hash_Eisenstein_Fraction takes sample i from A when
+   int(abs(i * delta)) != int(abs((i + 1) * delta)), delta = deltaB/(deltaA+deltaB),
+   and from B otherwise. This is a Beatty sequence of x = abs(delta) < 1:
+   floor(i * x) = isqrt(i^2 * p // q) where p/q = x^2 = norm of delta,
+   so the whole pattern can be decided on integers only.
+   When x is rational (x = r/s) the pattern repeats every s samples
+   and one period is precomputed.
+
+   InterlaceSchedule composes such patterns for interlace of k series.
+"""
+
+import sys
+from itertools import islice
+from math import gcd
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+from eisenstein_fractions import EisensteinFraction
+from eisenstein import get_dot_product, isqrt
+from eisenstein_cache import delta_cache, memoize_deltas
+
+# Longest period that is stored as a lookup table. Longer (or irrational)
+# patterns are generated by integer stepping.
+MAX_PERIOD = 1 << 16
+
+
+class HashSchedule:
+    """
+    A/B selection pattern and source indices of interlace for one
+    (deltaA, deltaB) pair.
+    """
+
+    __slots__ = (
+        "deltaA",
+        "deltaB",
+        "deltaC",
+        "norm_num",
+        "norm_den",
+        "period",
+        "period_a",
+        "offsets",
+    )
+
+    def __init__(self, deltaA: EisensteinFraction, deltaB: EisensteinFraction):
+
+        assert get_dot_product(deltaA, deltaB) > 0
+
+        delta = deltaB / (deltaA + deltaB)
+        self.deltaA = deltaA
+        self.deltaB = deltaB
+        self.deltaC = (deltaA * deltaB) / (deltaA + deltaB)
+
+        # abs(delta) ** 2 == norm_num / norm_den
+        norm = delta.get_norm
+        self.norm_num = norm.numerator
+        self.norm_den = norm.denominator
+
+        # Positive dot product gives abs(deltaA + deltaB) > abs(deltaB)
+        assert self.norm_num < self.norm_den
+
+        r = isqrt(self.norm_num)
+        s = isqrt(self.norm_den)
+        if r * r == self.norm_num and s * s == self.norm_den and s <= MAX_PERIOD:
+            # abs(delta) = r/s: s samples per period, r of them taken from A
+            self.period = s
+            self.period_a = r
+            self.offsets = [(k * r) // s for k in range(s + 1)]
+        else:
+            self.period = None
+            self.period_a = None
+            self.offsets = None
+
+    def floor(self, i: int) -> int:
+        """
+        :return: int(abs(i * delta)) computed exactly
+        """
+        if self.period is not None:
+            block, k = divmod(i, self.period)
+            return block * self.period_a + self.offsets[k]
+        return isqrt(i * i * self.norm_num // self.norm_den)
+
+    def source(self, i: int):
+        """
+        :return: (True, index in A) or (False, index in B) of i-th sample
+        """
+        f = self.floor(i)
+        if f == self.floor(i + 1):
+            return False, i - f
+        return True, f
+
+    def max_length(self, length_a: int, length_b: int) -> int:
+        """
+        :return: number of interlaced samples given by A and B of these
+                 lengths - first n samples read floor(n) samples of A
+                 and n - floor(n) samples of B
+        """
+        # Both counts never decrease with n - bisection
+        low = 0
+        high = length_a + length_b
+        while low < high:
+            n = (low + high + 1) // 2
+            f = self.floor(n)
+            if f <= length_a and n - f <= length_b:
+                low = n
+            else:
+                high = n - 1
+        return low
+
+    def sources(self):
+        """
+        Unbounded generator of source() values for i = 0, 1, 2, ...
+        """
+        p = self.norm_num
+        q = self.norm_den
+        f = 0
+        i = 0
+        while True:
+            i += 1
+            if (f + 1) * (f + 1) * q <= i * i * p:
+                yield True, f
+                f += 1
+            else:
+                yield False, i - 1 - f
+
+    def apply(self, A, B, length: int) -> list:
+        """
+        :return: first length samples of interlaced A and B
+        """
+        result = []
+        append = result.append
+        if self.period is not None:
+            s = self.period
+            r = self.period_a
+            offsets = self.offsets
+            blocks, rest = divmod(length, s)
+            base_a = 0
+            base_b = 0
+            for block in range(blocks + 1):
+                for k in range(s if block < blocks else rest):
+                    f = offsets[k]
+                    if f == offsets[k + 1]:
+                        append(B[base_b + k - f])
+                    else:
+                        append(A[base_a + f])
+                base_a += r
+                base_b += s - r
+        else:
+            sources = self.sources()
+            for _ in range(length):
+                from_a, idx = next(sources)
+                append(A[idx] if from_a else B[idx])
+        return result
+
+
+@memoize_deltas
+def compile_hash_schedule(deltaA: EisensteinFraction, deltaB: EisensteinFraction):
+    """
+    :return: HashSchedule of the pair, shared between calls (see eisenstein_cache.py)
+    """
+    return HashSchedule(deltaA, deltaB)
+
+
+class InterlaceSchedule:
+    """
+    Source pattern of k-way interlace - the same samples in the same order
+    as nested hash(...hash(hash(S0, S1), S2)..., Sk-1), but without lists
+    of intermediate levels.
+    """
+
+    __slots__ = ("deltas", "deltaC", "levels", "period", "counts", "table")
+
+    def __init__(self, deltas: tuple):
+
+        assert len(deltas) >= 2
+        self.deltas = deltas
+        self.levels = []
+        deltaC = deltas[0]
+        for delta in deltas[1:]:
+            level = compile_hash_schedule(deltaC, delta)
+            self.levels.append(level)
+            deltaC = level.deltaC
+        self.deltaC = deltaC
+
+        # Nested periodic patterns give periodic pattern: next level takes
+        # period_a samples of lower levels per its period, so the pattern
+        # repeats once that is a multiple of the lower period.
+        period = 1
+        counts = [1]
+        for level in self.levels:
+            if level.period is None:
+                period = None
+                break
+            blocks = period // gcd(level.period_a, period)
+            counts = [c * blocks * level.period_a // period for c in counts]
+            counts.append(blocks * (level.period - level.period_a))
+            period = blocks * level.period
+            if period > MAX_PERIOD:
+                period = None
+                break
+        if period is not None:
+            self.period = period
+            self.counts = counts
+            self.table = list(islice(self._sources(), period))
+        else:
+            self.period = None
+            self.counts = None
+            self.table = None
+
+    def source(self, i: int):
+        """
+        :return: (number of series, index in it) of i-th sample
+        """
+        if self.period is not None:
+            block, k = divmod(i, self.period)
+            series, idx = self.table[k]
+            return series, idx + block * self.counts[series]
+        for series in range(len(self.levels), 0, -1):
+            from_a, i = self.levels[series - 1].source(i)
+            if not from_a:
+                return series, i
+        return 0, i
+
+    def _sources(self):
+        # Every level reads lower level in order - chain of generators
+        def level_sources(series: int):
+            lower = level_sources(series - 1) if series > 1 else None
+            for from_a, idx in self.levels[series - 1].sources():
+                if not from_a:
+                    yield series, idx
+                elif lower is None:
+                    yield 0, idx
+                else:
+                    yield next(lower)
+
+        return level_sources(len(self.levels))
+
+    def sources(self):
+        """
+        Unbounded generator of source() values for i = 0, 1, 2, ...
+        """
+        if self.period is None:
+            yield from self._sources()
+            return
+        bases = [0] * len(self.counts)
+        while True:
+            for series, idx in self.table:
+                yield series, bases[series] + idx
+            bases = [base + c for base, c in zip(bases, self.counts)]
+
+    def max_length(self, lengths) -> int:
+        """
+        :return: number of interlaced samples given by series of these lengths
+        """
+        length = lengths[0]
+        for level, length_b in zip(self.levels, lengths[1:]):
+            length = level.max_length(length, length_b)
+        return length
+
+    def apply(self, series: list, length: int) -> list:
+        """
+        :return: first length samples of interlaced series
+        """
+        return [series[k][idx] for k, idx in islice(self.sources(), length)]
+
+
+def compile_interlace_schedule(*deltas):
+    """
+    :return: InterlaceSchedule of deltas, shared between calls
+    """
+    return delta_cache.lookup(
+        (compile_interlace_schedule, deltas), InterlaceSchedule, deltas
+    )
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Binary Time Series files for Eisenstein operators - Python 3.x
+
+   File layout (little endian):
+
+   magic     4s   b"EQTS"
+   version   B    FORMAT_VERSION
+   fmt_len   B    length of sample format
+   reserved  2x
+   count     Q    number of samples
+   delta     4q   EisensteinFraction four=(real_num, real_den,
+                                          omega_num, omega_den)
+   fmt       sample format (struct module syntax, e.g. "q", "d", "c",
+             "qc" for pairs, or VARIANT), padded with zero bytes to 8 byte
+             boundary
+   payload   count records of fmt, standard sizes, no alignment
+
+   VARIANT "v" stores series that mix ints, bools, floats and letters (like
+   output of hash): every sample is a format letter and 8 bytes of value.
+
+   MappedSeries opens such file through mmap and works as a read-only
+   sequence: len(), series[i] and iteration read samples straight from
+   mapped pages, so it can be given to hash/add/diff/dehash functions in
+   place of a list without loading the file. "c" fields read back as
+   one-letter str.
+"""
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+import mmap
+import struct
+from itertools import chain
+
+from eisenstein_fractions import EisensteinFraction
+
+MAGIC = b"EQTS"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sBB2xQ4q")
+
+VARIANT = "v"
+_VARIANT_RECORD = struct.Struct("<c8s")
+_VARIANT_VALUES = {
+    b"q": struct.Struct("<q"),
+    b"d": struct.Struct("<d"),
+    b"?": struct.Struct("<?7x"),
+}
+
+
+def _padded(size: int) -> int:
+    return (size + 7) // 8 * 8
+
+
+def _delta_four(delta) -> tuple:
+    if not isinstance(delta, EisensteinFraction):
+        # int, Fraction (operations.py deltas) or Eisenstein
+        delta = EisensteinFraction(delta)
+    four = (
+        delta.co_real.numerator,
+        delta.co_real.denominator,
+        delta.co_omega.numerator,
+        delta.co_omega.denominator,
+    )
+    if not all(-(2 ** 63) <= x < 2 ** 63 for x in four):
+        raise OverflowError("Delta %s does not fit into series header" % delta)
+    return four
+
+
+def _field_format(value) -> str:
+    if isinstance(value, bool):
+        return "?"
+    if isinstance(value, int):
+        return "q"
+    if isinstance(value, float):
+        return "d"
+    if isinstance(value, str) and len(value) == 1:
+        return "c"
+    raise TypeError("Cannot store %r in series file" % (value,))
+
+
+def sample_format(sample) -> str:
+    """
+    :return: struct format of sample - int "q", float "d", one letter "c",
+             tuples of these give one field per item
+    """
+    if isinstance(sample, tuple):
+        return "".join(_field_format(value) for value in sample)
+    return _field_format(sample)
+
+
+def _encode_variant(sample):
+    code = _field_format(sample)
+    if code == "c":
+        return (b"c", sample.encode("latin-1"))
+    tag = code.encode("ascii")
+    return (tag, _VARIANT_VALUES[tag].pack(sample))
+
+
+def _decode_variant(fields):
+    (tag, value) = fields
+    if tag == b"c":
+        return value[:1].decode("latin-1")
+    return _VARIANT_VALUES[tag].unpack(value)[0]
+
+
+def _record_struct(fmt: str):
+    if fmt == VARIANT:
+        return _VARIANT_RECORD
+    return struct.Struct("<" + fmt)
+
+
+def _encoder(fmt: str):
+    # sample -> tuple of struct fields
+    if fmt == VARIANT:
+        return _encode_variant
+    letters = [i for i, code in enumerate(fmt) if code == "c"]
+    if len(fmt) == 1:
+        if letters:
+            return lambda sample: (sample.encode("latin-1"),)
+        return lambda sample: (sample,)
+    if not letters:
+        return lambda sample: sample
+
+    def encode(sample):
+        fields = list(sample)
+        for i in letters:
+            fields[i] = fields[i].encode("latin-1")
+        return fields
+
+    return encode
+
+
+def write_series(path, samples, delta, fmt: str = None) -> int:
+    """
+    Write samples (any iterable, e.g. result of operator or stream)
+    with their delta. If fmt is not given it is taken from all samples of
+    a list or tuple (VARIANT when they differ) and from the first sample
+    of other iterables.
+    :return: number of written samples
+    """
+    if fmt is None and isinstance(samples, (list, tuple)) and samples:
+        formats = set(sample_format(sample) for sample in samples)
+        if len(formats) == 1:
+            fmt = formats.pop()
+        elif all(len(code) == 1 for code in formats):
+            fmt = VARIANT
+        else:
+            raise TypeError("Samples of series have different formats")
+    samples = iter(samples)
+    if fmt is None:
+        try:
+            first = next(samples)
+        except StopIteration:
+            fmt = "q"
+        else:
+            fmt = sample_format(first)
+            samples = chain((first,), samples)
+    record = _record_struct(fmt)
+    encode = _encoder(fmt)
+    four = _delta_four(delta)
+    name = fmt.encode("ascii")
+
+    count = 0
+    with open(path, "wb") as f:
+        # count is not known for iterators - header is written again at the end
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(name), 0, *four))
+        f.write(name.ljust(_padded(len(name)), b"\0"))
+        chunk = []
+        for sample in samples:
+            chunk.append(record.pack(*encode(sample)))
+            if len(chunk) == 4096:
+                f.write(b"".join(chunk))
+                chunk = []
+            count += 1
+        f.write(b"".join(chunk))
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(name), count, *four))
+    return count
+
+
+def write_result(path, result, fmt: str = None) -> int:
+    """
+    Write (samples, delta) returned by operator functions
+    """
+    (samples, delta) = result
+    return write_series(path, samples, delta, fmt)
+
+
+class MappedSeries:
+    """
+    Read-only memory-mapped series file with its delta
+    """
+
+    __slots__ = (
+        "delta",
+        "fmt",
+        "_file",
+        "_map",
+        "_view",
+        "_record",
+        "_offset",
+        "_count",
+        "_letters",
+    )
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._view = None
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        try:
+            self._open()
+        except BaseException:
+            self.close()
+            raise
+
+    def _open(self):
+        if len(self._map) < _HEADER.size:
+            raise ValueError("Not a series file")
+        (magic, version, fmt_len, count, *four) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a series file")
+        if version != FORMAT_VERSION:
+            raise ValueError("Unsupported series file version %d" % version)
+        fmt_start = _HEADER.size
+        self.fmt = bytes(self._map[fmt_start : fmt_start + fmt_len]).decode("ascii")
+        self.delta = EisensteinFraction(four=tuple(four))
+        self._record = _record_struct(self.fmt)
+        self._offset = fmt_start + _padded(fmt_len)
+        self._count = count
+        if self.fmt == VARIANT:
+            self._letters = None
+        else:
+            self._letters = [i for i, code in enumerate(self.fmt) if code == "c"]
+        if len(self._map) < self._offset + count * self._record.size:
+            raise ValueError("Series file is truncated")
+
+        # Single numeric field with native layout equal to the stored one
+        # is read through memoryview.cast - plain indexing, no struct calls
+        if (
+            len(self.fmt) == 1
+            and self.fmt not in ("c", VARIANT)
+            and sys.byteorder == "little"
+            and struct.calcsize(self.fmt) == self._record.size
+        ):
+            payload = memoryview(self._map)[
+                self._offset : self._offset + count * self._record.size
+            ]
+            self._view = payload.cast(self.fmt)
+
+    def close(self):
+        # memoryview must be released before its mmap can be closed
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def _decode(self, fields):
+        if self._letters is None:
+            return _decode_variant(fields)
+        if self._letters:
+            fields = list(fields)
+            for i in self._letters:
+                fields[i] = fields[i].decode("latin-1")
+        if len(fields) == 1:
+            return fields[0]
+        return tuple(fields)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(self._count))]
+        if self._view is not None:
+            return self._view[key]
+        if key < 0:
+            key += self._count
+        if not 0 <= key < self._count:
+            raise IndexError("series index out of range")
+        return self._decode(
+            self._record.unpack_from(self._map, self._offset + key * self._record.size)
+        )
+
+    def __iter__(self):
+        if self._view is not None:
+            return iter(self._view)
+        return self._records()
+
+    def _records(self):
+        unpack_from = self._record.unpack_from
+        size = self._record.size
+        end = self._offset + self._count * size
+        for position in range(self._offset, end, size):
+            yield self._decode(unpack_from(self._map, position))
+
+    def __str__(self):
+        return "MappedSeries(%d x %r, delta=%s)" % (self._count, self.fmt, self.delta)
+
+    def __repr__(self):
+        return str(self)
+
+
+def open_series(path) -> MappedSeries:
+    return MappedSeries(path)
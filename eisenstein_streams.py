@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Lazy (streaming) Eisenstein Time Series operators - Python 3.x
+
+   Iterator counterparts of functions from eisenstein_operations.py.
+   Arguments may be any iterables, including unbounded generators.
+   Each function returns (iterator, delta) just like its list version
+   returns (list, delta); samples are produced while inputs are consumed
+   and at most one sample per input is buffered.
+   Output ends when an input that is needed next is exhausted.
+"""
+
+import sys
+from itertools import count
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+from eisenstein import floor_root, ceil_root
+from eisenstein_fractions import EisensteinFraction
+from eisenstein_schedule import (
+    HashSchedule,
+    InterlaceSchedule,
+    compile_hash_schedule,
+    compile_interlace_schedule,
+)
+from eisenstein_operations import (
+    add_deltas,
+    diff_deltas,
+    dehasheven_deltas,
+    dehashodd_deltas,
+)
+
+
+def _interlace(A, B, schedule: HashSchedule):
+    # Indices of A and B grow by one with every take,
+    # so both inputs are consumed strictly in order.
+    A = iter(A)
+    B = iter(B)
+    for from_a, _ in schedule.sources():
+        try:
+            yield next(A) if from_a else next(B)
+        except StopIteration:
+            return
+
+
+def _interlace_k(series: list, schedule: InterlaceSchedule):
+    # k-way _interlace, every input is consumed strictly in order
+    series = [iter(s) for s in series]
+    for k, _ in schedule.sources():
+        try:
+            yield next(series[k])
+        except StopIteration:
+            return
+
+
+def _first_flag(norm, i: int) -> bool:
+    # True if interlace took i-th sample from the first series (dehash),
+    # norm is the norm of delta used by interlace
+    return floor_root(norm, i) != floor_root(norm, i + 1)
+
+
+def _resample_indexes(ratio: EisensteinFraction):
+    # index into slower series of i-th sample of faster one (add)
+    norm = ratio.get_norm
+    return (floor_root(norm, i) for i in count())
+
+
+def _select_indexes(ratio):
+    # indexes of samples kept by diff, ratio is None if none are dropped
+    if ratio is None:
+        return count()
+    norm = ratio.get_norm
+    return (ceil_root(norm, i) for i in count())
+
+
+def _first_flags(delta: EisensteinFraction):
+    norm = delta.get_norm
+    previous = 0
+    for i in count(1):
+        current = floor_root(norm, i)
+        yield previous != current
+        previous = current
+
+
+def _resample(fast, slow, ratio: EisensteinFraction, fast_first: bool):
+    # fast[i] is paired with slow[floor_root(norm, i)]; that index never
+    # decreases so only the last taken slow sample is kept.
+    slow = iter(slow)
+    position = -1
+    value = None
+    for sample, idx in zip(fast, _resample_indexes(ratio)):
+        try:
+            while position < idx:
+                value = next(slow)
+                position += 1
+        except StopIteration:
+            return
+        if fast_first:
+            yield (sample, value)
+        else:
+            yield (value, sample)
+
+
+def _select(C, indexes):
+    # Yields C[idx] for every idx of growing indexes sequence
+    C = iter(C)
+    position = -1
+    value = None
+    for idx in indexes:
+        try:
+            while position < idx:
+                value = next(C)
+                position += 1
+        except StopIteration:
+            return
+        yield value
+
+
+def _deinterlace(C, delta: EisensteinFraction, take_first: bool):
+    # take_first: keep samples that interlace took from the first series
+    for sample, first in zip(C, _first_flags(delta)):
+        if first == take_first:
+            yield sample
+
+
+def ihash_Eisenstein_Fraction(
+    A, deltaA: EisensteinFraction, B, deltaB: EisensteinFraction
+):
+    """
+    Lazy version of hash_Eisenstein_Fraction.
+    :return: (iterator over interlaced series, deltaC)
+    """
+
+    schedule = compile_hash_schedule(deltaA, deltaB)
+    return _interlace(A, B, schedule), schedule.deltaC
+
+
+def iinterlace_Eisenstein_Fraction(pairs: list):
+    """
+    Lazy version of interlace_Eisenstein_Fraction, pairs is list of
+    (iterable, delta).
+    :return: (iterator over interlaced series, deltaC)
+    """
+
+    schedule = compile_interlace_schedule(*(delta for _, delta in pairs))
+    return _interlace_k([series for series, _ in pairs], schedule), schedule.deltaC
+
+
+def iadd_Eisenstein_Fraction(
+    A, deltaA: EisensteinFraction, B, deltaB: EisensteinFraction
+):
+    """
+    Lazy version of add_Eisenstein_Fraction.
+    :return: (iterator over (first, second) pairs, deltaC)
+    """
+
+    deltaC, ratio = add_deltas(deltaA, deltaB)
+
+    if deltaC == deltaA:
+        return _resample(A, B, ratio, True), deltaC
+    return _resample(B, A, ratio, False), deltaC
+
+
+def idiff_Eisenstein_Fraction(
+    C, deltaA: EisensteinFraction, deltaB: EisensteinFraction
+):
+    """
+    Lazy version of diff_Eisenstein_Fraction.
+    :return: (iterator over selected samples, deltaC)
+    """
+
+    deltaC, ratio = diff_deltas(deltaA, deltaB)
+    return _select(C, _select_indexes(ratio)), deltaC
+
+
+def idehasheven_Eisenstein_Fraction(
+    C, deltaC: EisensteinFraction, deltaA: EisensteinFraction
+):
+    """
+    Lazy version of dehasheven_Eisenstein_Fraction.
+    :return: (iterator over samples of first series, deltaB)
+    """
+
+    deltaB, delta = dehasheven_deltas(deltaC, deltaA)
+    return _deinterlace(C, delta, True), deltaB
+
+
+def idehashodd_Eisenstein_Fraction(
+    C, deltaC: EisensteinFraction, deltaB: EisensteinFraction
+):
+    """
+    Lazy version of dehashodd_Eisenstein_Fraction.
+    :return: (iterator over samples of second series, deltaA)
+    """
+
+    deltaA, delta = dehashodd_deltas(deltaC, deltaB)
+    return _deinterlace(C, delta, False), deltaA
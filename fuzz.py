@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Differential fuzzing of Time Series operator engines - Python 3.x
+
+   ./fuzz.py [cases] [seed]
+
+   Random cases (operator, deltaA, deltaB, length_a, length_b) are run on
+   every available engine and results are compared:
+
+   - eisenstein_operations.py (reference) against eisenstein_streams.py
+     for hash, add, diff, dehasheven and dehashodd; both engines get
+     inputs of length_a and length_b and must give a prefix of the
+     reference on long inputs that ends exactly where a needed input
+     sample is missing,
+   - dehasheven/dehashodd of a hash must give back its inputs,
+   - operations.py (reference) against operations_array.py for rational
+     deltas and inputs of length_a and length_b, if numpy is installed.
+
+   Deltas that break preconditions of an operator (get_dot_product > 0,
+   abs conditions asserted by dehash) are drawn again. Any disagreement
+   is shrunk to a minimal reproducer: smallest coefficients and lengths
+   that still fail.
+"""
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+import random
+import time
+from fractions import Fraction
+from itertools import islice
+
+from eisenstein import get_dot_product
+from eisenstein_fractions import EisensteinFraction
+import eisenstein_operations
+import eisenstein_streams
+import operations
+import operations_array
+
+# Longest input of a case
+MAX_LEN = 40
+
+# Inputs of reference functions are longer than any input of a case
+PAD = MAX_LEN + 1
+
+# A holds 1, 2, 3 ... and B holds -1, -2, -3 ..., so every output sample
+# tells which input and index it was taken from
+SERIES_A = list(range(1, PAD + 1))
+SERIES_B = list(range(-1, -PAD - 1, -1))
+
+CASES_PER_PAIR = 4
+
+RATIONAL_A = list(range(1, PAD + 1))
+RATIONAL_B = ["b%d" % i for i in range(PAD)]
+
+# Reference results depend on deltas (and lengths) only, and random small
+# deltas repeat often, so they are computed once per run
+_reference = {}
+
+
+def _available(sample, length_a: int, length_b: int) -> bool:
+    if sample > 0:
+        return sample - 1 < length_a
+    return -sample - 1 < length_b
+
+
+def _reference_hash(deltaA, deltaB):
+    key = ("hash", deltaA, deltaB)
+    if key not in _reference:
+        _reference[key] = eisenstein_operations.hash_Eisenstein_Fraction(
+            SERIES_A, deltaA, SERIES_B, deltaB
+        )
+    return _reference[key]
+
+
+def _expected_prefix(reference: list, available) -> list:
+    # Reference samples up to the first one that needs a missing input
+    for k, sample in enumerate(reference):
+        if not available(sample):
+            return reference[:k]
+    return reference
+
+
+def _compare(engine: str, result: list, delta, expected: list, deltaC):
+    if result != expected or delta != deltaC:
+        return "%s: %s %s, expected %s %s" % (engine, result, delta, expected, deltaC)
+    return None
+
+
+def check_hash(deltaA, deltaB, length_a: int, length_b: int):
+    reference, deltaC = _reference_hash(deltaA, deltaB)
+    A = SERIES_A[:length_a]
+    B = SERIES_B[:length_b]
+    expected = _expected_prefix(
+        reference, lambda sample: _available(sample, length_a, length_b)
+    )
+    stream, stream_delta = eisenstein_streams.ihash_Eisenstein_Fraction(
+        A, deltaA, B, deltaB
+    )
+    result, delta = eisenstein_operations.hash_Eisenstein_Fraction(
+        A, deltaA, B, deltaB
+    )
+    error = _compare("streams", list(stream), stream_delta, expected, deltaC)
+    return error or _compare("operations", result, delta, expected, deltaC)
+
+
+def check_add(deltaA, deltaB, length_a: int, length_b: int):
+    key = ("add", deltaA, deltaB)
+    if key not in _reference:
+        _reference[key] = eisenstein_operations.add_Eisenstein_Fraction(
+            SERIES_A, deltaA, SERIES_B, deltaB
+        )
+    reference, deltaC = _reference[key]
+    A = SERIES_A[:length_a]
+    B = SERIES_B[:length_b]
+    expected = _expected_prefix(
+        reference,
+        lambda pair: _available(pair[0], length_a, length_b)
+        and _available(pair[1], length_a, length_b),
+    )
+    stream, stream_delta = eisenstein_streams.iadd_Eisenstein_Fraction(
+        A, deltaA, B, deltaB
+    )
+    result, delta = eisenstein_operations.add_Eisenstein_Fraction(
+        A, deltaA, B, deltaB
+    )
+    error = _compare("streams", list(stream), stream_delta, expected, deltaC)
+    return error or _compare("operations", result, delta, expected, deltaC)
+
+
+def check_diff(deltaA, deltaB, length_a: int, length_b: int):
+    C = SERIES_A[:length_a]
+    key = ("diff", deltaA, deltaB, length_a)
+    if key not in _reference:
+        _reference[key] = eisenstein_operations.diff_Eisenstein_Fraction(
+            C, deltaA, deltaB
+        )
+    expected, deltaC = _reference[key]
+    stream, stream_delta = eisenstein_streams.idiff_Eisenstein_Fraction(
+        C, deltaA, deltaB
+    )
+    return _compare("streams", list(stream), stream_delta, expected, deltaC)
+
+
+def _check_dehash(deltaA, deltaB, length_a: int, even: bool):
+    # length_a is length of hashed series given to dehash
+    hashed, deltaC = _reference_hash(deltaA, deltaB)
+    if even:
+        key = ("dehasheven", deltaA, deltaB)
+        reference = eisenstein_operations.dehasheven_Eisenstein_Fraction
+        lazy = eisenstein_streams.idehasheven_Eisenstein_Fraction
+        (argument, series) = (deltaA, SERIES_A)
+    else:
+        key = ("dehashodd", deltaA, deltaB)
+        reference = eisenstein_operations.dehashodd_Eisenstein_Fraction
+        lazy = eisenstein_streams.idehashodd_Eisenstein_Fraction
+        (argument, series) = (deltaB, SERIES_B)
+    if key not in _reference:
+        _reference[key] = reference(hashed, deltaC, argument)
+    full, delta = _reference[key]
+    if full != series[: len(full)]:
+        return "roundtrip: %s from %s" % (full, hashed)
+    # Samples of hashed series are distinct, so reference result for a
+    # shorter series is the part of full result found in that series
+    C = hashed[:length_a]
+    expected = full[: len(set(full) & set(C))]
+    stream, stream_delta = lazy(C, deltaC, argument)
+    result, result_delta = reference(C, deltaC, argument)
+    error = _compare("streams", list(stream), stream_delta, expected, delta)
+    return error or _compare("operations", result, result_delta, expected, delta)
+
+
+def check_dehasheven(deltaA, deltaB, length_a: int, length_b: int):
+    return _check_dehash(deltaA, deltaB, length_a, True)
+
+
+def check_dehashodd(deltaA, deltaB, length_a: int, length_b: int):
+    return _check_dehash(deltaA, deltaB, length_a, False)
+
+
+def _rational_check(name: str):
+    def check(deltaA, deltaB, length_a: int, length_b: int):
+        reference = getattr(operations, name)
+        vectorized = getattr(operations_array, name)
+        A = RATIONAL_A[:length_a]
+        B = RATIONAL_B[:length_b]
+        if name == "diff":
+            args = (A, deltaA, deltaB)
+        elif name in ("dehasheven", "dehashodd"):
+            deltaC = (deltaA * deltaB) / (deltaA + deltaB)
+            args = (A, deltaC, deltaA if name == "dehasheven" else deltaB)
+        else:
+            args = (A, deltaA, B, deltaB)
+        expected, delta = reference(*args)
+        result, result_delta = vectorized(*args)
+        if result.tolist() != expected or result_delta != delta:
+            return "operations_array: %s %s, expected %s %s" % (
+                result.tolist(),
+                result_delta,
+                expected,
+                delta,
+            )
+        return None
+
+    return check
+
+
+# operator -> (check, kind of deltas)
+CHECKS = {
+    "hash": (check_hash, "eisenstein"),
+    "add": (check_add, "eisenstein"),
+    "diff": (check_diff, "eisenstein"),
+    "dehasheven": (check_dehasheven, "eisenstein"),
+    "dehashodd": (check_dehashodd, "eisenstein"),
+}
+if operations_array.np is not None:
+    for _name in ("sum", "diff", "fractionhash", "dehasheven", "dehashodd"):
+        CHECKS["rational." + _name] = (_rational_check(_name), "rational")
+
+
+def valid(case) -> bool:
+    """
+    :return: True if deltas of case meet preconditions of its operator
+    """
+    (operator, deltaA, deltaB, length_a, length_b) = case
+    if deltaA == 0 or deltaB == 0:
+        return False
+    if CHECKS[operator][1] == "rational":
+        return deltaA > 0 and deltaB > 0
+    if operator in ("hash", "dehasheven", "dehashodd"):
+        if get_dot_product(deltaA, deltaB) <= 0:
+            return False
+    if operator in ("dehasheven", "dehashodd"):
+        try:
+            eisenstein_operations.dehasheven_deltas(
+                (deltaA * deltaB) / (deltaA + deltaB), deltaA
+            )
+            eisenstein_operations.dehashodd_deltas(
+                (deltaA * deltaB) / (deltaA + deltaB), deltaB
+            )
+        except AssertionError:
+            return False
+    return True
+
+
+def run_case(case):
+    """
+    :return: None if all engines agree, otherwise description of mismatch
+    """
+    (operator, deltaA, deltaB, length_a, length_b) = case
+    try:
+        return CHECKS[operator][0](deltaA, deltaB, length_a, length_b)
+    except Exception as error:
+        return "%s: %s" % (type(error).__name__, error)
+
+
+def random_delta(rnd: random.Random, kind: str, scale: int = 6):
+    if kind == "rational":
+        return Fraction(rnd.randint(1, scale), rnd.randint(1, scale))
+    return EisensteinFraction(
+        four=(
+            rnd.randint(-scale, scale),
+            rnd.randint(1, scale),
+            rnd.randint(-scale, scale),
+            rnd.randint(1, scale),
+        )
+    )
+
+
+def random_cases(rnd: random.Random, operators: list):
+    """
+    Unbounded generator of valid random cases. Every drawn delta pair is
+    used by all given operators with CASES_PER_PAIR random length pairs -
+    derived deltas, schedules and reference results are then computed
+    once per pair, which is most of the cost of a new pair.
+    """
+    kinds = sorted(set(CHECKS[operator][1] for operator in operators))
+    while True:
+        kind = rnd.choice(kinds)
+        deltaA = random_delta(rnd, kind)
+        deltaB = random_delta(rnd, kind)
+        for operator in operators:
+            if CHECKS[operator][1] != kind:
+                continue
+            for _ in range(CASES_PER_PAIR):
+                case = (
+                    operator,
+                    deltaA,
+                    deltaB,
+                    rnd.randint(0, MAX_LEN),
+                    rnd.randint(0, MAX_LEN),
+                )
+                if not valid(case):
+                    break
+                yield case
+
+
+def _smaller_ints(n: int, lowest: int) -> list:
+    """
+    :return: values between lowest and n (n >= lowest), most aggressive first
+    """
+    result = []
+    for m in (lowest, lowest + (n - lowest) // 2, n - 1):
+        if lowest <= m < n and m not in result:
+            result.append(m)
+    return result
+
+
+def _smaller_magnitudes(n: int) -> list:
+    # Same as _smaller_ints(abs(n), 0) with sign of n kept
+    return [m if n > 0 else -m for m in _smaller_ints(abs(n), 0)]
+
+
+def _smaller_deltas(delta) -> list:
+    if isinstance(delta, Fraction):
+        (num, den) = (delta.numerator, delta.denominator)
+        return [Fraction(m, den) for m in _smaller_ints(num, 1)] + [
+            Fraction(num, m) for m in _smaller_ints(den, 1)
+        ]
+    four = (
+        delta.co_real.numerator,
+        delta.co_real.denominator,
+        delta.co_omega.numerator,
+        delta.co_omega.denominator,
+    )
+    result = []
+    for position, value in enumerate(four):
+        if position % 2 == 0:
+            candidates = _smaller_magnitudes(value)
+        else:
+            candidates = _smaller_ints(value, 1)
+        for m in candidates:
+            result.append(
+                EisensteinFraction(four=four[:position] + (m,) + four[position + 1 :])
+            )
+    return result
+
+
+def _candidates(case):
+    (operator, deltaA, deltaB, length_a, length_b) = case
+    for length in _smaller_ints(length_a, 0):
+        yield (operator, deltaA, deltaB, length, length_b)
+    for length in _smaller_ints(length_b, 0):
+        yield (operator, deltaA, deltaB, length_a, length)
+    for delta in _smaller_deltas(deltaA):
+        yield (operator, delta, deltaB, length_a, length_b)
+    for delta in _smaller_deltas(deltaB):
+        yield (operator, deltaA, delta, length_a, length_b)
+
+
+def shrink(case, fails=None):
+    """
+    Greedy shrinking: take any simpler valid case that still fails
+    until no candidate fails.
+    :param fails: case -> bool, run_case(case) is not None by default
+    :return: minimal failing case
+    """
+    if fails is None:
+        fails = lambda candidate: run_case(candidate) is not None
+    progress = True
+    while progress:
+        progress = False
+        for candidate in _candidates(case):
+            if valid(candidate) and fails(candidate):
+                case = candidate
+                progress = True
+                break
+    return case
+
+
+def fuzz(cases: int, seed: int = 0, operators=None):
+    """
+    Run cases random cases.
+    :return: list of (minimal case, mismatch description), one per
+             distinct minimal case
+    """
+    rnd = random.Random(seed)
+    if operators is None:
+        operators = sorted(CHECKS)
+    failures = {}
+    for case in islice(random_cases(rnd, operators), cases):
+        if run_case(case) is not None:
+            minimal = shrink(case)
+            failures[minimal] = run_case(minimal)
+    return list(failures.items())
+
+
+def main():
+    cases = int(sys.argv[1]) if len(sys.argv) >= 2 else 10 ** 5
+    seed = int(sys.argv[2]) if len(sys.argv) >= 3 else 0
+    start = time.perf_counter()
+    failures = fuzz(cases, seed)
+    elapsed = time.perf_counter() - start
+    print(
+        "%d cases, %d failures, %.1f s, %.0f cases/min"
+        % (cases, len(failures), elapsed, 60 * cases / elapsed)
+    )
+    for case, message in failures:
+        print("%r\n    %s" % (case, message))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Incremental Time Series operators with checkpoints - Python 3.x
+
+   Stateful counterparts of functions from eisenstein_operations.py
+   (IncrementalHash, IncrementalAdd, IncrementalDiff, IncrementalDehashEven,
+   IncrementalDehashOdd) and from operations.py (IncrementalSum,
+   IncrementalFractionHash, IncrementalFractionDiff,
+   IncrementalFractionDehashEven, IncrementalFractionDehashOdd).
+
+   push() appends new samples to inputs and returns only output samples
+   that became computable, so after any sequence of pushes all returned
+   samples are a prefix of what the list function gives on whole inputs.
+   Every output step is a pure function of its number, inputs are kept
+   only from the oldest sample that can still be needed - cost is
+   amortized O(1) per appended sample.
+
+   checkpoint() returns plain dict (ints, lists and buffered samples) that
+   can be pickled or stored; restore() builds operator that continues
+   exactly where the checkpointed one stopped.
+"""
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+from fractions import Fraction
+from math import ceil, floor
+
+from eisenstein import floor_root, ceil_root
+from eisenstein_fractions import EisensteinFraction
+from eisenstein_schedule import compile_hash_schedule
+from eisenstein_operations import (
+    add_deltas,
+    diff_deltas,
+    dehasheven_deltas,
+    dehashodd_deltas,
+)
+from eisenstein_streams import _first_flag
+
+CHECKPOINT_VERSION = 1
+
+
+def _encode_delta(delta) -> list:
+    if isinstance(delta, EisensteinFraction):
+        return [
+            delta.co_real.numerator,
+            delta.co_real.denominator,
+            delta.co_omega.numerator,
+            delta.co_omega.denominator,
+        ]
+    delta = Fraction(delta)
+    return [delta.numerator, delta.denominator]
+
+
+def _decode_delta(values):
+    if len(values) == 4:
+        return EisensteinFraction(four=tuple(values))
+    return Fraction(*values)
+
+
+class IncrementalOperator:
+    """
+    Base of incremental operators. Subclass defines inputs (number of
+    input series), delta (of output) and two pure functions of step:
+    _needs(step) - tuple of input indexes (None when input is not read)
+    _output(step, needs, values) - (emit, sample) for that step
+    """
+
+    inputs = 2
+
+    def __init__(self, *deltas):
+        self.deltas = deltas
+        self._step = 0
+        self._starts = [0] * self.inputs
+        self._buffers = [[] for _ in range(self.inputs)]
+
+    def push(self, *samples) -> list:
+        """
+        :param samples: new samples of each input (fewer args - no new samples)
+        :return: list of output samples that became computable
+        """
+        assert len(samples) <= self.inputs
+        for buffer, new in zip(self._buffers, samples):
+            buffer.extend(new)
+
+        result = []
+        buffers = self._buffers
+        starts = self._starts
+        while True:
+            needs = self._needs(self._step)
+            values = []
+            for k, idx in enumerate(needs):
+                if idx is None:
+                    values.append(None)
+                    continue
+                position = idx - starts[k]
+                if position >= len(buffers[k]):
+                    return result
+                values.append(buffers[k][position])
+            for k, idx in enumerate(needs):
+                if idx is not None:
+                    self._trim(k, idx)
+            emit, sample = self._output(self._step, needs, values)
+            self._step += 1
+            if emit:
+                result.append(sample)
+
+    def _trim(self, k: int, keep_from: int):
+        # Input indexes never decrease, so everything before keep_from is
+        # dead. Buffer is cut when at least half of it is dead - amortized O(1).
+        drop = keep_from - self._starts[k]
+        buffer = self._buffers[k]
+        if drop > 0 and 2 * drop >= len(buffer):
+            del buffer[:drop]
+            self._starts[k] = keep_from
+
+    @property
+    def steps(self) -> int:
+        """
+        :return: number of output steps done so far
+        """
+        return self._step
+
+    def checkpoint(self) -> dict:
+        """
+        :return: state of operator, see restore()
+        """
+        return {
+            "version": CHECKPOINT_VERSION,
+            "operator": type(self).__name__,
+            "deltas": [_encode_delta(delta) for delta in self.deltas],
+            "step": self._step,
+            "starts": list(self._starts),
+            "buffers": [list(buffer) for buffer in self._buffers],
+        }
+
+    def __str__(self):
+        return "%s(%s, step=%d)" % (
+            type(self).__name__,
+            ", ".join(str(delta) for delta in self.deltas),
+            self._step,
+        )
+
+    def __repr__(self):
+        return str(self)
+
+
+def restore(state: dict) -> IncrementalOperator:
+    """
+    :return: operator rebuilt from checkpoint() result
+    """
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError("Unsupported checkpoint version %r" % state.get("version"))
+    try:
+        cls = OPERATORS[state["operator"]]
+    except KeyError:
+        raise ValueError("Unknown operator %r" % state["operator"]) from None
+    operator = cls(*(_decode_delta(values) for values in state["deltas"]))
+    if len(state["buffers"]) != operator.inputs:
+        raise ValueError("Checkpoint does not match %s" % state["operator"])
+    operator._step = state["step"]
+    operator._starts = list(state["starts"])
+    operator._buffers = [list(buffer) for buffer in state["buffers"]]
+    return operator
+
+
+# eisenstein_operations.py
+
+
+class IncrementalHash(IncrementalOperator):
+    """
+    hash_Eisenstein_Fraction, push(new A samples, new B samples)
+    """
+
+    def __init__(self, deltaA: EisensteinFraction, deltaB: EisensteinFraction):
+        super().__init__(deltaA, deltaB)
+        self._schedule = compile_hash_schedule(deltaA, deltaB)
+        self.delta = self._schedule.deltaC
+
+    def _needs(self, step):
+        from_a, idx = self._schedule.source(step)
+        return (idx, None) if from_a else (None, idx)
+
+    def _output(self, step, needs, values):
+        return True, values[0] if needs[0] is not None else values[1]
+
+
+class IncrementalAdd(IncrementalOperator):
+    """
+    add_Eisenstein_Fraction, push(new A samples, new B samples)
+    """
+
+    def __init__(self, deltaA: EisensteinFraction, deltaB: EisensteinFraction):
+        super().__init__(deltaA, deltaB)
+        self.delta, ratio = add_deltas(deltaA, deltaB)
+        self._norm = ratio.get_norm
+        self._fast_first = self.delta == deltaA
+
+    def _needs(self, step):
+        idx = floor_root(self._norm, step)
+        return (step, idx) if self._fast_first else (idx, step)
+
+    def _output(self, step, needs, values):
+        return True, (values[0], values[1])
+
+
+class IncrementalDiff(IncrementalOperator):
+    """
+    diff_Eisenstein_Fraction, push(new C samples)
+    """
+
+    inputs = 1
+
+    def __init__(self, deltaA: EisensteinFraction, deltaB: EisensteinFraction):
+        super().__init__(deltaA, deltaB)
+        self.delta, ratio = diff_deltas(deltaA, deltaB)
+        self._norm = ratio.get_norm if ratio is not None else None
+
+    def _needs(self, step):
+        if self._norm is None:
+            return (step,)
+        return (ceil_root(self._norm, step),)
+
+    def _output(self, step, needs, values):
+        return True, values[0]
+
+
+class IncrementalDehashEven(IncrementalOperator):
+    """
+    dehasheven_Eisenstein_Fraction, push(new C samples)
+    """
+
+    inputs = 1
+    _take_first = True
+
+    def __init__(self, deltaC: EisensteinFraction, deltaA: EisensteinFraction):
+        super().__init__(deltaC, deltaA)
+        self.delta, delta = dehasheven_deltas(deltaC, deltaA)
+        self._norm = delta.get_norm
+
+    def _needs(self, step):
+        return (step,)
+
+    def _output(self, step, needs, values):
+        return _first_flag(self._norm, step) == self._take_first, values[0]
+
+
+class IncrementalDehashOdd(IncrementalDehashEven):
+    """
+    dehashodd_Eisenstein_Fraction, push(new C samples)
+    """
+
+    _take_first = False
+
+    def __init__(self, deltaC: EisensteinFraction, deltaB: EisensteinFraction):
+        IncrementalOperator.__init__(self, deltaC, deltaB)
+        self.delta, delta = dehashodd_deltas(deltaC, deltaB)
+        self._norm = delta.get_norm
+
+
+# operations.py
+
+
+class IncrementalSum(IncrementalOperator):
+    """
+    operations.sum, push(new A samples, new B samples)
+    """
+
+    def __init__(self, deltaA: Fraction, deltaB: Fraction):
+        super().__init__(deltaA, deltaB)
+        self.delta = min(deltaA, deltaB)
+        self._ratio = deltaA / deltaB
+
+    def _needs(self, step):
+        if self.delta == self.deltas[0]:
+            return (step, int(step * self._ratio))
+        return (int(step / self._ratio), step)
+
+    def _output(self, step, needs, values):
+        return True, str(values[0]) + values[1]
+
+
+class IncrementalFractionDiff(IncrementalOperator):
+    """
+    operations.diff, push(new C samples)
+    """
+
+    inputs = 1
+
+    def __init__(self, deltaA: Fraction, deltaB: Fraction):
+        super().__init__(deltaA, deltaB)
+        self.delta = min(deltaA, deltaB)
+        self._ratio = deltaA / deltaB if deltaA > deltaB else None
+
+    def _needs(self, step):
+        if self._ratio is None:
+            return (step,)
+        return (int(ceil(step * self._ratio)),)
+
+    def _output(self, step, needs, values):
+        return True, values[0]
+
+
+class IncrementalFractionHash(IncrementalOperator):
+    """
+    operations.fractionhash, push(new A samples, new B samples)
+    """
+
+    def __init__(self, deltaA: Fraction, deltaB: Fraction):
+        super().__init__(deltaA, deltaB)
+        self._delta = deltaB / (deltaA + deltaB)
+        self.delta = (deltaA * deltaB) / (deltaA + deltaB)
+
+    def _needs(self, step):
+        f = floor(step * self._delta)
+        f_next = floor((step + 1) * self._delta)
+        if f == f_next:
+            return (None, step - f_next)
+        return (f, None)
+
+    def _output(self, step, needs, values):
+        return True, values[0] if needs[0] is not None else values[1]
+
+
+class IncrementalFractionDehashEven(IncrementalOperator):
+    """
+    operations.dehasheven, push(new C samples)
+    """
+
+    inputs = 1
+
+    def __init__(self, deltaC: Fraction, deltaA: Fraction):
+        super().__init__(deltaC, deltaA)
+        self.delta = deltaA * deltaC / (deltaA - deltaC)
+        self._ratio = deltaA / self.delta
+
+    def _needs(self, step):
+        return (step + int(ceil((step + 1) * self._ratio)),)
+
+    def _output(self, step, needs, values):
+        return True, values[0]
+
+
+class IncrementalFractionDehashOdd(IncrementalOperator):
+    """
+    operations.dehashodd, push(new C samples)
+    """
+
+    inputs = 1
+
+    def __init__(self, deltaC: Fraction, deltaB: Fraction):
+        super().__init__(deltaC, deltaB)
+        self.delta = deltaB * deltaC / (deltaB - deltaC)
+        self._ratio = deltaB / self.delta
+
+    def _needs(self, step):
+        return (step + int(step * self._ratio),)
+
+    def _output(self, step, needs, values):
+        return True, values[0]
+
+
+OPERATORS = {
+    cls.__name__: cls
+    for cls in (
+        IncrementalHash,
+        IncrementalAdd,
+        IncrementalDiff,
+        IncrementalDehashEven,
+        IncrementalDehashOdd,
+        IncrementalSum,
+        IncrementalFractionDiff,
+        IncrementalFractionHash,
+        IncrementalFractionDehashEven,
+        IncrementalFractionDehashOdd,
+    )
+}
@@ -12,6 +12,7 @@ if sys.version_info[0] < 3:
     print("You need to run this with Python 3")
     sys.exit(1)
 
+from array import array
 from fractions import Fraction
 from math import floor, ceil
 
@@ -21,12 +22,108 @@ B = list(map(chr, range(ord("a"), ord("z") + 1)))
 deltaB = Fraction(1, 2)
 
 
-def sum(A: list, deltaA: Fraction, B: list, deltaB: Fraction):
+# Output lengths. Functions return as many samples as their inputs allow
+# (or limit if it is smaller), computed from input lengths and deltas.
+
+
+def _limited(length: int, limit: int) -> int:
+    if limit is None:
+        return length
+    assert limit >= 0
+    return min(length, limit)
+
+
+def _max_length(valid, high: int) -> int:
+    # Largest n <= high with valid(n); valid(n) is true for n up to the result
+    low = 0
+    while low < high:
+        n = (low + high + 1) // 2
+        if valid(n):
+            low = n
+        else:
+            high = n - 1
+    return low
+
+
+def sum_length(length_a: int, deltaA: Fraction, length_b: int, deltaB: Fraction):
+    # A[i] with B[int(i * deltaA / deltaB)] or A[int(i * deltaB / deltaA)] with B[i]
+    # int(i * r) < length  <=>  i < length / r
+    if min(deltaA, deltaB) == deltaA:
+        return min(length_a, ceil(length_b * deltaB / deltaA))
+    return min(length_b, ceil(length_a * deltaA / deltaB))
+
+
+def multisum_length(lengths: list, deltas: list):
+    # series k is read at int(i * deltaC / delta_k), see sum_length
+    deltaC = min(deltas)
+    return min(ceil(length * delta / deltaC) for length, delta in zip(lengths, deltas))
+
+
+def diff_length(length_c: int, deltaA: Fraction, deltaB: Fraction):
+    # ceil(i * deltaA / deltaB) < length_c
+    # <=>  i <= (length_c - 1) * deltaB / deltaA
+    if deltaA > deltaB and length_c > 0:
+        return floor((length_c - 1) * deltaB / deltaA) + 1
+    return length_c
+
+
+def fractionhash_length(
+    length_a: int, deltaA: Fraction, length_b: int, deltaB: Fraction
+):
+    # first n samples read floor(n * delta) samples of A, the rest from B
+    delta = deltaB / (deltaA + deltaB)
+
+    def valid(n):
+        taken_a = floor(n * delta)
+        return taken_a <= length_a and n - taken_a <= length_b
+
+    return _max_length(valid, length_a + length_b)
+
+
+def dehasheven_length(length_c: int, deltaC: Fraction, deltaA: Fraction):
+    deltaB = deltaA * deltaC / (deltaA - deltaC)
+    return _max_length(
+        lambda n: n == 0 or n - 1 + int(ceil(n * deltaA / deltaB)) < length_c,
+        length_c,
+    )
+
+
+def dehashodd_length(length_c: int, deltaC: Fraction, deltaB: Fraction):
+    deltaA = deltaB * deltaC / (deltaB - deltaC)
+    return _max_length(
+        lambda n: n == 0 or n - 1 + int((n - 1) * deltaB / deltaA) < length_c,
+        length_c,
+    )
+
+
+def sum(
+    A: list,
+    deltaA: Fraction,
+    B: list,
+    deltaB: Fraction,
+    limit: int = None,
+    output: str = "strings",
+):
+    """
+    output selects form of result:
+    "strings" - list of str(first) + second,
+    "columns" - (firsts, seconds), two lists of samples,
+    "indexes" - (indexes in A, indexes in B), nothing is copied from inputs.
+    """
+
+    if output == "columns":
+        columns, deltaC = multisum([(A, deltaA), (B, deltaB)], limit)
+        return tuple(columns), deltaC
+    if output == "indexes":
+        columns, deltaC = multisum_indexes([len(A), len(B)], [deltaA, deltaB], limit)
+        return tuple(columns), deltaC
+    if output != "strings":
+        raise ValueError("Unknown sum output: %r" % (output,))
 
     result = []
     deltaC = min(deltaA, deltaB)
 
-    for i in range(20):
+    for i in range(_limited(sum_length(len(A), deltaA, len(B), deltaB), limit)):
         if deltaC == deltaA:
             result.append(str(A[i]) + B[int(i * deltaA / deltaB)])
         else:
@@ -34,12 +131,60 @@ def sum(A: list, deltaA: Fraction, B: list, deltaB: Fraction):
     return result, deltaC
 
 
-def diff(C: list, deltaA: Fraction, deltaB: Fraction):
+def _floor_multiples(ratio: Fraction, length: int):
+    # int(i * ratio) for i in range(length) - range or lazy iterator
+    if ratio == 1:
+        return range(length)
+    (p, q) = (ratio.numerator, ratio.denominator)
+    return (i * p // q for i in range(length))
+
+
+def multisum_indexes(lengths: list, deltas: list, limit: int = None):
+    """
+    :return: (list of index columns, one per series, deltaC) - indexes of
+             samples of every series taken by multisum; column of series
+             that is not resampled is a range, other columns are array("q")
+    """
+
+    deltaC = min(deltas)
+    length = _limited(multisum_length(lengths, deltas), limit)
+
+    columns = []
+    for delta in deltas:
+        indexes = _floor_multiples(deltaC / delta, length)
+        columns.append(indexes if isinstance(indexes, range) else array("q", indexes))
+    return columns, deltaC
+
+
+def multisum(pairs: list, limit: int = None):
+    """
+    N-ary sum - pairs is list of (series, delta). Samples are not joined
+    into strings: column k holds samples of series k taken at the rate
+    of the fastest series, as sum does for two series.
+    :return: (list of columns, one per series, deltaC)
+    """
+
+    deltas = [delta for _, delta in pairs]
+    deltaC = min(deltas)
+    length = multisum_length([len(series) for series, _ in pairs], deltas)
+    length = _limited(length, limit)
+
+    columns = []
+    for series, delta in pairs:
+        if delta == deltaC:
+            columns.append(list(series[:length]))
+        else:
+            indexes = _floor_multiples(deltaC / delta, length)
+            columns.append([series[j] for j in indexes])
+    return columns, deltaC
+
+
+def diff(C: list, deltaA: Fraction, deltaB: Fraction, limit: int = None):
 
     result = []
     deltaC = min(deltaA, deltaB)
 
-    for i in range(10):
+    for i in range(_limited(diff_length(len(C), deltaA, deltaB), limit)):
         if deltaA > deltaB:
             result.append(C[int(ceil(i * deltaA / deltaB))])
         else:
@@ -47,12 +192,15 @@ def diff(C: list, deltaA: Fraction, deltaB: Fraction):
     return result, deltaC
 
 
-def fractionhash(A: list, deltaA: Fraction, B: list, deltaB: Fraction):
+def fractionhash(
+    A: list, deltaA: Fraction, B: list, deltaB: Fraction, limit: int = None
+):
 
     result = []
     delta = deltaB / (deltaA + deltaB)
+    length = fractionhash_length(len(A), deltaA, len(B), deltaB)
 
-    for i in range(20):
+    for i in range(_limited(length, limit)):
         if floor(i * delta) == floor((i + 1) * delta):
             result.append(B[i - int(floor((i + 1) * delta))])
         else:
@@ -62,22 +210,86 @@ def fractionhash(A: list, deltaA: Fraction, B: list, deltaB: Fraction):
     return result, deltaC
 
 
-def dehasheven(C: list, deltaC: Fraction, deltaA: Fraction):
+# Random access to fractionhash. delta = deltaB / (deltaA + deltaB) = p / q
+# in lowest terms, so floor((i + q) * delta) = floor(i * delta) + p: output
+# sample i + q is taken from the same series as sample i, p samples later
+# in A or q - p samples later in B. For deltaA / deltaB = a / b the period
+# is q = a + b samples.
+
+
+def fractionhash_period(deltaA: Fraction, deltaB: Fraction):
+    """
+    :return: (period, samples of A in one period)
+    """
+    delta = deltaB / (deltaA + deltaB)
+    return delta.denominator, delta.numerator
+
+
+def fractionhash_source(k: int, deltaA: Fraction, deltaB: Fraction):
+    """
+    :return: (True, index in A) or (False, index in B) of k-th sample of
+             fractionhash, O(1) for any k
+    """
+    delta = deltaB / (deltaA + deltaB)
+    (p, q) = (delta.numerator, delta.denominator)
+    f = k * p // q
+    f_next = (k + 1) * p // q
+    if f == f_next:
+        return False, k - f_next
+    return True, f
+
+
+def fractionhash_pattern(deltaA: Fraction, deltaB: Fraction) -> list:
+    """
+    :return: fractionhash_source() of samples 0 .. period - 1
+    """
+    period = fractionhash_period(deltaA, deltaB)[0]
+    return [fractionhash_source(k, deltaA, deltaB) for k in range(period)]
+
+
+def fractionhash_range(
+    A: list, deltaA: Fraction, B: list, deltaB: Fraction, start: int, stop: int
+):
+    """
+    :return: samples start .. stop - 1 of fractionhash(A, deltaA, B, deltaB)
+             and deltaC; only samples of A and B that they are taken from
+             are read, stop is cut to the length of whole result
+    """
+    assert start >= 0
+    result = []
+    stop = min(stop, fractionhash_length(len(A), deltaA, len(B), deltaB))
+
+    if start < stop:
+        (q, p) = fractionhash_period(deltaA, deltaB)
+        f = start * p // q
+        for i in range(start, stop):
+            f_next = (i + 1) * p // q
+            if f == f_next:
+                result.append(B[i - f_next])
+            else:
+                result.append(A[f])
+            f = f_next
+
+    deltaC = (deltaA * deltaB) / (deltaA + deltaB)
+    return result, deltaC
+
+
+def dehasheven(C: list, deltaC: Fraction, deltaA: Fraction, limit: int = None):
 
     result = []
     deltaB = deltaA * deltaC / (deltaA - deltaC)
 
-    for i in range(6):
+    for i in range(_limited(dehasheven_length(len(C), deltaC, deltaA), limit)):
         result.append(C[i + int(ceil((i + 1) * deltaA / deltaB))])
     return result, deltaB
 
 
-def dehashodd(C: list, deltaC: Fraction, deltaB: Fraction):
+def dehashodd(C: list, deltaC: Fraction, deltaB: Fraction, limit: int = None):
 
     result = []
     deltaA = deltaB * deltaC / (deltaB - deltaC)
 
-    for i in range(6):
+    for i in range(_limited(dehashodd_length(len(C), deltaC, deltaB), limit)):
         result.append(C[i + int(i * deltaB / deltaA)])
     return result, deltaA
 
@@ -113,6 +325,8 @@ def main():
     print("Diff:", diff(sum_result, deltaA, deltaB))
 
     print("Hash:", fractionhash(A, deltaA, B, deltaB))
+    print("Hash period:", fractionhash_period(deltaA, deltaB))
+    print("Hash samples 10..19:", fractionhash_range(A, deltaA, B, deltaB, 10, 20))
     print("dehasheven:", dehasheven(hash_result, delta_hash, deltaA))
     print("dehashodd:", dehashodd(hash_result, delta_hash, deltaB))
 
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Time Series Algebra Equations on NumPy arrays - Python 3.x
+
+   Array mode of functions from operations.py. All output indices are
+   computed at once on int64 arrays as exact floor divisions
+   (i * numerator) // denominator of the rational deltas and then
+   gathered from the input arrays. Results are equal to operations.py:
+   output length is the maximal one for given inputs (see *_length
+   functions of operations.py), length argument works as its limit.
+
+   https://planetmath.org/StreamInterlaceAndDeinterlace
+"""
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need to run this with Python 3")
+    sys.exit(1)
+
+from fractions import Fraction
+
+import operations
+
+try:
+    import numpy as np
+except ImportError:  # array mode is optional
+    np = None
+
+INT64_MAX = 2 ** 63 - 1
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("operations_array requires numpy")
+
+
+def _numerators(count: int, ratio: Fraction, offset: int):
+    # i * num + offset for i in 0..count-1, exact
+    assert ratio >= 0
+    i = np.arange(count, dtype=np.int64)
+    if count * ratio.numerator + abs(offset) > INT64_MAX:
+        # int64 would overflow - compute on Python ints (object array)
+        i = i.astype(object)
+    return i * ratio.numerator + offset
+
+
+def floor_indexes(count: int, ratio: Fraction, offset: int = 0):
+    """
+    :return: int64 array of floor((i * num + offset) / den), i in 0..count-1
+             where ratio = num / den
+    """
+    _require_numpy()
+    return (_numerators(count, ratio, offset) // ratio.denominator).astype(np.int64)
+
+
+def ceil_indexes(count: int, ratio: Fraction, offset: int = 0):
+    """
+    :return: int64 array of ceil((i * num + offset) / den), i in 0..count-1
+             where ratio = num / den
+    """
+    _require_numpy()
+    return (-(-_numerators(count, ratio, offset) // ratio.denominator)).astype(
+        np.int64
+    )
+
+
+def _gather_two(A, idx_a, B, idx_b, from_a):
+    # Elementwise A[idx_a] where from_a else B[idx_b]
+    if A.dtype.kind in "biuf" and B.dtype.kind in "biuf":
+        dtype = np.result_type(A.dtype, B.dtype)
+    elif A.dtype == B.dtype:
+        dtype = A.dtype
+    else:
+        # Mixed kinds (e.g. numbers and letters) keep their own element types
+        dtype = object
+    result = np.empty(len(from_a), dtype=dtype)
+    result[from_a] = A[idx_a[from_a]]
+    from_b = ~from_a
+    result[from_b] = B[idx_b[from_b]]
+    return result
+
+
+def sum(
+    A, deltaA: Fraction, B, deltaB: Fraction, length: int = None, output="strings"
+):
+    """
+    output is the same as of operations.sum, "columns" gives two arrays
+    of element types of A and B, "indexes" two int64 arrays
+    """
+
+    _require_numpy()
+    if output == "columns":
+        columns, deltaC = multisum([(A, deltaA), (B, deltaB)], length)
+        return tuple(columns), deltaC
+    if output == "indexes":
+        columns, deltaC = multisum_indexes([len(A), len(B)], [deltaA, deltaB], length)
+        return tuple(columns), deltaC
+    if output != "strings":
+        raise ValueError("Unknown sum output: %r" % (output,))
+
+    A = np.asarray(A)
+    B = np.asarray(B)
+    deltaC = min(deltaA, deltaB)
+    length = operations._limited(
+        operations.sum_length(len(A), deltaA, len(B), deltaB), length
+    )
+
+    if deltaC == deltaA:
+        first = A[:length]
+        second = B[floor_indexes(length, deltaA / deltaB)]
+    else:
+        first = A[floor_indexes(length, deltaB / deltaA)]
+        second = B[:length]
+    return np.char.add(first.astype(str), second.astype(str)), deltaC
+
+
+def multisum_indexes(lengths: list, deltas: list, length: int = None):
+
+    _require_numpy()
+    deltaC = min(deltas)
+    length = operations._limited(operations.multisum_length(lengths, deltas), length)
+
+    columns = []
+    for delta in deltas:
+        if delta == deltaC:
+            columns.append(np.arange(length, dtype=np.int64))
+        else:
+            columns.append(floor_indexes(length, deltaC / delta))
+    return columns, deltaC
+
+
+def multisum(pairs: list, length: int = None):
+
+    _require_numpy()
+    series = [np.asarray(samples) for samples, _ in pairs]
+    deltas = [delta for _, delta in pairs]
+    deltaC = min(deltas)
+    length = operations._limited(
+        operations.multisum_length([len(s) for s in series], deltas), length
+    )
+
+    columns = []
+    for samples, delta in zip(series, deltas):
+        if delta == deltaC:
+            # Fastest series is not resampled - view, no index array
+            columns.append(samples[:length])
+        else:
+            columns.append(samples[floor_indexes(length, deltaC / delta)])
+    return columns, deltaC
+
+
+def diff(C, deltaA: Fraction, deltaB: Fraction, length: int = None):
+
+    _require_numpy()
+    C = np.asarray(C)
+    deltaC = min(deltaA, deltaB)
+    length = operations._limited(
+        operations.diff_length(len(C), deltaA, deltaB), length
+    )
+
+    if deltaA > deltaB:
+        return C[ceil_indexes(length, deltaA / deltaB)], deltaC
+    return C[:length], deltaC
+
+
+def fractionhash(A, deltaA: Fraction, B, deltaB: Fraction, length: int = None):
+
+    _require_numpy()
+    A = np.asarray(A)
+    B = np.asarray(B)
+    delta = deltaB / (deltaA + deltaB)
+    length = operations._limited(
+        operations.fractionhash_length(len(A), deltaA, len(B), deltaB), length
+    )
+
+    current = floor_indexes(length + 1, delta)
+    from_a = current[:-1] != current[1:]
+    idx_a = current[:-1]
+    idx_b = np.arange(length) - current[1:]
+
+    deltaC = (deltaA * deltaB) / (deltaA + deltaB)
+    return _gather_two(A, idx_a, B, idx_b, from_a), deltaC
+
+
+def dehasheven(C, deltaC: Fraction, deltaA: Fraction, length: int = None):
+
+    _require_numpy()
+    C = np.asarray(C)
+    deltaB = deltaA * deltaC / (deltaA - deltaC)
+    length = operations._limited(
+        operations.dehasheven_length(len(C), deltaC, deltaA), length
+    )
+
+    # i + ceil((i + 1) * deltaA / deltaB)
+    ratio = deltaA / deltaB
+    idx = np.arange(length) + ceil_indexes(length, ratio, ratio.numerator)
+    return C[idx], deltaB
+
+
+def dehashodd(C, deltaC: Fraction, deltaB: Fraction, length: int = None):
+
+    _require_numpy()
+    C = np.asarray(C)
+    deltaA = deltaB * deltaC / (deltaB - deltaC)
+    length = operations._limited(
+        operations.dehashodd_length(len(C), deltaC, deltaB), length
+    )
+
+    # i + int(i * deltaB / deltaA)
+    idx = np.arange(length) + floor_indexes(length, deltaB / deltaA)
+    return C[idx], deltaA
@@ -6,8 +6,20 @@ class ConfigParameters(object):
     def set_range(self, new_range):
         self.test_range = new_range
 
+    def set_cache_size(self, new_size):
+        # Number of entries kept by eisenstein_cache.delta_cache, 0 disables it
+        assert new_size >= 0
+        self.cache_size = new_size
+
+    def set_jobs(self, new_jobs):
+        # Number of processes running parameter-matrix test units
+        assert new_jobs >= 1
+        self.jobs = new_jobs
+
     def __init__(self):
         self.set_range(5)
+        self.set_cache_size(256)
+        self.set_jobs(1)
 
 
 cfg_prm = ConfigParameters()
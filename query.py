@@ -0,0 +1,610 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""Query expressions over Eisenstein Time Series - Python 3.x
+
+   A query is a DAG of Source, Hash, Add, Diff, DehashEven and DehashOdd
+   nodes. Every node derives its delta when it is built, with the same
+   helpers that eisenstein_operations.py uses, so a wrong chain (e.g.
+   dehash of a series that is not faster than argument) fails early.
+
+   a = Source("A", deltaA)
+   b = Source("B", deltaB)
+   plan = compile_query(DehashEven(Hash(a, b), deltaA), {"A": 49, "B": 104})
+   result, delta = plan.run({"A": data_sets.A, "B": data_sets.B})
+
+   compile_query runs the operator functions once on series of Refs - a
+   Ref(source, index) tells where a sample comes from - instead of data.
+   Operators only select and pair samples, so this gives the fused index
+   map of the whole chain: every output sample as a Ref into an original
+   source (or a tuple of them for add). run() gathers samples from the
+   sources by this map; no intermediate series of data is allocated.
+   Results equal nested calls of eisenstein_operations.py functions
+   (evaluate() does exactly that).
+
+   series_length() gives the length of the result for given source
+   lengths without running anything (see *_length functions of
+   eisenstein_operations.py).
+
+   simplify() rewrites a query into a cheaper one with the same output
+   (see RULES) and reports the rewrites it applied: nodes are dropped, or
+   a prefix (Take) of hash or add is moved onto its arguments, so that
+   the operator computes only the samples that are kept. Rules that
+   depend on lengths of series apply only when source lengths are given.
+"""
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+from eisenstein import floor_root
+from eisenstein_fractions import EisensteinFraction
+from eisenstein_schedule import compile_hash_schedule
+from eisenstein_operations import (
+    add_deltas,
+    diff_deltas,
+    dehasheven_deltas,
+    dehashodd_deltas,
+    hash_Eisenstein_Fraction,
+    add_Eisenstein_Fraction,
+    diff_Eisenstein_Fraction,
+    dehasheven_Eisenstein_Fraction,
+    dehashodd_Eisenstein_Fraction,
+    hash_length,
+    add_length,
+    diff_length,
+    dehasheven_length,
+    dehashodd_length,
+)
+
+
+class Ref:
+    """
+    Sample number index of source number source
+    """
+
+    __slots__ = ("source", "index")
+
+    def __init__(self, source: int, index: int):
+        self.source = source
+        self.index = index
+
+    def __eq__(self, other):
+        if not isinstance(other, Ref):
+            return NotImplemented
+        return self.source == other.source and self.index == other.index
+
+    def __hash__(self):
+        return hash((self.source, self.index))
+
+    def __repr__(self):
+        return "Ref(%d, %d)" % (self.source, self.index)
+
+
+class _SourceRefs:
+    # Refs of whole source as a sequence, created on access only
+    __slots__ = ("source", "length")
+
+    def __init__(self, source: int, length: int):
+        self.source = source
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("source index out of range")
+        return Ref(self.source, index)
+
+
+class Query:
+    """
+    Node of query DAG. delta is the delta of its result series.
+    Operator nodes define:
+    apply(*series) - (result list, delta) of operator on child series
+    output_length(*lengths) - length of result for child series lengths
+    """
+
+    __slots__ = ("children", "delta")
+
+    def sources(self) -> list:
+        """
+        :return: Source nodes of the DAG, each once, in order of first use
+        """
+        result = []
+        seen = set()
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            if isinstance(node, Source):
+                result.append(node)
+            stack.extend(reversed(node.children))
+        return result
+
+    def __repr__(self):
+        return "%s(%s)" % (
+            type(self).__name__,
+            ", ".join(repr(x) for x in self._arguments()),
+        )
+
+
+class Source(Query):
+    """
+    Named input series with its delta
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str, delta: EisensteinFraction):
+        self.name = name
+        self.children = ()
+        self.delta = delta
+
+    def _arguments(self):
+        return (self.name, self.delta)
+
+
+class Hash(Query):
+    __slots__ = ()
+
+    def __init__(self, a: Query, b: Query):
+        self.children = (a, b)
+        self.delta = compile_hash_schedule(a.delta, b.delta).deltaC
+
+    def apply(self, A, B):
+        return hash_Eisenstein_Fraction(
+            A, self.children[0].delta, B, self.children[1].delta
+        )
+
+    def output_length(self, length_a, length_b):
+        return hash_length(
+            length_a, self.children[0].delta, length_b, self.children[1].delta
+        )
+
+    def _arguments(self):
+        return self.children
+
+
+class Add(Query):
+    __slots__ = ()
+
+    def __init__(self, a: Query, b: Query):
+        self.children = (a, b)
+        self.delta = add_deltas(a.delta, b.delta)[0]
+
+    def apply(self, A, B):
+        return add_Eisenstein_Fraction(
+            A, self.children[0].delta, B, self.children[1].delta
+        )
+
+    def output_length(self, length_a, length_b):
+        return add_length(
+            length_a, self.children[0].delta, length_b, self.children[1].delta
+        )
+
+    def _arguments(self):
+        return self.children
+
+
+class Diff(Query):
+    __slots__ = ("deltaA", "deltaB")
+
+    def __init__(
+        self, c: Query, deltaA: EisensteinFraction, deltaB: EisensteinFraction
+    ):
+        self.children = (c,)
+        self.deltaA = deltaA
+        self.deltaB = deltaB
+        self.delta = diff_deltas(deltaA, deltaB)[0]
+
+    def apply(self, C):
+        return diff_Eisenstein_Fraction(C, self.deltaA, self.deltaB)
+
+    def output_length(self, length_c):
+        return diff_length(length_c, self.deltaA, self.deltaB)
+
+    def _arguments(self):
+        return self.children + (self.deltaA, self.deltaB)
+
+
+class DehashEven(Query):
+    """
+    Series of deltaA taken back from hashed series (first argument of hash)
+    """
+
+    __slots__ = ("deltaA",)
+
+    def __init__(self, c: Query, deltaA: EisensteinFraction):
+        self.children = (c,)
+        self.deltaA = deltaA
+        # dehasheven_Eisenstein_Fraction returns deltaB of the pair, not
+        # the delta of its samples - node keeps delta of the result series
+        dehasheven_deltas(c.delta, deltaA)
+        self.delta = deltaA
+
+    def apply(self, C):
+        return dehasheven_Eisenstein_Fraction(C, self.children[0].delta, self.deltaA)
+
+    def output_length(self, length_c):
+        return dehasheven_length(length_c, self.children[0].delta, self.deltaA)
+
+    def _arguments(self):
+        return self.children + (self.deltaA,)
+
+
+class DehashOdd(Query):
+    """
+    Series of deltaB taken back from hashed series (second argument of hash)
+    """
+
+    __slots__ = ("deltaB",)
+
+    def __init__(self, c: Query, deltaB: EisensteinFraction):
+        self.children = (c,)
+        self.deltaB = deltaB
+        dehashodd_deltas(c.delta, deltaB)
+        self.delta = deltaB
+
+    def apply(self, C):
+        return dehashodd_Eisenstein_Fraction(C, self.children[0].delta, self.deltaB)
+
+    def output_length(self, length_c):
+        return dehashodd_length(length_c, self.children[0].delta, self.deltaB)
+
+    def _arguments(self):
+        return self.children + (self.deltaB,)
+
+
+class Take(Query):
+    """
+    First length samples of series (all of them if it is shorter)
+    """
+
+    __slots__ = ("length",)
+
+    def __init__(self, c: Query, length: int):
+        assert length >= 0
+        self.children = (c,)
+        self.length = length
+        self.delta = c.delta
+
+    def apply(self, C):
+        return list(C[: self.length]), self.delta
+
+    def output_length(self, length_c):
+        return min(self.length, length_c)
+
+    def _arguments(self):
+        return self.children + (self.length,)
+
+
+def _walk(node: Query, leaf, memo: dict, counter: list):
+    """
+    Post-order evaluation of DAG, shared nodes are evaluated once.
+    :param leaf: Source -> its series
+    """
+    key = id(node)
+    if key not in memo:
+        if isinstance(node, Source):
+            memo[key] = leaf(node)
+        else:
+            series = [_walk(child, leaf, memo, counter) for child in node.children]
+            counter[0] += 1
+            memo[key] = node.apply(*series)[0]
+    return memo[key]
+
+
+def evaluate(node: Query, data: dict):
+    """
+    Reference evaluation: operator functions are called node by node
+    and every intermediate series is materialized.
+    :param data: source name -> series
+    :return: (result list, delta)
+    """
+    result = _walk(node, lambda source: data[source.name], {}, [0])
+    return result, node.delta
+
+
+def series_length(query: Query, lengths: dict, memo: dict = None) -> int:
+    """
+    :param lengths: source name -> number of samples
+    :return: number of samples of query result
+    """
+    if memo is None:
+        memo = {}
+    key = id(query)
+    if key not in memo:
+        if isinstance(query, Source):
+            result = lengths[query.name]
+        else:
+            result = query.output_length(
+                *(series_length(x, lengths, memo) for x in query.children)
+            )
+        # node is kept alive with its length, so its id is not reused
+        memo[key] = (query, result)
+    return memo[key][1]
+
+
+def count_operators(query: Query) -> int:
+    """
+    :return: number of operator evaluations of query (shared nodes once)
+    """
+    return len(_nodes(query)) - len(query.sources())
+
+
+def _nodes(query: Query) -> dict:
+    # id -> node of every node in DAG
+    result = {}
+    stack = [query]
+    while stack:
+        node = stack.pop()
+        if id(node) not in result:
+            result[id(node)] = node
+            stack.extend(node.children)
+    return result
+
+
+def _gather(item, data: list):
+    if isinstance(item, Ref):
+        return data[item.source][item.index]
+    return tuple(_gather(x, data) for x in item)
+
+
+class CompiledQuery:
+    """
+    Fused index map of a query for given source lengths
+    """
+
+    __slots__ = ("query", "names", "lengths", "index_map", "delta", "operators")
+
+    def __init__(self, query: Query, lengths: dict):
+        self.query = query
+        sources = query.sources()
+        self.names = [source.name for source in sources]
+        self.lengths = [lengths[name] for name in self.names]
+        position = dict((name, i) for i, name in enumerate(self.names))
+        counter = [0]
+        result = _walk(
+            query,
+            lambda source: _SourceRefs(position[source.name], lengths[source.name]),
+            {},
+            counter,
+        )
+        if isinstance(result, _SourceRefs):
+            result = result[:]
+        self.index_map = result
+        self.delta = query.delta
+        # operator evaluations of the query, done once here and never by run
+        self.operators = counter[0]
+
+    def run(self, data: dict):
+        """
+        :param data: source name -> series (list, MappedSeries, ...)
+                     of the length given to compile_query
+        :return: (result list, delta)
+        """
+        series = [data[name] for name in self.names]
+        for name, values, length in zip(self.names, series, self.lengths):
+            if len(values) != length:
+                raise ValueError(
+                    "Source %s has %d samples, query compiled for %d"
+                    % (name, len(values), length)
+                )
+        result = []
+        append = result.append
+        for item in self.index_map:
+            if isinstance(item, Ref):
+                append(series[item.source][item.index])
+            else:
+                append(_gather(item, series))
+        return result, self.delta
+
+
+def compile_query(query: Query, lengths: dict) -> CompiledQuery:
+    """
+    :param lengths: source name -> number of samples
+    """
+    return CompiledQuery(query, lengths)
+
+
+# Rewrite rules of simplify(). Each takes a node whose children are already
+# simplified and a function giving length of a node result (None when source
+# lengths are not known). It returns an equivalent node with the same output
+# and delta, or None if it does not apply. Deltas that must match are
+# compared exactly.
+
+
+def _hashed(node):
+    """
+    :return: hash node if node is hash or prefix of hash
+    """
+    if isinstance(node, Take):
+        node = node.children[0]
+    return node if isinstance(node, Hash) else None
+
+
+def _dehasheven_of_hash(node, length_of):
+    # dehasheven(hash(A, B)[:m], deltaA) == A[:n], n = samples of A among
+    # first m samples of hash, known exactly from the hash schedule
+    if not isinstance(node, DehashEven):
+        return None
+    hashed = _hashed(node.children[0])
+    if hashed is None:
+        return None
+    (a, b) = hashed.children
+    m = length_of(node.children[0])
+    if node.deltaA != a.delta or m is None:
+        return None
+    return Take(a, compile_hash_schedule(a.delta, b.delta).floor(m))
+
+
+def _dehashodd_of_hash(node, length_of):
+    # dehashodd(hash(A, B)[:m], deltaB) == B[:m - n]
+    if not isinstance(node, DehashOdd):
+        return None
+    hashed = _hashed(node.children[0])
+    if hashed is None:
+        return None
+    (a, b) = hashed.children
+    m = length_of(node.children[0])
+    if node.deltaB != b.delta or m is None:
+        return None
+    return Take(b, m - compile_hash_schedule(a.delta, b.delta).floor(m))
+
+
+def _diff_identity(node, length_of):
+    # diff with deltaA not slower than deltaB drops no probes: it returns
+    # the whole series. diff(add(A, B), deltaA, deltaB) is the case
+    # of faster A - the add pairs come back unchanged.
+    # Slower A (add(B, A) with faster A, diffed with deltaB, deltaA) is
+    # not rewritten: the result is (B[i], A[ceil(i * r)]) with delta of A,
+    # it is not a prefix of the add, and add(B, diff(A, deltaB, deltaA))
+    # pairs B with a series of delta of A - B would be resampled again.
+    if not isinstance(node, Diff):
+        return None
+    (c,) = node.children
+    if diff_deltas(node.deltaA, node.deltaB)[1] is not None or node.delta != c.delta:
+        return None
+    return c
+
+
+def _take_over_hash(node, length_of):
+    # hash(A, B)[:m] == hash(A[:n], B[:m - n]), n = samples of A among
+    # first m samples of hash (see dehasheven-of-hash). If the hash is
+    # shorter than m, n and m - n still cover every sample it reads.
+    if not isinstance(node, Take) or not isinstance(node.children[0], Hash):
+        return None
+    (a, b) = node.children[0].children
+    n = compile_hash_schedule(a.delta, b.delta).floor(node.length)
+    return Hash(Take(a, n), Take(b, node.length - n))
+
+
+def _take_over_add(node, length_of):
+    # add(A, B)[:m] reads first m samples of the faster series and
+    # samples 0 .. floor_root(norm, m - 1) of the slower one
+    if not isinstance(node, Take) or not isinstance(node.children[0], Add):
+        return None
+    (a, b) = node.children[0].children
+    m = node.length
+    deltaC, ratio = add_deltas(a.delta, b.delta)
+    slow = floor_root(ratio.get_norm, m - 1) + 1 if m > 0 else 0
+    if deltaC == a.delta:
+        return Add(Take(a, m), Take(b, slow))
+    return Add(Take(a, slow), Take(b, m))
+
+
+def _take_of_take(node, length_of):
+    if not isinstance(node, Take) or not isinstance(node.children[0], Take):
+        return None
+    inner = node.children[0]
+    if node.length >= inner.length:
+        return None
+    return Take(inner.children[0], node.length)
+
+
+def _take_noop(node, length_of):
+    # Take not shorter than its series keeps all of it
+    if not isinstance(node, Take):
+        return None
+    (c,) = node.children
+    if isinstance(c, Take):
+        limit = c.length
+    else:
+        limit = length_of(c)
+    if limit is None or node.length < limit:
+        return None
+    return c
+
+
+RULES = [
+    ("dehasheven-of-hash", _dehasheven_of_hash),
+    ("dehashodd-of-hash", _dehashodd_of_hash),
+    ("diff-identity", _diff_identity),
+    ("take-of-take", _take_of_take),
+    ("take-noop", _take_noop),
+    ("take-over-hash", _take_over_hash),
+    ("take-over-add", _take_over_add),
+]
+
+
+def _node_key(node: Query):
+    # Structural identity: same type, same arguments, same child nodes
+    if isinstance(node, Source):
+        return ("Source", node.name, node.delta)
+    return (type(node).__name__,) + tuple(
+        id(x) if isinstance(x, Query) else x for x in node._arguments()
+    )
+
+
+def _rebuild(node: Query, children: tuple) -> Query:
+    if all(x is y for x, y in zip(children, node.children)):
+        return node
+    result = object.__new__(type(node))
+    for name in type(node).__slots__:
+        setattr(result, name, getattr(node, name))
+    result.children = children
+    result.delta = node.delta
+    return result
+
+
+def simplify(query: Query, lengths: dict = None):
+    """
+    Apply RULES bottom-up until none matches and share structurally equal
+    sub-plans ("shared-subplan"), so each is evaluated once.
+    :param lengths: source name -> number of samples; simplified query
+                    gives the same result as query for sources of these
+                    lengths (for any lengths if not given)
+    :return: (simplified query, list of applied rewrites as strings)
+    """
+    applied = []
+    memo = {}
+    shared = {}
+    length_memo = {}
+
+    def length_of(node):
+        if lengths is None:
+            return None
+        return series_length(node, lengths, length_memo)
+
+    def visit(node):
+        if id(node) in memo:
+            return memo[id(node)][1]
+        current = _rebuild(node, tuple(visit(child) for child in node.children))
+        changed = True
+        while changed:
+            changed = False
+            for name, rule in RULES:
+                rewritten = rule(current, length_of)
+                if rewritten is not None:
+                    applied.append("%s: %r -> %r" % (name, current, rewritten))
+                    current = rewritten
+                    changed = True
+                    break
+            if changed and not isinstance(current, Source):
+                current = _rebuild(
+                    current, tuple(visit(child) for child in current.children)
+                )
+        key = _node_key(current)
+        if key in shared:
+            if shared[key] is not current:
+                if not isinstance(current, Source):
+                    applied.append("shared-subplan: %r" % (current,))
+                current = shared[key]
+        else:
+            shared[key] = current
+        # node is kept alive with its result, so its id is not reused by
+        # temporary nodes of rewrites
+        memo[id(node)] = (node, current)
+        return current
+
+    return visit(query), applied
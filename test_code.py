@@ -4,6 +4,9 @@
 """
 ./test_code.py --fast; red_green_bar.py $? $COLUMNS
 red_green_bar.py is taken from https://github.com/kwadrat/rgb_tdd.git
+
+./test_code.py --setscale 50 --jobs 8
+runs parameter-matrix tests on a pool of 8 processes
 """
 
 import sys
@@ -18,6 +21,18 @@ from pathlib import Path
 from test_eisenstein import TestEisensteinNumbers
 from test_eisenstein_fractions import TestEisensteinFractionNumbers
 from test_eisenstein_operations import TestEisensteinFractionTimeSeriesOperations
+from test_eisenstein_streams import TestEisensteinFractionStreams
+from test_eisenstein_async import TestEisensteinAsyncStreams
+from test_eisenstein_schedule import TestEisensteinHashSchedule
+from test_operations import TestOperations
+from test_operations_array import TestOperationsArray
+from test_eisenstein_cache import TestEisensteinDeltaCache
+from test_eisenstein_array import TestEisensteinArray
+from test_eisenstein_fractions_array import TestEisensteinFractionArray
+from test_eisenstein_storage import TestEisensteinSeriesStorage
+from test_query import TestQueryCompiler, TestQuerySimplifier
+from test_fuzz import TestDifferentialFuzz
+from test_incremental import TestIncrementalOperators
 import parameters
 
 
@@ -31,10 +46,28 @@ def runningInTravis():
     return False
 
 
-fast_test_ls = [TestEisensteinNumbers, TestEisensteinFractionNumbers]
+fast_test_ls = [
+    TestEisensteinNumbers,
+    TestEisensteinFractionNumbers,
+    TestOperations,
+    TestOperationsArray,
+    TestEisensteinDeltaCache,
+    TestEisensteinArray,
+    TestEisensteinFractionArray,
+    TestEisensteinSeriesStorage,
+    TestQueryCompiler,
+    TestIncrementalOperators,
+]
 
 
-slow_test_ls = [TestEisensteinFractionTimeSeriesOperations]
+slow_test_ls = [
+    TestEisensteinFractionTimeSeriesOperations,
+    TestEisensteinFractionStreams,
+    TestEisensteinAsyncStreams,
+    TestEisensteinHashSchedule,
+    TestDifferentialFuzz,
+    TestQuerySimplifier,
+]
 
 
 def add_all_fast(suite):
@@ -67,10 +100,15 @@ def perform_tests():
 
 if __name__ == "__main__":
     result = 1  # assuming failure of test script
-    if len(sys.argv) >= 2 and sys.argv[1] == "--fast":
+    args = sys.argv[1:]
+    if len(args) >= 2 and args[-2] == "--jobs":
+        # Parameter-matrix tests are split into units run by N processes
+        parameters.cfg_prm.set_jobs(int(args[-1]))
+        args = args[:-2]
+    if len(args) >= 1 and args[0] == "--fast":
         result = perform_only_fast_tests()
-    elif len(sys.argv) >= 3 and sys.argv[1] == "--setscale":
-        TestRange = int(sys.argv[2])
+    elif len(args) >= 2 and args[0] == "--setscale":
+        TestRange = int(args[1])
         parameters.cfg_prm.set_range(TestRange)
         result = perform_tests()
     elif runningInTravis():
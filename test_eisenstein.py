@@ -8,8 +8,10 @@ if sys.version_info[0] < 3:
     sys.exit(1)
 
 import unittest
+from decimal import Decimal, localcontext
+from fractions import Fraction
 
-from eisenstein import Eisenstein, gcd
+from eisenstein import Eisenstein, gcd, floor_root, ceil_root, _newton_isqrt
 
 
 class TestEisensteinNumbers(unittest.TestCase):
@@ -144,6 +146,57 @@ class TestEisensteinNumbers(unittest.TestCase):
         b = Eisenstein(4, 2)
         self.assertEqual(gcd(a, b), Eisenstein(2, 1))
 
+    def test_gcd_orthogonal(self):
+        # 2 and 1+2w = sqrt(-3) are orthogonal and coprime
+        self.assertEqual(gcd(Eisenstein(2, 0), Eisenstein(1, 2)).get_norm, 1)
+
+    def test_modulo_big_coefficients(self):
+        # Beyond 2^52 float rounding of complex form gives wrong quotients
+        a = Eisenstein(3 ** 200 + 7, -(5 ** 150) + 1)
+        b = Eisenstein(2 ** 90 + 3, 11 ** 20)
+        r = a % b
+        self.assertLess(r.get_norm, b.get_norm)
+        self.assertEqual((a - r) % b, Eisenstein(0, 0))
+
+    def test_gcd_big_coefficients(self):
+        g = Eisenstein(2 ** 127 - 1, 3 ** 70)
+        a = g * Eisenstein(7 ** 60 + 2, 5)
+        b = g * Eisenstein(3, 13 ** 40)
+        d = gcd(a, b)
+        self.assertEqual(a % d, Eisenstein(0, 0))
+        self.assertEqual(b % d, Eisenstein(0, 0))
+        self.assertEqual(d % g, Eisenstein(0, 0))
+
+    def test_binary_gcd(self):
+        a = Eisenstein(2, 1)
+        b = Eisenstein(4, 2)
+        self.assertEqual(gcd(a, b, engine="binary").get_norm, a.get_norm)
+        self.assertEqual(gcd(Eisenstein(0), b, engine="binary"), b)
+        # 3 = -w^2 (1 - w)^2 - common lambda factors are restored
+        d = gcd(Eisenstein(3, 0), Eisenstein(6, 3), engine="binary")
+        self.assertEqual(d.get_norm, 9)
+        self.assertRaises(ValueError, gcd, a, b, "unknown")
+
+    def test_binary_gcd_cross_check(self):
+        """
+        Both engines give the same gcd up to a unit (associates divide each other)
+        """
+        import random
+
+        rnd = random.Random(2020)
+        for bits in (4, 16, 64, 256):
+            for _ in range(50):
+                g, u, v = [
+                    Eisenstein(rnd.getrandbits(bits), -rnd.getrandbits(bits))
+                    for _ in range(3)
+                ]
+                x = g * u
+                y = g * v
+                euclid = gcd(x, y)
+                binary = gcd(x, y, engine="binary")
+                self.assertEqual(euclid % binary, Eisenstein(0), (x, y))
+                self.assertEqual(binary % euclid, Eisenstein(0), (x, y))
+
     def test_presentation(self):
         a = Eisenstein(2, 2)
         self.assertEqual(str(a), "Eisenstein(2, 2)")
@@ -192,3 +245,59 @@ class TestEisensteinNumbers(unittest.TestCase):
         e, f = d.div_mod(a)
         self.assertEqual(e, Eisenstein(3, 1))
         self.assertEqual(f, Eisenstein(7, 2))
+
+    def test_immutable(self):
+        a = Eisenstein(2, 3)
+        with self.assertRaises(AttributeError):
+            a.co_real = 5
+        with self.assertRaises(AttributeError):
+            a.extra = 1
+        self.assertFalse(hasattr(a, "__dict__"))
+        self.assertEqual(a, Eisenstein(2, 3))
+
+    def test_hash(self):
+        self.assertEqual(hash(Eisenstein(2, 3)), hash(Eisenstein(2, 3)))
+        self.assertEqual(hash(Eisenstein(5)), hash(5))
+        keys = {Eisenstein(1, 2): "a", Eisenstein(2, 1): "b"}
+        self.assertEqual(keys[Eisenstein(1, 2)], "a")
+        self.assertEqual(keys[Eisenstein(2, 1)], "b")
+        self.assertEqual(len({Eisenstein(1, 1), Eisenstein(1, 1), 1}), 2)
+
+    def test_pickle(self):
+        import pickle
+
+        a = Eisenstein(7, -4)
+        self.assertEqual(pickle.loads(pickle.dumps(a)), a)
+
+    def test_newton_isqrt(self):
+        # Fallback of math.isqrt for Python 3.7
+        for n in list(range(200)) + [2 ** 64 - 1, 2 ** 64, 10 ** 40 + 3, 3 ** 300]:
+            root = _newton_isqrt(n)
+            self.assertLessEqual(root * root, n)
+            self.assertLess(n, (root + 1) * (root + 1))
+        for k in (1, 2 ** 31, 10 ** 25):
+            self.assertEqual(_newton_isqrt(k * k), k)
+            self.assertEqual(_newton_isqrt(k * k - 1), k - 1)
+        with self.assertRaises(ValueError):
+            _newton_isqrt(-1)
+
+    def test_floor_ceil_root(self):
+        # int(abs()) and ceil(abs()) of exact values, also perfect squares
+        self.assertEqual(floor_root(Eisenstein(1, 1).get_norm), 1)
+        self.assertEqual(ceil_root(Eisenstein(1, 1).get_norm), 1)
+        self.assertEqual(floor_root(Eisenstein(2, 1).get_norm), 1)
+        self.assertEqual(ceil_root(Eisenstein(2, 1).get_norm), 2)
+        self.assertEqual(floor_root(Fraction(9, 4), 4), 6)
+        self.assertEqual(ceil_root(Fraction(9, 4), 4), 6)
+        self.assertEqual(floor_root(Fraction(1, 3), 0), 0)
+        self.assertEqual(ceil_root(Fraction(1, 3), 0), 0)
+
+        # Far indexes where float abs() is off - compare with 80 digit sqrt
+        with localcontext() as ctx:
+            ctx.prec = 80
+            for norm in (Fraction(2), Fraction(1, 3), Fraction(7, 13)):
+                root = (Decimal(norm.numerator) / Decimal(norm.denominator)).sqrt()
+                for i in (10 ** 17 + 1, 3 ** 40, 10 ** 30 + 7):
+                    exact = root * i
+                    self.assertEqual(floor_root(norm, i), int(exact))
+                    self.assertEqual(ceil_root(norm, i), int(exact) + 1)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+import unittest
+import random
+
+from eisenstein import Eisenstein, get_dot_product
+from eisenstein_array import EisensteinArray, np
+import eisenstein_array
+
+
+def random_list(rnd, count, bits):
+    limit = 2 ** bits
+    return [
+        Eisenstein(rnd.randint(-limit, limit), rnd.randint(-limit, limit))
+        for _ in range(count)
+    ]
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestEisensteinArray(unittest.TestCase):
+    def check_ring(self, xs, ys):
+        a = EisensteinArray.from_list(xs)
+        b = EisensteinArray.from_list(ys)
+        self.assertEqual((a + b).tolist(), [x + y for x, y in zip(xs, ys)])
+        self.assertEqual((a - b).tolist(), [x - y for x, y in zip(xs, ys)])
+        self.assertEqual((a * b).tolist(), [x * y for x, y in zip(xs, ys)])
+        self.assertEqual((a // b).tolist(), [x // y for x, y in zip(xs, ys)])
+        self.assertEqual((a % b).tolist(), [x % y for x, y in zip(xs, ys)])
+        q, r = a.div_mod(b)
+        expected = [x.div_mod(y) for x, y in zip(xs, ys)]
+        self.assertEqual(q.tolist(), [e[0] for e in expected])
+        self.assertEqual(r.tolist(), [e[1] for e in expected])
+        self.assertEqual(a.get_norm.tolist(), [x.get_norm for x in xs])
+        self.assertEqual(abs(a).tolist(), [abs(x) for x in xs])
+        self.assertEqual(
+            eisenstein_array.get_dot_product(a, b).tolist(),
+            [get_dot_product(x, y) for x, y in zip(xs, ys)],
+        )
+
+    def test_ring_int64(self):
+        rnd = random.Random(7)
+        xs = random_list(rnd, 500, 20)
+        ys = [y if y != 0 else Eisenstein(1) for y in random_list(rnd, 500, 12)]
+        self.assertEqual(EisensteinArray.from_list(xs).co_real.dtype, np.int64)
+        self.check_ring(xs, ys)
+
+    def test_ring_bigint(self):
+        rnd = random.Random(8)
+        xs = random_list(rnd, 100, 100)
+        ys = [y if y != 0 else Eisenstein(1) for y in random_list(rnd, 100, 40)]
+        self.assertEqual(EisensteinArray.from_list(xs).co_real.dtype, object)
+        # abs() of big values goes through float like the scalar one
+        a = EisensteinArray.from_list(xs)
+        b = EisensteinArray.from_list(ys)
+        self.assertEqual((a * b % b).tolist(), [x * y % y for x, y in zip(xs, ys)])
+        self.assertEqual((a // b).tolist(), [x // y for x, y in zip(xs, ys)])
+
+    def test_int64_promotion(self):
+        big = 2 ** 29 + 1
+        a = EisensteinArray([big, 1], [big, 2])
+        self.assertEqual(a.co_real.dtype, np.int64)
+        c = a * a * a
+        self.assertEqual(c.co_real.dtype, object)
+        x = Eisenstein(big, big)
+        self.assertEqual(c[0], x * x * x)
+
+    def test_broadcasting(self):
+        xs = [Eisenstein(1, 2), Eisenstein(-3, 4), Eisenstein(5, 0)]
+        a = EisensteinArray.from_list(xs)
+        s = Eisenstein(2, 1)
+        self.assertEqual((a + s).tolist(), [x + s for x in xs])
+        self.assertEqual((s + a).tolist(), [s + x for x in xs])
+        self.assertEqual((s - a).tolist(), [s - x for x in xs])
+        self.assertEqual((a * 3).tolist(), [x * 3 for x in xs])
+        self.assertEqual((a % s).tolist(), [x % s for x in xs])
+        self.assertEqual((a // 2).tolist(), [x // 2 for x in xs])
+        self.assertEqual((s // a).tolist(), [s // x for x in xs])
+        self.assertEqual((s % a).tolist(), [s % x for x in xs])
+        self.assertEqual((7 // a).tolist(), [Eisenstein(7) // x for x in xs])
+        self.assertEqual((7 % a).tolist(), [Eisenstein(7) % x for x in xs])
+        self.assertEqual((a == Eisenstein(5)).tolist(), [False, False, True])
+        self.assertEqual(a[1], Eisenstein(-3, 4))
+        self.assertEqual(a[1:].tolist(), xs[1:])
+        huge = Eisenstein(2 ** 80, 1)
+        self.assertEqual((a * huge).tolist(), [x * huge for x in xs])
+        self.assertEqual((huge % a).tolist(), [huge % x for x in xs])
+        self.assertRaises(ZeroDivisionError, lambda: a % 0)
+
+    def test_complex_conversion(self):
+        xs = random_list(random.Random(9), 200, 16)
+        a = EisensteinArray.from_list(xs)
+        self.assertEqual(a.get_complex_form.tolist(), [x.get_complex_form for x in xs])
+        self.assertEqual(EisensteinArray.from_complex(a.get_complex_form).tolist(), xs)
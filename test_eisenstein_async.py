@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+import asyncio
+import unittest
+from itertools import count, islice
+
+import data_sets
+
+from eisenstein_fractions import EisensteinFraction
+from eisenstein import get_dot_product
+from eisenstein_operations import (
+    hash_Eisenstein_Fraction,
+    add_Eisenstein_Fraction,
+    diff_Eisenstein_Fraction,
+    dehashodd_Eisenstein_Fraction,
+    dehasheven_Eisenstein_Fraction,
+)
+from eisenstein_schedule import compile_hash_schedule
+from eisenstein_async import (
+    Feed,
+    QueueFeed,
+    from_iterable,
+    buffered,
+    collect,
+    ahash_Eisenstein_Fraction,
+    aadd_Eisenstein_Fraction,
+    adiff_Eisenstein_Fraction,
+    adehashodd_Eisenstein_Fraction,
+    adehasheven_Eisenstein_Fraction,
+)
+from test_eisenstein_streams import delta_matrix
+
+
+class _Counted:
+    # Async iterable that counts samples taken from it
+    def __init__(self, samples):
+        self.samples = samples
+        self.taken = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.taken == len(self.samples):
+            raise StopAsyncIteration
+        self.taken += 1
+        return self.samples[self.taken - 1]
+
+
+class TestEisensteinAsyncStreams(unittest.TestCase):
+    def test_hash_add_diff_matrix(self):
+        async def check():
+            for deltaA, deltaB in delta_matrix():
+                A = from_iterable(data_sets.A, deltaA)
+                B = from_iterable(data_sets.B, deltaB)
+                add_result, add_delta = add_Eisenstein_Fraction(
+                    data_sets.A, deltaA, data_sets.B, deltaB
+                )
+                feed = aadd_Eisenstein_Fraction(A, B)
+                self.assertEqual(feed.delta, add_delta)
+                self.assertEqual(
+                    await collect(feed), add_result, (deltaA, deltaB)
+                )
+
+                for first, second in ((deltaA, deltaB), (deltaB, deltaA)):
+                    expected, expected_delta = diff_Eisenstein_Fraction(
+                        add_result, first, second
+                    )
+                    feed = adiff_Eisenstein_Fraction(
+                        from_iterable(add_result, add_delta), first, second
+                    )
+                    self.assertEqual(feed.delta, expected_delta)
+                    self.assertEqual(await collect(feed), expected)
+
+                if get_dot_product(deltaA, deltaB) <= 0:
+                    continue
+                expected, delta_hash = hash_Eisenstein_Fraction(
+                    data_sets.A, deltaA, data_sets.B, deltaB
+                )
+                feed = ahash_Eisenstein_Fraction(
+                    from_iterable(data_sets.A, deltaA),
+                    from_iterable(data_sets.B, deltaB),
+                )
+                self.assertEqual(feed.delta, delta_hash)
+                self.assertEqual(
+                    await collect(feed), expected, (deltaA, deltaB)
+                )
+
+                C = from_iterable(expected, delta_hash)
+                even, even_delta = dehasheven_Eisenstein_Fraction(
+                    expected, delta_hash, deltaA
+                )
+                feed = adehasheven_Eisenstein_Fraction(C, deltaA)
+                self.assertEqual(feed.delta, even_delta)
+                self.assertEqual(await collect(feed), even)
+
+                C = from_iterable(expected, delta_hash)
+                odd, odd_delta = dehashodd_Eisenstein_Fraction(
+                    expected, delta_hash, deltaB
+                )
+                feed = adehashodd_Eisenstein_Fraction(C, deltaB)
+                self.assertEqual(feed.delta, odd_delta)
+                self.assertEqual(await collect(feed), odd)
+
+        asyncio.run(check())
+
+    def test_awaits_only_needed_samples(self):
+        deltaA = EisensteinFraction(2, 1)
+        deltaB = EisensteinFraction(3, 0)
+        A = _Counted(list(range(100)))
+        B = _Counted([chr(ord("a") + i % 26) for i in range(100)])
+        feed = ahash_Eisenstein_Fraction(Feed(A, deltaA), Feed(B, deltaB))
+        result = asyncio.run(collect(feed, 25))
+
+        sources = list(islice(compile_hash_schedule(deltaA, deltaB).sources(), 25))
+        self.assertEqual(A.taken, sum(1 for from_a, _ in sources if from_a))
+        self.assertEqual(B.taken, 25 - A.taken)
+        self.assertEqual(A.taken + B.taken, len(result))
+
+    def test_backpressure(self):
+        deltaA = EisensteinFraction(1, 0)
+        deltaB = EisensteinFraction(1, 0)
+
+        async def produce(feed, samples, pause, high):
+            for sample in samples:
+                await feed.put(sample)
+                high[0] = max(high[0], feed.qsize())
+                await asyncio.sleep(pause)
+            await feed.close()
+
+        async def check():
+            a = QueueFeed(deltaA, maxsize=4)
+            b = QueueFeed(deltaB, maxsize=4)
+            high_a = [0]
+            high_b = [0]
+            # a produces much faster than b, hash needs both equally
+            tasks = [
+                asyncio.ensure_future(produce(a, range(50), 0, high_a)),
+                asyncio.ensure_future(produce(b, "x" * 50, 0.001, high_b)),
+            ]
+            result = await collect(ahash_Eisenstein_Fraction(a, b))
+            await asyncio.gather(*tasks)
+            return result, high_a[0], high_b[0]
+
+        result, high_a, high_b = asyncio.run(check())
+        expected, _ = hash_Eisenstein_Fraction(
+            list(range(50)), deltaA, "x" * 50, deltaB
+        )
+        self.assertEqual(result[: len(expected)], expected)
+        self.assertEqual(len(result), 100)
+        self.assertLessEqual(high_a, 4)
+        self.assertLessEqual(high_b, 4)
+
+    def test_buffered_pipeline(self):
+        deltaA = EisensteinFraction(2, 1)
+        deltaB = EisensteinFraction(3, 0)
+
+        async def numbers():
+            for i in count(1):
+                yield i
+
+        async def letters():
+            for i in count():
+                yield chr(ord("a") + i % 26)
+
+        async def check():
+            A = buffered(Feed(numbers(), deltaA), maxsize=8)
+            B = buffered(Feed(letters(), deltaB), maxsize=8)
+            hashed = buffered(ahash_Eisenstein_Fraction(A, B), maxsize=8)
+            numbers_back = adehasheven_Eisenstein_Fraction(hashed, deltaA)
+            result = await collect(numbers_back, 500)
+            for feed in (hashed, A, B):
+                await feed.aclose()
+            return result
+
+        self.assertEqual(asyncio.run(check()), list(range(1, 501)))
+
+    def test_buffered_inputs_closed(self):
+        # Operator that ends on one short input cancels pump of the other
+        async def check():
+            for deltaA, deltaB in delta_matrix():
+                for length_a, length_b in ((3, 1000), (1000, 3)):
+                    A = buffered(from_iterable(range(length_a), deltaA), 4)
+                    B = buffered(from_iterable(range(length_b), deltaB), 4)
+                    await collect(aadd_Eisenstein_Fraction(A, B))
+                    if get_dot_product(deltaA, deltaB) > 0:
+                        A = buffered(from_iterable(range(length_a), deltaA), 4)
+                        B = buffered(from_iterable(range(length_b), deltaB), 4)
+                        await collect(ahash_Eisenstein_Fraction(A, B))
+                    C = buffered(from_iterable(range(1000), deltaA), 4)
+                    feed = adiff_Eisenstein_Fraction(C, deltaA, deltaB)
+                    await collect(feed, 2)
+                    # consumer that stops early closes the operator feed
+                    await feed.aclose()
+            return [x for x in asyncio.all_tasks() if x is not asyncio.current_task()]
+
+        self.assertEqual(asyncio.run(check()), [])
+
+    def test_buffered_error(self):
+        async def failing():
+            yield 1
+            raise ValueError("feed broken")
+
+        async def check():
+            feed = buffered(Feed(failing(), EisensteinFraction(1, 0)))
+            return await collect(feed)
+
+        with self.assertRaises(ValueError):
+            asyncio.run(check())
+
+    def test_short_input(self):
+        deltaA = EisensteinFraction(1, 0)
+        deltaB = EisensteinFraction(1, 0)
+        feed = ahash_Eisenstein_Fraction(
+            from_iterable([1, 2], deltaA), from_iterable("abc", deltaB)
+        )
+        self.assertEqual(asyncio.run(collect(feed)), ["a", 1, "b", 2, "c"])
+        self.assertEqual(feed.delta, EisensteinFraction(four=(1, 2, 0, 1)))
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+import unittest
+
+import data_sets
+import parameters
+
+from eisenstein_fractions import EisensteinFraction
+from eisenstein_cache import delta_cache, memoize_deltas
+from eisenstein_schedule import compile_hash_schedule
+from eisenstein_operations import (
+    add_deltas,
+    hash_Eisenstein_Fraction,
+    dehasheven_Eisenstein_Fraction,
+)
+
+
+class TestEisensteinDeltaCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_size = parameters.cfg_prm.cache_size
+        delta_cache.clear()
+
+    def tearDown(self):
+        parameters.cfg_prm.set_cache_size(self.cache_size)
+        delta_cache.clear()
+
+    def test_hit_miss(self):
+        deltaA = EisensteinFraction(2, 1)
+        deltaB = EisensteinFraction(3, 0)
+        first = compile_hash_schedule(deltaA, deltaB)
+        second = compile_hash_schedule(EisensteinFraction(2, 1), deltaB)
+        self.assertIs(first, second)
+        self.assertEqual(delta_cache.hits, 1)
+        self.assertEqual(delta_cache.misses, 1)
+
+        # Same pair under another function is another entry
+        add_deltas(deltaA, deltaB)
+        self.assertEqual(delta_cache.misses, 2)
+        self.assertEqual(delta_cache.stats()["size"], 2)
+
+    def test_eviction(self):
+        parameters.cfg_prm.set_cache_size(2)
+        calls = []
+
+        @memoize_deltas
+        def derived(x, y):
+            calls.append((x, y))
+            return x + y
+
+        derived(EisensteinFraction(1), EisensteinFraction(1))
+        derived(EisensteinFraction(2), EisensteinFraction(1))
+        derived(EisensteinFraction(1), EisensteinFraction(1))  # refresh
+        derived(EisensteinFraction(3), EisensteinFraction(1))  # evicts (2, 1)
+        self.assertEqual(delta_cache.evictions, 1)
+        derived(EisensteinFraction(1), EisensteinFraction(1))
+        self.assertEqual(len(calls), 3)
+        derived(EisensteinFraction(2), EisensteinFraction(1))
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(
+            delta_cache.stats(),
+            {"hits": 2, "misses": 4, "evictions": 2, "size": 2, "maxsize": 2},
+        )
+
+    def test_disabled(self):
+        parameters.cfg_prm.set_cache_size(0)
+        deltaA = EisensteinFraction(2, 1)
+        deltaB = EisensteinFraction(3, 0)
+        expected = hash_Eisenstein_Fraction(data_sets.A, deltaA, data_sets.B, deltaB)
+        self.assertEqual(delta_cache.stats()["size"], 0)
+
+        parameters.cfg_prm.set_cache_size(16)
+        for _ in range(3):
+            result = hash_Eisenstein_Fraction(data_sets.A, deltaA, data_sets.B, deltaB)
+            self.assertEqual(result, expected)
+        self.assertEqual(delta_cache.hits, 2)
+
+    def test_failed_precondition_not_cached(self):
+        deltaC = EisensteinFraction(2)
+        deltaA = EisensteinFraction(1)
+        for _ in range(2):
+            self.assertRaises(
+                AssertionError, dehasheven_Eisenstein_Fraction, [], deltaC, deltaA
+            )
+        self.assertEqual(delta_cache.stats()["size"], 0)
+        self.assertEqual(delta_cache.misses, 2)
@@ -11,7 +11,7 @@ import unittest
 
 from fractions import Fraction
 from eisenstein import Eisenstein
-from eisenstein_fractions import EisensteinFraction
+from eisenstein_fractions import EisensteinFraction, NormalizedEisensteinFraction
 
 
 class TestEisensteinFractionNumbers(unittest.TestCase):
@@ -191,6 +191,17 @@ class TestEisensteinFractionNumbers(unittest.TestCase):
         a = EisensteinFraction(4, 5)
         self.assertAlmostEqual(abs(a.get_complex_form), abs(a), 10)
 
+        # Fraction coefficients - the formula of Eisenstein.__abs__ is used
+        for four in (
+            (1, 2, 1, 3),
+            (-7, 3, 5, 4),
+            (22, 7, -1, 9),
+            (10 ** 9 + 7, 3, 1, 2),
+        ):
+            a = EisensteinFraction(four=four)
+            self.assertEqual(abs(a), Eisenstein.__abs__(a))
+            self.assertAlmostEqual(abs(a) ** 2 / float(a.get_norm), 1, 12)
+
     def test_four_parts(self):
         obj = EisensteinFraction(four=(1, 2, 3, 4))
         self.assertEqual(str(obj), "EisensteinFraction(four=(1, 2, 3, 4))")
@@ -296,3 +307,75 @@ class TestEisensteinFractionNumbers(unittest.TestCase):
         self.assertEqual(a, True)
         b = EisensteinFraction(four=(1, 1, 0, 1)) == 1
         self.assertEqual(b, True)
+
+    def test_immutable(self):
+        a = EisensteinFraction(four=(1, 2, 3, 4))
+        with self.assertRaises(AttributeError):
+            a.co_omega = Fraction(1)
+        self.assertFalse(hasattr(a, "__dict__"))
+
+    def test_hash(self):
+        a = EisensteinFraction(four=(2, 4, 2, 3))
+        b = EisensteinFraction(four=(1, 2, 6, 9))
+        self.assertEqual(hash(a), hash(b))
+        # Equal values of both types are one key
+        self.assertEqual(hash(EisensteinFraction(1, 2)), hash(Eisenstein(1, 2)))
+        self.assertEqual(hash(EisensteinFraction(3)), hash(3))
+        deltas = {EisensteinFraction(1, 2): "x"}
+        self.assertEqual(deltas[Eisenstein(1, 2)], "x")
+
+    def test_pickle(self):
+        import pickle
+
+        a = EisensteinFraction(four=(5, 6, 7, 11))
+        b = pickle.loads(pickle.dumps(a))
+        self.assertEqual(a, b)
+        self.assertIsInstance(b, EisensteinFraction)
+
+    def test_normalized_arithmetic(self):
+        values = [
+            (1, 2, 3, 4),
+            (7, 11, 13, 17),
+            (-3, 4, 1, 2),
+            (5, 1, 0, 1),
+            (0, 1, -2, 3),
+        ]
+        for x in values:
+            for y in values:
+                a = EisensteinFraction(four=x)
+                b = EisensteinFraction(four=y)
+                c = NormalizedEisensteinFraction(four=x)
+                d = NormalizedEisensteinFraction(four=y)
+                self.assertEqual(c + d, a + b)
+                self.assertEqual(c - d, a - b)
+                self.assertEqual(c * d, a * b)
+                self.assertEqual(c / d, a / b)
+                self.assertEqual(str(c * d), str(a * b))
+                self.assertEqual(hash(c / d), hash(a / b))
+                self.assertEqual(2 * c + 1, 2 * a + 1)
+                self.assertEqual(c / 3, a / 3)
+
+    def test_normalized_api(self):
+        a = NormalizedEisensteinFraction(four=(2, 4, 2, 3))
+        self.assertEqual((a.num_real, a.num_omega, a.den), (3, 4, 6))
+        self.assertEqual(a.co_real, Fraction(1, 2))
+        self.assertEqual(a.co_omega, Fraction(2, 3))
+        self.assertEqual(str(a), "EisensteinFraction(four=(1, 2, 2, 3))")
+        self.assertEqual(a.floor, Eisenstein(0, 0))
+        self.assertEqual(a.ceil, Eisenstein(1, 1))
+        self.assertEqual(a.round, Eisenstein(0, 1))
+        self.assertEqual(a.get_norm, EisensteinFraction(four=(1, 2, 2, 3)).get_norm)
+        b = NormalizedEisensteinFraction(Eisenstein(2, 3))
+        self.assertEqual(b, Eisenstein(2, 3))
+        self.assertRaises(TypeError, NormalizedEisensteinFraction)
+        with self.assertRaises(AttributeError):
+            a.den = 1
+
+    def test_normalized_deferred_reduction(self):
+        a = NormalizedEisensteinFraction(four=(1, 2, 1, 2))
+        b = a + a
+        # Not reduced while denominator is small
+        self.assertEqual((b.num_real, b.num_omega, b.den), (2, 2, 2))
+        c = b.reduced()
+        self.assertEqual((c.num_real, c.num_omega, c.den), (1, 1, 1))
+        self.assertEqual(b, c)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+import unittest
+import random
+from fractions import Fraction
+
+from eisenstein import Eisenstein
+from eisenstein_fractions import EisensteinFraction
+from eisenstein_fractions_array import EisensteinFractionArray, np
+
+
+def random_list(rnd, count, bits):
+    limit = 2 ** bits
+    return [
+        EisensteinFraction(
+            four=(
+                rnd.randint(-limit, limit),
+                rnd.randint(1, limit),
+                rnd.randint(-limit, limit),
+                rnd.randint(1, limit),
+            )
+        )
+        for _ in range(count)
+    ]
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestEisensteinFractionArray(unittest.TestCase):
+    def check_field(self, xs, ys):
+        a = EisensteinFractionArray.from_list(xs)
+        b = EisensteinFractionArray.from_list(ys)
+        self.assertEqual((a + b).tolist(), [x + y for x, y in zip(xs, ys)])
+        self.assertEqual((a - b).tolist(), [x - y for x, y in zip(xs, ys)])
+        self.assertEqual((a * b).tolist(), [x * y for x, y in zip(xs, ys)])
+        self.assertEqual((a / b).tolist(), [x / y for x, y in zip(xs, ys)])
+        num, den = a.get_norm
+        self.assertEqual(
+            [Fraction(int(n), int(d)) for n, d in zip(num, den)],
+            [x.get_norm for x in xs],
+        )
+        for name in ("floor", "ceil", "round", "round2", "floor2", "ceil2"):
+            self.assertEqual(
+                getattr(a, name).tolist(), [getattr(x, name) for x in xs], name
+            )
+
+    def test_field_int64(self):
+        rnd = random.Random(11)
+        xs = random_list(rnd, 300, 6)
+        ys = [y if y != 0 else EisensteinFraction(1) for y in random_list(rnd, 300, 6)]
+        self.assertEqual(EisensteinFractionArray.from_list(xs).real_num.dtype, np.int64)
+        self.check_field(xs, ys)
+
+    def test_overflow_fallback(self):
+        rnd = random.Random(12)
+        # products of 24-bit fractions leave int64 safe range
+        xs = random_list(rnd, 100, 24)
+        ys = [y if y != 0 else EisensteinFraction(1) for y in random_list(rnd, 100, 24)]
+        self.check_field(xs, ys)
+        xs = random_list(rnd, 20, 80)
+        ys = [y if y != 0 else EisensteinFraction(1) for y in random_list(rnd, 20, 80)]
+        self.assertEqual(EisensteinFractionArray.from_list(xs).real_num.dtype, object)
+        self.check_field(xs, ys)
+
+    def test_broadcasting(self):
+        xs = random_list(random.Random(13), 50, 5)
+        a = EisensteinFractionArray.from_list(xs)
+        for s in (
+            EisensteinFraction(four=(1, 2, 3, 4)),
+            Eisenstein(2, 1),
+            Fraction(5, 3),
+            3,
+        ):
+            self.assertEqual((a + s).tolist(), [x + s for x in xs])
+            self.assertEqual((a * s).tolist(), [x * s for x in xs])
+            self.assertEqual((s * a).tolist(), [x * s for x in xs])
+            self.assertEqual((a / s).tolist(), [x / s for x in xs])
+            self.assertEqual((a - s).tolist(), [x - s for x in xs])
+        self.assertEqual(a[3], xs[3])
+        self.assertEqual(a[2:5].tolist(), xs[2:5])
+        self.assertEqual((a == xs[0]).tolist(), [x == xs[0] for x in xs])
+        zero = EisensteinFractionArray.from_list([0])
+        self.assertRaises(ZeroDivisionError, lambda: a / zero)
@@ -2,23 +2,46 @@
 # -*- coding: UTF-8 -*-
 
 import sys
+import math
 
 if sys.version_info[0] < 3:
     print("You need Python 3 to run this script.")
     sys.exit(1)
 
 import unittest
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+
 import data_sets
 import parameters
 
 from eisenstein_fractions import EisensteinFraction
-from eisenstein import get_dot_product
+from eisenstein_schedule import compile_hash_schedule
+from eisenstein import get_dot_product, floor_root, ceil_root
 from eisenstein_operations import (
+    add_deltas,
+    diff_deltas,
+    dehasheven_deltas,
+    dehashodd_deltas,
+    hash_length,
+    add_length,
+    diff_length,
+    dehasheven_length,
+    dehashodd_length,
+    dehasheven_index,
+    dehashodd_index,
+    dehasheven_slice,
+    dehashodd_slice,
     hash_Eisenstein_Fraction,
     add_Eisenstein_Fraction,
     diff_Eisenstein_Fraction,
     dehashodd_Eisenstein_Fraction,
     dehasheven_Eisenstein_Fraction,
+    interlace_length,
+    multiadd_length,
+    multiadd_Eisenstein_Fraction,
+    interlace_Eisenstein_Fraction,
+    deinterlace_Eisenstein_Fraction,
 )
 
 
@@ -101,6 +124,158 @@ def check_result_hash(Var: list):
                 raise SystemExit("This algorithm fails B")
 
 
+def check_hash_pair(deltaA, deltaB):
+    if get_dot_product(deltaA, deltaB) > 0:
+        hash_result, delta_hash = hash_Eisenstein_Fraction(
+            data_sets.A, deltaA, data_sets.B, deltaB
+        )
+        check_result_hash(hash_result)
+    # else: SKIP orthogonal
+
+
+def check_add_pair(deltaA, deltaB):
+    add_result, delta_add = add_Eisenstein_Fraction(
+        data_sets.A, deltaA, data_sets.B, deltaB
+    )
+    if check_result_add(add_result):
+        raise SystemExit("Add algorithm fails")
+    return add_result
+
+
+def check_add_diff_pair(deltaA, deltaB):
+    add_result = check_add_pair(deltaA, deltaB)
+
+    diff_result, delta_diff = diff_Eisenstein_Fraction(add_result, deltaA, deltaB)
+    if check_result_is_number_sequence(diff_result):
+        raise SystemExit(
+            "Diff algorithm fails\nargument: %s\nresult: %s" % (add_result, diff_result)
+        )
+
+    diff_result, delta_diff = diff_Eisenstein_Fraction(add_result, deltaB, deltaA)
+    if check_result_is_alpha_sequence(diff_result):
+        raise SystemExit(
+            "Diff algorithm fails\nargument: %s\nresult: %s" % (add_result, diff_result)
+        )
+
+
+def check_dehash_pair(deltaA, deltaB):
+    if get_dot_product(deltaA, deltaB) <= 0:
+        return
+    hash_result, delta_hash = hash_Eisenstein_Fraction(
+        data_sets.A, deltaA, data_sets.B, deltaB
+    )
+    # check_result_hash(hash_result) Already checked
+    dehashOdd_result, delta_dehashOdd = dehashodd_Eisenstein_Fraction(
+        hash_result, delta_hash, deltaB
+    )
+
+    assert delta_dehashOdd == deltaA
+
+    if not check_result_is_only_alpha_sequence(dehashOdd_result):
+        raise SystemExit(
+            "dehasodd_Eisenstein_Fraction algorithm fails\n"
+            "dot= %s a/b= %s b/a= %s\n* %s\n! %s\nhash: %s"
+            % (
+                get_dot_product(deltaA, deltaB),
+                deltaA / deltaB,
+                deltaB / deltaA,
+                dehashOdd_result,
+                data_sets.B[0 : len(dehashOdd_result)],
+                hash_result,
+            )
+        )
+
+    dehashEven_result, delta_dehashEven = dehasheven_Eisenstein_Fraction(
+        hash_result, delta_hash, deltaA
+    )
+    if not check_result_is_only_number_sequence(dehashEven_result):
+        raise SystemExit(
+            "dehasheven_Eisenstein_Fraction algorithm fails\n* %s\n! %s"
+            % (dehashEven_result, data_sets.A[0 : len(dehashEven_result)])
+        )
+
+
+def check_index_pair(deltaA, deltaB):
+    """
+    Exact indexes of operators are the same as former float formulas
+    int(abs(i * x)) and ceil(abs(i * x)) on indexes where floats are exact
+    """
+    deltas = [add_deltas(deltaA, deltaB)[1], diff_deltas(deltaA, deltaB)[1]]
+    if get_dot_product(deltaA, deltaB) > 0:
+        hash_delta = compile_hash_schedule(deltaA, deltaB).deltaC
+        deltas.append(dehasheven_deltas(hash_delta, deltaA)[1])
+        deltas.append(dehashodd_deltas(hash_delta, deltaB)[1])
+    for delta in deltas:
+        if delta is None:
+            continue
+        norm = delta.get_norm
+        for i in range(160):
+            di = i * delta
+            if floor_root(norm, i) != int(abs(di)):
+                raise SystemExit("floor_root fails for %s * %s" % (i, delta))
+            if ceil_root(norm, i) != int(math.ceil(abs(di))):
+                raise SystemExit("ceil_root fails for %s * %s" % (i, delta))
+
+
+# Checks of one (deltaA, deltaB) pair run by the matrix tests
+MATRIX_CHECKS = {
+    "hash": check_hash_pair,
+    "add": check_add_pair,
+    "add_diff": check_add_diff_pair,
+    "dehash": check_dehash_pair,
+    "index": check_index_pair,
+}
+
+
+def matrix_units(check: str, test_range: int):
+    """
+    Split test_range^4 delta grid into independent work units,
+    one unit per (l, k) - omega coefficients of deltaA and deltaB
+    """
+    return [
+        (check, test_range, l, k) for l in range(test_range) for k in range(test_range)
+    ]
+
+
+def run_matrix_unit(unit):
+    """
+    Check all pairs of one work unit in fixed order.
+    :return: None or description of first failing (deltaA, deltaB) pair
+    """
+    (check, test_range, l, k) = unit
+    function = MATRIX_CHECKS[check]
+    for j in range(test_range):
+        for i in range(test_range):
+            deltaA = EisensteinFraction(i + 1, l)
+            deltaB = EisensteinFraction(j + 1, k)
+            try:
+                function(deltaA, deltaB)
+            except (Exception, SystemExit) as error:
+                return "%s matrix fails for deltaA=%s deltaB=%s: %s: %s" % (
+                    check,
+                    deltaA,
+                    deltaB,
+                    type(error).__name__,
+                    error,
+                )
+    return None
+
+
+def run_matrix(check: str, jobs: int = 1) -> list:
+    """
+    Run all work units of check, on a pool of jobs processes if jobs > 1.
+    Results keep unit order, so reported failures do not depend on jobs.
+    :return: list of failure descriptions
+    """
+    units = matrix_units(check, parameters.cfg_prm.test_range)
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(run_matrix_unit, units))
+    else:
+        results = [run_matrix_unit(unit) for unit in units]
+    return [failure for failure in results if failure is not None]
+
+
 class TestEisensteinFractionTimeSeriesOperations(unittest.TestCase):
     def test_hash_one(self):
         deltaA = EisensteinFraction(1, 0)
@@ -113,39 +288,15 @@ class TestEisensteinFractionTimeSeriesOperations(unittest.TestCase):
         else:
             SystemExit("dot product =< 0")
 
+    def check_matrix(self, check: str):
+        failures = run_matrix(check, parameters.cfg_prm.jobs)
+        self.assertFalse(failures, "\n".join(failures))
+
     def test_hash_matrix(self):
-        TestRange = parameters.cfg_prm.test_range
-
-        for l in range(TestRange):
-            for k in range(TestRange):
-                for j in range(TestRange):
-                    for i in range(TestRange):
-                        deltaA = EisensteinFraction(i + 1, l)
-                        deltaB = EisensteinFraction(j + 1, k)
-                        if get_dot_product(deltaA, deltaB) > 0:
-                            hash_result, delta_hash = hash_Eisenstein_Fraction(
-                                data_sets.A, deltaA, data_sets.B, deltaB
-                            )
-                            check_result_hash(hash_result)
-                        else:
-                            pass
-                            # ("SKIP orthogonal", deltaA, deltaB)
+        self.check_matrix("hash")
 
     def test_add_matrix(self):
-        TestRange = parameters.cfg_prm.test_range
-
-        for l in range(TestRange):
-            for k in range(TestRange):
-                for j in range(TestRange):
-                    for i in range(TestRange):
-                        deltaA = EisensteinFraction(i + 1, l)
-                        deltaB = EisensteinFraction(j + 1, k)
-
-                        add_result, delta_add = add_Eisenstein_Fraction(
-                            data_sets.A, deltaA, data_sets.B, deltaB
-                        )
-                        if check_result_add(add_result):
-                            raise SystemExit("Add algorithm fails")
+        self.check_matrix("add")
 
     def test_check_function(self):
         """
@@ -190,134 +341,240 @@ class TestEisensteinFractionTimeSeriesOperations(unittest.TestCase):
             raise SystemExit("Check sequence Fails")
 
     def test_add_diff_matrix(self):
-        TestRange = parameters.cfg_prm.test_range
-
-        for l in range(TestRange):
-            for k in range(TestRange):
-                for j in range(TestRange):
-                    for i in range(TestRange):
-                        deltaA = EisensteinFraction(i + 1, l)
-                        deltaB = EisensteinFraction(j + 1, k)
-
-                        add_result, delta_add = add_Eisenstein_Fraction(
-                            data_sets.A, deltaA, data_sets.B, deltaB
-                        )
-
-                        if check_result_add(add_result):
-                            raise SystemExit("Add algorithm fails")
-
-                        diff_result, delta_diff = diff_Eisenstein_Fraction(
-                            add_result, deltaA, deltaB
-                        )
-
-                        if check_result_is_number_sequence(diff_result):
-                            print()
-                            print(deltaA)
-                            print(deltaA)
-                            print("argument:", add_result)
-                            print("result: ", diff_result)
-                            raise SystemExit("Diff algorithm fails")
-
-                        diff_result, delta_diff = diff_Eisenstein_Fraction(
-                            add_result, deltaB, deltaA
-                        )
-
-                        if check_result_is_alpha_sequence(diff_result):
-                            print()
-                            print(deltaA)
-                            print(deltaA)
-                            print("argument:", add_result)
-                            print("result: ", diff_result)
-                            raise SystemExit("Diff algorithm fails")
+        self.check_matrix("add_diff")
 
     def test_dehash_matrix(self):
-        TestRange = parameters.cfg_prm.test_range
-
-        callCount = 0
-        for l in range(TestRange):
-            for k in range(TestRange):
-                for j in range(TestRange):
-                    for i in range(TestRange):
-                        deltaA = EisensteinFraction(i + 1, l)
-                        deltaB = EisensteinFraction(j + 1, k)
-                        if get_dot_product(deltaA, deltaB) > 0:
-                            hash_result, delta_hash = hash_Eisenstein_Fraction(
-                                data_sets.A, deltaA, data_sets.B, deltaB
-                            )
-                            # check_result_hash(hash_result) Already checked
-                            callCount += 1
-                            dehashOdd_result, delta_dehashOdd = dehashodd_Eisenstein_Fraction(
-                                hash_result, delta_hash, deltaB
-                            )
-
-                            assert delta_dehashOdd == deltaA
-
-                            if not check_result_is_only_alpha_sequence(
-                                dehashOdd_result
-                            ):
-                                print()
-                                print("!! CALL COUNT:", callCount)
-                                print()
-                                print(i + 1, l, j + 1, k)
-                                print(
-                                    "deltaA=",
-                                    deltaA,
-                                    " deltaB=",
-                                    deltaB,
-                                    " dot=",
-                                    get_dot_product(deltaA, deltaB),
-                                )
-                                print(
-                                    ("a/b=", deltaA / deltaB),
-                                    " b/a=",
-                                    (deltaB / deltaA),
-                                )
-
-                                print("*", dehashOdd_result)
-                                print("!", data_sets.B[0 : len(dehashOdd_result)])
-
-                                print(
-                                    dehashOdd_result
-                                    == data_sets.B[0 : len(dehashOdd_result)]
-                                )
-
-                                print(hash_result)
-
-                                for i in dehashOdd_result:
-                                    print("%3s" % str(i), end="")
-                                print()
-                                for i in data_sets.B[0 : len(dehashOdd_result)]:
-                                    print("%3s" % str(i), end="")
-                                print()
-                                raise SystemExit(
-                                    "dehasodd_Eisenstein_Fraction algorithm fails"
-                                )
-                                # input("Press Enter to continue...")
-
-                            dehashEven_result, delta_dehashEven = dehasheven_Eisenstein_Fraction(
-                                hash_result, delta_hash, deltaA
-                            )
-                            if not check_result_is_only_number_sequence(
-                                dehashEven_result
-                            ):
-
-                                print()
-
-                                print("*", dehashEven_result)
-                                print(data_sets.A[0:2])
-                                print("!", data_sets.A[0 : len(dehashEven_result)])
-
-                                print()
-
-                                for i in dehashEven_result:
-                                    print("%3s" % str(i), end="")
-                                print()
-                                for i in data_sets.A[0 : len(dehashEven_result)]:
-                                    print("%3s" % str(i), end="")
-                                print()
-                                raise SystemExit(
-                                    "dehasheven_Eisenstein_Fraction algorithm fails"
-                                )
-
-                        else:
-                            pass
+        self.check_matrix("dehash")
+
+    def test_index_matrix(self):
+        self.check_matrix("index")
+
+    def test_lengths(self):
+        # Inputs of any length - result is a prefix of result on long inputs,
+        # its length is known up front and limit cuts it
+        A = data_sets.A
+        B = data_sets.B
+        for deltaA, deltaB in (
+            (EisensteinFraction(1, 0), EisensteinFraction(1, 0)),
+            (EisensteinFraction(2, 1), EisensteinFraction(3, 0)),
+            (EisensteinFraction(1, 3), EisensteinFraction(4, 1)),
+        ):
+            hashed, deltaC = hash_Eisenstein_Fraction(A, deltaA, B, deltaB)
+            added, _ = add_Eisenstein_Fraction(A, deltaA, B, deltaB)
+            for la in range(12):
+                for lb in range(12):
+                    result, _ = hash_Eisenstein_Fraction(
+                        A[:la], deltaA, B[:lb], deltaB
+                    )
+                    self.assertEqual(result, hashed[: len(result)])
+                    self.assertEqual(len(result), hash_length(la, deltaA, lb, deltaB))
+
+                    result, _ = add_Eisenstein_Fraction(
+                        A[:la], deltaA, B[:lb], deltaB, limit=5
+                    )
+                    self.assertEqual(result, added[: len(result)])
+                    self.assertEqual(
+                        len(result), min(5, add_length(la, deltaA, lb, deltaB))
+                    )
+
+                C = added[:la]
+                result, _ = diff_Eisenstein_Fraction(C, deltaA, deltaB)
+                self.assertEqual(len(result), diff_length(la, deltaA, deltaB))
+                self.assertEqual(
+                    diff_Eisenstein_Fraction(C, deltaA, deltaB, 2)[0], result[:2]
+                )
+
+                C = hashed[:la]
+                result, _ = dehasheven_Eisenstein_Fraction(C, deltaC, deltaA)
+                self.assertEqual(result, A[: len(result)])
+                self.assertEqual(len(result), dehasheven_length(la, deltaC, deltaA))
+
+                result, _ = dehashodd_Eisenstein_Fraction(C, deltaC, deltaB)
+                self.assertEqual(result, B[: len(result)])
+                self.assertEqual(len(result), dehashodd_length(la, deltaC, deltaB))
+                self.assertEqual(
+                    dehasheven_length(la, deltaC, deltaA) + len(result), la
+                )
+
+    def test_dehash_seek(self):
+        A = list(range(1, 200))
+        B = [-x for x in range(1, 200)]
+        for deltaA, deltaB in (
+            (EisensteinFraction(1, 0), EisensteinFraction(1, 0)),
+            (EisensteinFraction(2, 1), EisensteinFraction(3, 0)),
+            (EisensteinFraction(1, 3), EisensteinFraction(4, 1)),
+            (EisensteinFraction(3, 0), EisensteinFraction(2, 0)),
+        ):
+            hashed, deltaC = hash_Eisenstein_Fraction(A, deltaA, B, deltaB)
+            even, _ = dehasheven_Eisenstein_Fraction(hashed, deltaC, deltaA)
+            odd, _ = dehashodd_Eisenstein_Fraction(hashed, deltaC, deltaB)
+            for n, sample in enumerate(even):
+                self.assertEqual(hashed[dehasheven_index(n, deltaC, deltaA)], sample)
+            for n, sample in enumerate(odd):
+                self.assertEqual(hashed[dehashodd_index(n, deltaC, deltaB)], sample)
+            for start, stop in ((0, 0), (5, 17), (40, 10 ** 6), (10 ** 6, 10 ** 7)):
+                self.assertEqual(
+                    dehasheven_slice(hashed, deltaC, deltaA, start, stop),
+                    (even[start:stop], deltaB),
+                )
+                self.assertEqual(
+                    dehashodd_slice(hashed, deltaC, deltaB, start, stop),
+                    (odd[start:stop], deltaA),
+                )
+
+            # Deep in a long series: n-th sample of first series is where
+            # floor(i * x) steps from n to n + 1, of second series where
+            # i - floor(i * x) = n and floor(i * x) does not step
+            norm = dehasheven_deltas(deltaC, deltaA)[1].get_norm
+            C = range(10 ** 15)
+            start = 10 ** 12
+            indexes, _ = dehasheven_slice(C, deltaC, deltaA, start, start + 100)
+            for n, i in enumerate(indexes, start):
+                self.assertEqual(floor_root(norm, i), n)
+                self.assertEqual(floor_root(norm, i + 1), n + 1)
+            indexes, _ = dehashodd_slice(C, deltaC, deltaB, start, start + 100)
+            for n, i in enumerate(indexes, start):
+                self.assertEqual(i - floor_root(norm, i), n)
+                self.assertEqual(floor_root(norm, i + 1), floor_root(norm, i))
+
+    def test_interlace(self):
+        for deltas in (
+            [EisensteinFraction(1)] * 3,
+            [EisensteinFraction(3), EisensteinFraction(2), EisensteinFraction(5)],
+            [EisensteinFraction(2, 1), EisensteinFraction(3, 0), EisensteinFraction(1)],
+            [
+                EisensteinFraction(four=(7, 3, 1, 2)),
+                EisensteinFraction(5, 4),
+                EisensteinFraction(2),
+                EisensteinFraction(1, 1),
+            ],
+        ):
+            for length in (0, 7, 60):
+                pairs = [
+                    ([(k, i) for i in range(length + 11 * k)], delta)
+                    for k, delta in enumerate(deltas)
+                ]
+
+                # Nested two-way hash from the left
+                nested, deltaC = pairs[0]
+                levels = [deltaC]
+                for series, delta in pairs[1:]:
+                    nested, deltaC = hash_Eisenstein_Fraction(
+                        nested, deltaC, series, delta
+                    )
+                    levels.append(deltaC)
+
+                result = interlace_Eisenstein_Fraction(pairs)
+                self.assertEqual(result, (nested, deltaC))
+                self.assertEqual(
+                    len(nested),
+                    interlace_length([len(s) for s, _ in pairs], deltas),
+                )
+                self.assertEqual(
+                    interlace_Eisenstein_Fraction(pairs, 5)[0], nested[:5]
+                )
+
+                # Nested two-way dehash from the right
+                expected = []
+                C = nested
+                for k in range(len(deltas) - 1, 0, -1):
+                    series, _ = dehashodd_Eisenstein_Fraction(
+                        C, levels[k], deltas[k]
+                    )
+                    expected.insert(0, (series, deltas[k]))
+                    C, _ = dehasheven_Eisenstein_Fraction(
+                        C, levels[k], levels[k - 1]
+                    )
+                expected.insert(0, (C, deltas[0]))
+                self.assertEqual(
+                    deinterlace_Eisenstein_Fraction(nested, deltas), expected
+                )
+
+    def test_multiadd(self):
+        deltas = [
+            EisensteinFraction(2, 1),
+            EisensteinFraction(3, 0),
+            EisensteinFraction(1, 3),
+            EisensteinFraction(Fraction(1, 2), 0),
+            EisensteinFraction(four=(7, 3, 1, 2)),
+        ]
+        series = [[(k, i) for i in range(30 + 17 * k)] for k in range(len(deltas))]
+
+        # Two series - columns of add
+        for j in range(1, len(deltas)):
+            pairs = [(series[0], deltas[0]), (series[j], deltas[j])]
+            expected, deltaC = add_Eisenstein_Fraction(*pairs[0], *pairs[1])
+            columns, delta = multiadd_Eisenstein_Fraction(pairs)
+            self.assertEqual(delta, deltaC)
+            self.assertEqual(list(zip(*columns)), expected)
+
+        for count in range(2, len(deltas) + 1):
+            pairs = list(zip(series, deltas))[:count]
+            columns, deltaC = multiadd_Eisenstein_Fraction(pairs)
+            length = multiadd_length([len(s) for s, _ in pairs], deltas[:count])
+            self.assertEqual([len(column) for column in columns], [length] * count)
+            self.assertEqual(
+                multiadd_Eisenstein_Fraction(pairs, 4)[0],
+                [column[:4] for column in columns],
+            )
+            fastest = deltas.index(deltaC)
+            for k, column in enumerate(columns):
+                # Every column is resampled against the fastest series alone
+                expected, _ = add_Eisenstein_Fraction(
+                    series[fastest], deltaC, *pairs[k]
+                )
+                self.assertEqual(column, [pair[1] for pair in expected][:length])
+
+    def test_add_output(self):
+        A = data_sets.A
+        B = data_sets.B
+        for deltaA, deltaB in (
+            (EisensteinFraction(2, 1), EisensteinFraction(3, 0)),
+            (EisensteinFraction(3, 0), EisensteinFraction(1, 3)),
+            (EisensteinFraction(1), EisensteinFraction(2)),
+        ):
+            pairs, deltaC = add_Eisenstein_Fraction(A, deltaA, B, deltaB)
+            firsts = [first for first, _ in pairs]
+            seconds = [second for _, second in pairs]
+            self.assertEqual(
+                add_Eisenstein_Fraction(A, deltaA, B, deltaB, output="columns"),
+                ((firsts, seconds), deltaC),
+            )
+            (idx_a, idx_b), delta = add_Eisenstein_Fraction(
+                A, deltaA, B, deltaB, 7, "indexes"
+            )
+            self.assertEqual(delta, deltaC)
+            self.assertEqual([A[i] for i in idx_a], firsts[:7])
+            self.assertEqual([B[i] for i in idx_b], seconds[:7])
+            # resampled column is array of int64, the other a range
+            self.assertEqual(
+                sorted(type(column).__name__ for column in (idx_a, idx_b)),
+                ["array", "range"],
+            )
+
+            # diff works on every column alone
+            for first, second in ((deltaA, deltaB), (deltaB, deltaA)):
+                expected, delta = diff_Eisenstein_Fraction(pairs, first, second)
+                self.assertEqual(
+                    diff_Eisenstein_Fraction(firsts, first, second),
+                    ([pair[0] for pair in expected], delta),
+                )
+
+        with self.assertRaises(ValueError):
+            add_Eisenstein_Fraction(A, deltaA, B, deltaB, output="tuples")
+
+    def test_matrix_unit_failure(self):
+        def fail_on_big_omega(deltaA, deltaB):
+            if deltaA.co_omega + deltaB.co_omega >= 3:
+                raise ValueError("omega")
+
+        MATRIX_CHECKS["fail"] = fail_on_big_omega
+        try:
+            self.assertIsNone(run_matrix_unit(("fail", 2, 1, 1)))
+            self.assertEqual(
+                run_matrix_unit(("fail", 2, 2, 1)),
+                "fail matrix fails for deltaA=Eisenstein(1, 2) "
+                "deltaB=Eisenstein(1, 1): ValueError: omega",
+            )
+        finally:
+            del MATRIX_CHECKS["fail"]
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+import unittest
+from itertools import count, islice
+
+import data_sets
+import parameters
+
+from eisenstein_fractions import EisensteinFraction
+from eisenstein import get_dot_product
+from eisenstein_operations import hash_Eisenstein_Fraction
+from eisenstein_schedule import (
+    InterlaceSchedule,
+    compile_hash_schedule,
+    compile_interlace_schedule,
+)
+
+
+def reference_hash(A: list, deltaA, B: list, deltaB, length=None):
+    """
+    Per-sample fraction arithmetic - former body of hash_Eisenstein_Fraction,
+    runs until a needed sample is missing
+    """
+    result = []
+    delta = deltaB / (deltaA + deltaB)
+
+    for i in count() if length is None else range(length):
+        di = i * delta
+        try:
+            if int(abs(di)) == int(abs(di + delta)):
+                result.append(B[i - int(abs(di))])
+            else:
+                result.append(A[int(abs(di))])
+        except IndexError:
+            break
+
+    deltaC = (deltaA * deltaB) / (deltaA + deltaB)
+    return result, deltaC
+
+
+class TestEisensteinHashSchedule(unittest.TestCase):
+    def test_hash_matrix(self):
+        TestRange = parameters.cfg_prm.test_range
+
+        for l in range(TestRange):
+            for k in range(TestRange):
+                for j in range(TestRange):
+                    for i in range(TestRange):
+                        deltaA = EisensteinFraction(i + 1, l)
+                        deltaB = EisensteinFraction(j + 1, k)
+                        if get_dot_product(deltaA, deltaB) > 0:
+                            expected = reference_hash(
+                                data_sets.A, deltaA, data_sets.B, deltaB
+                            )
+                            result = hash_Eisenstein_Fraction(
+                                data_sets.A, deltaA, data_sets.B, deltaB
+                            )
+                            self.assertEqual(result, expected, (deltaA, deltaB))
+
+    def test_period(self):
+        # abs(delta) = 1/2
+        schedule = compile_hash_schedule(EisensteinFraction(1), EisensteinFraction(1))
+        self.assertEqual(schedule.period, 2)
+        self.assertEqual(schedule.period_a, 1)
+
+        # abs(delta) = 2/5
+        schedule = compile_hash_schedule(EisensteinFraction(3), EisensteinFraction(2))
+        self.assertEqual(schedule.period, 5)
+        self.assertEqual(schedule.period_a, 2)
+
+        # abs(delta) = sqrt(3)/3 - irrational, no period
+        schedule = compile_hash_schedule(
+            EisensteinFraction(1, 1), EisensteinFraction(1, 0)
+        )
+        self.assertEqual(schedule.period, None)
+
+    def test_long_series(self):
+        A = list(range(10000))
+        B = [-x for x in range(10000)]
+        for deltaA, deltaB in (
+            (EisensteinFraction(3), EisensteinFraction(2)),
+            (EisensteinFraction(2, 1), EisensteinFraction(3, 0)),
+            (EisensteinFraction(four=(7, 3, 1, 2)), EisensteinFraction(5, 4)),
+        ):
+            schedule = compile_hash_schedule(deltaA, deltaB)
+            expected, _ = reference_hash(A, deltaA, B, deltaB, 1000)
+            self.assertEqual(schedule.apply(A, B, 1000), expected)
+
+            sources = list(islice(schedule.sources(), 1000))
+            self.assertEqual(sources, [schedule.source(i) for i in range(1000)])
+
+    def test_interlace_schedule(self):
+        # Three series of equal rate - one sample of each per period
+        schedule = compile_interlace_schedule(*[EisensteinFraction(1)] * 3)
+        self.assertEqual(schedule.period, 3)
+        self.assertEqual(schedule.counts, [1, 1, 1])
+        self.assertEqual(schedule.deltaC, EisensteinFraction(four=(1, 3, 0, 1)))
+
+        for deltas in (
+            (EisensteinFraction(3), EisensteinFraction(2), EisensteinFraction(5)),
+            (EisensteinFraction(2, 1), EisensteinFraction(3, 0), EisensteinFraction(1)),
+            (
+                EisensteinFraction(four=(7, 3, 1, 2)),
+                EisensteinFraction(5, 4),
+                EisensteinFraction(2),
+                EisensteinFraction(1, 1),
+            ),
+        ):
+            schedule = InterlaceSchedule(deltas)
+            # Walk through levels is the definition of the pattern
+            expected = list(islice(schedule._sources(), 1000))
+            self.assertEqual(list(islice(schedule.sources(), 1000)), expected)
+            self.assertEqual([schedule.source(i) for i in range(1000)], expected)
+            if schedule.period is not None:
+                self.assertEqual(sum(schedule.counts), schedule.period)
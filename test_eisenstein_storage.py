@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+import os
+import tempfile
+import unittest
+from fractions import Fraction
+
+import data_sets
+import operations
+
+from eisenstein_fractions import EisensteinFraction
+from eisenstein_operations import (
+    hash_Eisenstein_Fraction,
+    add_Eisenstein_Fraction,
+    diff_Eisenstein_Fraction,
+    dehasheven_Eisenstein_Fraction,
+    dehashodd_Eisenstein_Fraction,
+)
+from eisenstein_streams import ihash_Eisenstein_Fraction
+from eisenstein_storage import (
+    MappedSeries,
+    open_series,
+    write_series,
+    write_result,
+)
+
+
+class TestEisensteinSeriesStorage(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_round_trip(self):
+        delta = EisensteinFraction(four=(3, 2, -1, 5))
+        for samples, fmt in (
+            (data_sets.A, "q"),
+            (data_sets.B, "c"),
+            ([0.5, -1.25, 3.0], "d"),
+            ([(1, "a"), (2, "a"), (3, "b")], "qc"),
+            ([1, "a", 2.5, -(2 ** 63), "b"], "v"),
+            ([1, True, "a", False, 0], "v"),
+            ([], "q"),
+        ):
+            self.assertEqual(write_series(self.path("s"), samples, delta), len(samples))
+            with open_series(self.path("s")) as series:
+                self.assertEqual(series.fmt, fmt)
+                self.assertEqual(series.delta, delta)
+                self.assertEqual(len(series), len(samples))
+                self.assertEqual(list(series), samples)
+                # True == 1, bools must come back as bools
+                self.assertEqual(list(map(type, series)), list(map(type, samples)))
+                self.assertEqual(series[:], samples)
+                if samples:
+                    self.assertEqual(series[-1], samples[-1])
+                    self.assertEqual(series[1:3], samples[1:3])
+                self.assertRaises(IndexError, series.__getitem__, len(samples))
+
+    def test_rational_delta_and_generator(self):
+        write_series(self.path("s"), (i * i for i in range(10000)), Fraction(1, 2))
+        with open_series(self.path("s")) as series:
+            self.assertEqual(series.delta, EisensteinFraction(Fraction(1, 2)))
+            self.assertEqual(len(series), 10000)
+            self.assertEqual(series[9999], 9999 * 9999)
+
+    def test_operators_on_mapped_series(self):
+        deltaA = EisensteinFraction(2, 1)
+        deltaB = EisensteinFraction(3, 0)
+        write_series(self.path("A"), data_sets.A, deltaA)
+        write_series(self.path("B"), data_sets.B, deltaB)
+        with open_series(self.path("A")) as A, open_series(self.path("B")) as B:
+            hashed = hash_Eisenstein_Fraction(A, A.delta, B, B.delta)
+            self.assertEqual(
+                hashed,
+                hash_Eisenstein_Fraction(data_sets.A, deltaA, data_sets.B, deltaB),
+            )
+            (C, deltaC) = hashed
+            stream = ihash_Eisenstein_Fraction(A, deltaA, B, deltaB)[0]
+            self.assertEqual(list(stream)[: len(C)], C)
+            added = add_Eisenstein_Fraction(A, A.delta, B, B.delta)
+            self.assertEqual(
+                added,
+                add_Eisenstein_Fraction(data_sets.A, deltaA, data_sets.B, deltaB),
+            )
+
+        write_result(self.path("C"), hashed)
+        with open_series(self.path("C")) as C:
+            self.assertEqual(C.fmt, "v")
+            self.assertEqual(C.delta, deltaC)
+            self.assertEqual(list(C), hashed[0])
+            even, delta = dehasheven_Eisenstein_Fraction(C, C.delta, deltaA)
+            self.assertEqual(even, data_sets.A[: len(even)])
+            self.assertEqual(delta, deltaB)
+            odd, delta = dehashodd_Eisenstein_Fraction(C, C.delta, deltaB)
+            self.assertEqual(odd, data_sets.B[: len(odd)])
+            self.assertEqual(delta, deltaA)
+
+        write_result(self.path("D"), added)
+        with open_series(self.path("D")) as D:
+            self.assertEqual(D.fmt, "qc")
+            self.assertEqual(
+                diff_Eisenstein_Fraction(D, deltaA, deltaB),
+                diff_Eisenstein_Fraction(added[0], deltaA, deltaB),
+            )
+
+    def test_rational_operations(self):
+        write_series(self.path("A"), operations.A, operations.deltaA)
+        write_series(self.path("B"), operations.B, operations.deltaB)
+        with open_series(self.path("A")) as A, open_series(self.path("B")) as B:
+            self.assertEqual(
+                operations.fractionhash(A, operations.deltaA, B, operations.deltaB),
+                operations.fractionhash(
+                    operations.A, operations.deltaA, operations.B, operations.deltaB
+                ),
+            )
+
+    def test_errors(self):
+        with open(self.path("bad"), "wb") as f:
+            f.write(b"NOTASERIESFILE" * 10)
+        self.assertRaises(ValueError, MappedSeries, self.path("bad"))
+        self.assertRaises(TypeError, write_series, self.path("s"), ["ab"], 1)
+        self.assertRaises(TypeError, write_series, self.path("s"), [1, (1, 2)], 1)
+        self.assertRaises(
+            OverflowError, write_series, self.path("s"), [1], Fraction(1, 2 ** 70)
+        )
+        write_series(self.path("s"), data_sets.A, 1)
+        with open(self.path("s"), "r+b") as f:
+            f.truncate(100)
+        self.assertRaises(ValueError, MappedSeries, self.path("s"))
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+import unittest
+from itertools import count, islice
+
+import data_sets
+import parameters
+
+from eisenstein_fractions import EisensteinFraction
+from eisenstein import get_dot_product
+from eisenstein_operations import (
+    hash_Eisenstein_Fraction,
+    add_Eisenstein_Fraction,
+    diff_Eisenstein_Fraction,
+    dehashodd_Eisenstein_Fraction,
+    dehasheven_Eisenstein_Fraction,
+    interlace_Eisenstein_Fraction,
+)
+from eisenstein_streams import (
+    ihash_Eisenstein_Fraction,
+    iinterlace_Eisenstein_Fraction,
+    iadd_Eisenstein_Fraction,
+    idiff_Eisenstein_Fraction,
+    idehashodd_Eisenstein_Fraction,
+    idehasheven_Eisenstein_Fraction,
+)
+
+
+def delta_matrix():
+    TestRange = parameters.cfg_prm.test_range
+
+    for l in range(TestRange):
+        for k in range(TestRange):
+            for j in range(TestRange):
+                for i in range(TestRange):
+                    yield EisensteinFraction(i + 1, l), EisensteinFraction(j + 1, k)
+
+
+class TestEisensteinFractionStreams(unittest.TestCase):
+    def test_hash_matrix(self):
+        for deltaA, deltaB in delta_matrix():
+            if get_dot_product(deltaA, deltaB) > 0:
+                expected, expected_delta = hash_Eisenstein_Fraction(
+                    data_sets.A, deltaA, data_sets.B, deltaB
+                )
+                stream, delta = ihash_Eisenstein_Fraction(
+                    iter(data_sets.A), deltaA, iter(data_sets.B), deltaB
+                )
+                self.assertEqual(list(stream), expected, (deltaA, deltaB))
+                self.assertEqual(delta, expected_delta)
+
+    def test_add_diff_matrix(self):
+        for deltaA, deltaB in delta_matrix():
+            add_result, expected_delta = add_Eisenstein_Fraction(
+                data_sets.A, deltaA, data_sets.B, deltaB
+            )
+            stream, delta = iadd_Eisenstein_Fraction(
+                iter(data_sets.A), deltaA, iter(data_sets.B), deltaB
+            )
+            self.assertEqual(list(stream), add_result, (deltaA, deltaB))
+            self.assertEqual(delta, expected_delta)
+
+            for first, second in ((deltaA, deltaB), (deltaB, deltaA)):
+                expected, expected_delta = diff_Eisenstein_Fraction(
+                    add_result, first, second
+                )
+                stream, delta = idiff_Eisenstein_Fraction(
+                    iter(add_result), first, second
+                )
+                self.assertEqual(list(stream), expected, (first, second))
+                self.assertEqual(delta, expected_delta)
+
+    def test_dehash_matrix(self):
+        for deltaA, deltaB in delta_matrix():
+            if get_dot_product(deltaA, deltaB) > 0:
+                hash_result, delta_hash = hash_Eisenstein_Fraction(
+                    data_sets.A, deltaA, data_sets.B, deltaB
+                )
+                expected, expected_delta = dehashodd_Eisenstein_Fraction(
+                    hash_result, delta_hash, deltaB
+                )
+                stream, delta = idehashodd_Eisenstein_Fraction(
+                    iter(hash_result), delta_hash, deltaB
+                )
+                self.assertEqual(list(stream), expected, (deltaA, deltaB))
+                self.assertEqual(delta, expected_delta)
+
+                expected, expected_delta = dehasheven_Eisenstein_Fraction(
+                    hash_result, delta_hash, deltaA
+                )
+                stream, delta = idehasheven_Eisenstein_Fraction(
+                    iter(hash_result), delta_hash, deltaA
+                )
+                self.assertEqual(list(stream), expected, (deltaA, deltaB))
+                self.assertEqual(delta, expected_delta)
+
+    def test_unbounded_round_trip(self):
+        deltaA = EisensteinFraction(2, 1)
+        deltaB = EisensteinFraction(3, 0)
+        letters = (chr(ord("a") + i % 26) for i in count())
+        hashed, delta_hash = ihash_Eisenstein_Fraction(
+            count(1), deltaA, letters, deltaB
+        )
+        numbers, delta = idehasheven_Eisenstein_Fraction(hashed, delta_hash, deltaA)
+        self.assertEqual(delta, deltaB)
+        self.assertEqual(list(islice(numbers, 1000)), list(range(1, 1001)))
+
+    def test_interlace(self):
+        deltas = [
+            EisensteinFraction(2, 1),
+            EisensteinFraction(3),
+            EisensteinFraction(1),
+        ]
+        series = [data_sets.A, data_sets.B, [-x for x in range(1, 30)]]
+        expected = interlace_Eisenstein_Fraction(list(zip(series, deltas)))
+        stream, delta = iinterlace_Eisenstein_Fraction(
+            [(iter(s), d) for s, d in zip(series, deltas)]
+        )
+        self.assertEqual((list(stream), delta), expected)
+
+        stream, _ = iinterlace_Eisenstein_Fraction(
+            [(count(1), deltas[0]), (count(-1, -1), deltas[1]), ("xyz", deltas[2])]
+        )
+        self.assertEqual(sorted(s for s in stream if isinstance(s, str)), list("xyz"))
+
+    def test_short_input(self):
+        deltaA = EisensteinFraction(1, 0)
+        deltaB = EisensteinFraction(1, 0)
+        stream, delta = ihash_Eisenstein_Fraction([1, 2], deltaA, "abc", deltaB)
+        self.assertEqual(list(stream), ["a", 1, "b", 2, "c"])
+        self.assertEqual(delta, EisensteinFraction(four=(1, 2, 0, 1)))
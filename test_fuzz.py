@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+import unittest
+
+import fuzz
+from eisenstein_fractions import EisensteinFraction
+
+
+def faulty_check(deltaA, deltaB, length_a: int, length_b: int):
+    # Disagreement of a broken engine: any omega part of deltaA, long input
+    if deltaA.co_omega != 0 and length_a > 3:
+        return "faulty"
+    return None
+
+
+class TestDifferentialFuzz(unittest.TestCase):
+    def setUp(self):
+        fuzz.CHECKS["faulty"] = (faulty_check, "eisenstein")
+
+    def tearDown(self):
+        del fuzz.CHECKS["faulty"]
+
+    def test_engines_agree(self):
+        operators = [name for name in sorted(fuzz.CHECKS) if name != "faulty"]
+        self.assertEqual(fuzz.fuzz(5000, 2021, operators), [])
+
+    def test_valid(self):
+        deltaA = EisensteinFraction(1, 0)
+        orthogonal = EisensteinFraction(1, 2)
+        self.assertTrue(fuzz.valid(("add", deltaA, orthogonal, 10, 10)))
+        self.assertFalse(fuzz.valid(("hash", deltaA, orthogonal, 10, 10)))
+        self.assertFalse(fuzz.valid(("add", deltaA, EisensteinFraction(0), 10, 10)))
+
+    def test_shrink(self):
+        case = (
+            "faulty",
+            EisensteinFraction(four=(5, 3, -4, 7)),
+            EisensteinFraction(four=(-2, 5, 3, 2)),
+            30,
+            17,
+        )
+        self.assertEqual(
+            fuzz.shrink(case),
+            ("faulty", EisensteinFraction(0, -1), EisensteinFraction(0, 1), 4, 0),
+        )
+
+    def test_failures_are_shrunk(self):
+        failures = fuzz.fuzz(100, 1, ["faulty"])
+        self.assertTrue(failures)
+        for case, message in failures:
+            (operator, deltaA, deltaB, length_a, length_b) = case
+            self.assertEqual(message, "faulty")
+            self.assertEqual(length_a, 4)
+            self.assertEqual(length_b, 0)
+            self.assertEqual(abs(deltaA.co_omega), 1)
+            self.assertEqual(deltaA.co_real, 0)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+import json
+import pickle
+import random
+import unittest
+from fractions import Fraction
+
+import data_sets
+import operations
+
+from eisenstein import get_dot_product
+from eisenstein_fractions import EisensteinFraction
+from eisenstein_operations import (
+    hash_Eisenstein_Fraction,
+    add_Eisenstein_Fraction,
+    diff_Eisenstein_Fraction,
+    dehashodd_Eisenstein_Fraction,
+    dehasheven_Eisenstein_Fraction,
+)
+from eisenstein_streams import (
+    ihash_Eisenstein_Fraction,
+    iadd_Eisenstein_Fraction,
+)
+from incremental import (
+    IncrementalHash,
+    IncrementalAdd,
+    IncrementalDiff,
+    IncrementalDehashEven,
+    IncrementalDehashOdd,
+    IncrementalSum,
+    IncrementalFractionDiff,
+    IncrementalFractionHash,
+    IncrementalFractionDehashEven,
+    IncrementalFractionDehashOdd,
+    restore,
+)
+from test_operations_array import delta_pairs
+
+eisenstein_pairs = [
+    (EisensteinFraction(1, 0), EisensteinFraction(1, 0)),
+    (EisensteinFraction(2, 1), EisensteinFraction(3, 0)),
+    (EisensteinFraction(1, 3), EisensteinFraction(4, 1)),
+    (EisensteinFraction(5, 2), EisensteinFraction(1, 1)),
+    (EisensteinFraction(Fraction(3, 2), 1), EisensteinFraction(2, Fraction(1, 3))),
+]
+
+
+def in_chunks(operator, inputs, rng, checkpoint=False):
+    """
+    Push inputs in random chunks, optionally restoring operator from
+    pickled checkpoint between pushes
+    :return: all output samples
+    """
+    positions = [0] * len(inputs)
+    result = []
+    while any(p < len(series) for p, series in zip(positions, inputs)):
+        chunks = []
+        for k, series in enumerate(inputs):
+            size = rng.randint(0, 7)
+            chunks.append(series[positions[k] : positions[k] + size])
+            positions[k] += size
+        result += operator.push(*chunks)
+        if checkpoint:
+            operator = restore(pickle.loads(pickle.dumps(operator.checkpoint())))
+    return result
+
+
+class TestIncrementalOperators(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(18)
+
+    def check(self, operator, inputs, expected):
+        for checkpoint in (False, True):
+            result = in_chunks(operator, inputs, self.rng, checkpoint)
+            self.assertEqual(result[: len(expected)], expected, operator)
+            operator = restore(operator.checkpoint())
+            operator = type(operator)(*operator.deltas)
+
+    def test_eisenstein_operators(self):
+        A = data_sets.A
+        B = data_sets.B
+        for deltaA, deltaB in eisenstein_pairs:
+            add_result, add_delta = add_Eisenstein_Fraction(A, deltaA, B, deltaB)
+            operator = IncrementalAdd(deltaA, deltaB)
+            self.assertEqual(operator.delta, add_delta)
+            self.check(operator, [A, B], add_result)
+
+            stream, _ = iadd_Eisenstein_Fraction(A, deltaA, B, deltaB)
+            operator = IncrementalAdd(deltaA, deltaB)
+            self.assertEqual(in_chunks(operator, [A, B], self.rng), list(stream))
+
+            for first, second in ((deltaA, deltaB), (deltaB, deltaA)):
+                expected, delta = diff_Eisenstein_Fraction(add_result, first, second)
+                operator = IncrementalDiff(first, second)
+                self.assertEqual(operator.delta, delta)
+                self.check(operator, [add_result], expected)
+
+            if get_dot_product(deltaA, deltaB) <= 0:
+                continue
+            hash_result, delta_hash = hash_Eisenstein_Fraction(A, deltaA, B, deltaB)
+            operator = IncrementalHash(deltaA, deltaB)
+            self.assertEqual(operator.delta, delta_hash)
+            self.check(operator, [A, B], hash_result)
+
+            stream, _ = ihash_Eisenstein_Fraction(A, deltaA, B, deltaB)
+            operator = IncrementalHash(deltaA, deltaB)
+            self.assertEqual(in_chunks(operator, [A, B], self.rng), list(stream))
+
+            expected, delta = dehasheven_Eisenstein_Fraction(
+                hash_result, delta_hash, deltaA
+            )
+            operator = IncrementalDehashEven(delta_hash, deltaA)
+            self.assertEqual(operator.delta, delta)
+            self.check(operator, [hash_result], expected)
+
+            expected, delta = dehashodd_Eisenstein_Fraction(
+                hash_result, delta_hash, deltaB
+            )
+            operator = IncrementalDehashOdd(delta_hash, deltaB)
+            self.assertEqual(operator.delta, delta)
+            self.check(operator, [hash_result], expected)
+
+    def test_fraction_operators(self):
+        A = list(range(1, 200))
+        B = [chr(ord("a") + i % 26) for i in range(200)]
+        for deltaA, deltaB in delta_pairs:
+            for first, second in ((deltaA, deltaB), (deltaB, deltaA)):
+                expected, delta = operations.sum(A, first, B, second)
+                operator = IncrementalSum(first, second)
+                self.assertEqual(operator.delta, delta)
+                self.check(operator, [A, B], expected)
+
+                expected, delta = operations.diff(A, first, second)
+                operator = IncrementalFractionDiff(first, second)
+                self.assertEqual(operator.delta, delta)
+                self.check(operator, [A], expected)
+
+                hashed, delta_hash = operations.fractionhash(A, first, B, second)
+                operator = IncrementalFractionHash(first, second)
+                self.assertEqual(operator.delta, delta_hash)
+                self.check(operator, [A, B], hashed)
+
+                long_hash = in_chunks(operator, [A, B], self.rng)
+                expected, delta = operations.dehasheven(long_hash, delta_hash, first)
+                operator = IncrementalFractionDehashEven(delta_hash, first)
+                self.assertEqual(operator.delta, delta)
+                self.check(operator, [long_hash], expected)
+
+                expected, delta = operations.dehashodd(long_hash, delta_hash, second)
+                operator = IncrementalFractionDehashOdd(delta_hash, second)
+                self.assertEqual(operator.delta, delta)
+                self.check(operator, [long_hash], expected)
+
+    def test_only_new_samples(self):
+        operator = IncrementalHash(EisensteinFraction(1, 0), EisensteinFraction(1, 0))
+        self.assertEqual(operator.push([1]), [])
+        self.assertEqual(operator.push([], "a"), ["a", 1])
+        self.assertEqual(operator.push([2, 3]), [])
+        self.assertEqual(operator.push([], "bc"), ["b", 2, "c", 3])
+        self.assertEqual(operator.push(), [])
+        self.assertEqual(operator.steps, 6)
+
+    def test_bounded_buffers(self):
+        # Equal deltas - inputs grow as fast as hash reads them
+        deltaA = EisensteinFraction(1, 0)
+        deltaB = EisensteinFraction(1, 0)
+        operator = IncrementalHash(deltaA, deltaB)
+        produced = 0
+        for i in range(20000):
+            produced += len(operator.push([i], [-i]))
+            self.assertLess(max(len(b) for b in operator._buffers), 8)
+        self.assertEqual(produced, 40000)
+
+        state = operator.checkpoint()
+        self.assertLess(len(pickle.dumps(state)), 2000)
+        self.assertEqual(restore(state).steps, operator.steps)
+
+    def test_checkpoint_is_plain_data(self):
+        operator = IncrementalSum(Fraction(3, 2), Fraction(1, 2))
+        operator.push([1, 2, 3], "abcdef")
+        state = json.loads(json.dumps(operator.checkpoint()))
+        restored = restore(state)
+        self.assertEqual(restored.deltas, operator.deltas)
+        self.assertEqual(restored.push([4], "gh"), operator.push([4], "gh"))
+
+    def test_restore_errors(self):
+        state = IncrementalDiff(
+            EisensteinFraction(1, 0), EisensteinFraction(2, 0)
+        ).checkpoint()
+        with self.assertRaises(ValueError):
+            restore(dict(state, operator="IncrementalNothing"))
+        with self.assertRaises(ValueError):
+            restore(dict(state, version=0))
+        with self.assertRaises(ValueError):
+            restore(dict(state, operator="IncrementalHash"))
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+import unittest
+from fractions import Fraction
+
+import operations
+from test_operations_array import delta_pairs
+
+
+class TestOperations(unittest.TestCase):
+    def setUp(self):
+        # Samples tell which input and index they were taken from
+        self.A = list(range(1, 300))
+        self.B = [-x for x in range(1, 300)]
+
+    def pairs(self):
+        for deltaA, deltaB in delta_pairs:
+            yield deltaA, deltaB
+            yield deltaB, deltaA
+
+    def test_period(self):
+        # deltaA / deltaB = a / b - a + b samples per period, b from A
+        self.assertEqual(
+            operations.fractionhash_period(Fraction(1), Fraction(1, 2)), (3, 1)
+        )
+        self.assertEqual(
+            operations.fractionhash_period(Fraction(7, 3), Fraction(5, 4)), (43, 15)
+        )
+        for deltaA, deltaB in self.pairs():
+            (period, period_a) = operations.fractionhash_period(deltaA, deltaB)
+            pattern = operations.fractionhash_pattern(deltaA, deltaB)
+            self.assertEqual(len(pattern), period)
+            self.assertEqual(sum(1 for from_a, _ in pattern if from_a), period_a)
+            for k in range(3 * period):
+                from_a, idx = pattern[k % period]
+                idx += k // period * (period_a if from_a else period - period_a)
+                self.assertEqual(
+                    operations.fractionhash_source(k, deltaA, deltaB), (from_a, idx)
+                )
+
+    def test_source(self):
+        for deltaA, deltaB in self.pairs():
+            hashed, _ = operations.fractionhash(self.A, deltaA, self.B, deltaB)
+            for k, sample in enumerate(hashed):
+                from_a, idx = operations.fractionhash_source(k, deltaA, deltaB)
+                self.assertEqual(sample, self.A[idx] if from_a else self.B[idx])
+
+    def test_range(self):
+        for deltaA, deltaB in self.pairs():
+            hashed, deltaC = operations.fractionhash(self.A, deltaA, self.B, deltaB)
+            for start in (0, 1, 17, len(hashed) - 3, len(hashed) + 5):
+                for stop in (start, start + 1, start + 40, 10 ** 6):
+                    self.assertEqual(
+                        operations.fractionhash_range(
+                            self.A, deltaA, self.B, deltaB, start, stop
+                        ),
+                        (hashed[start:stop], deltaC),
+                    )
+
+    def test_deep_seek(self):
+        # Inputs are never materialized - only samples near the range are read
+        A = range(1, 10 ** 12)
+        B = range(-1, -(10 ** 12), -1)
+        deltaA = Fraction(7, 3)
+        deltaB = Fraction(5, 4)
+        start = 10 ** 9
+        result, _ = operations.fractionhash_range(
+            A, deltaA, B, deltaB, start, start + 1000
+        )
+        # deltaB / (deltaA + deltaB) = (5/4) / (43/12) = 15/43, sample k
+        # is A[floor(15k/43)] when that floor grows at k + 1, B otherwise
+        expected = []
+        for k in range(start, start + 1000):
+            (f, f_next) = (15 * k // 43, 15 * (k + 1) // 43)
+            expected.append(A[f] if f_next > f else B[k - f_next])
+        self.assertEqual(result, expected)
+        self.assertEqual(len(result), 1000)
+        self.assertRaises(
+            AssertionError, operations.fractionhash_range, A, deltaA, B, deltaB, -1, 5
+        )
+
+    def test_multisum(self):
+        letters = [chr(ord("a") + i % 26) for i in range(300)]
+        for deltaA, deltaB in self.pairs():
+            # Two series - columns of sum
+            expected, deltaC = operations.sum(self.A, deltaA, letters, deltaB)
+            columns, delta = operations.multisum([(self.A, deltaA), (letters, deltaB)])
+            self.assertEqual(delta, deltaC)
+            self.assertEqual([str(a) + b for a, b in zip(*columns)], expected)
+            self.assertEqual(
+                operations.multisum([(self.A, deltaA), (letters, deltaB)], 3)[0],
+                [column[:3] for column in columns],
+            )
+
+        series = [self.A[: 100 + 20 * k] for k in range(len(delta_pairs))]
+        deltas = [deltaA for deltaA, _ in delta_pairs]
+        columns, deltaC = operations.multisum(list(zip(series, deltas)))
+        self.assertEqual(deltaC, min(deltas))
+        lengths = [len(s) for s in series]
+        self.assertEqual(len(columns[0]), operations.multisum_length(lengths, deltas))
+        fastest = deltas.index(deltaC)
+        for k, column in enumerate(columns):
+            # Every column is resampled against the fastest series alone
+            pair, _ = operations.multisum(
+                [(series[fastest], deltaC), (series[k], deltas[k])]
+            )
+            self.assertEqual(column, pair[1][: len(column)])
+
+    def test_sum_output(self):
+        letters = [chr(ord("a") + i % 26) for i in range(300)]
+        for deltaA, deltaB in self.pairs():
+            strings, deltaC = operations.sum(self.A, deltaA, letters, deltaB)
+            (firsts, seconds), delta = operations.sum(
+                self.A, deltaA, letters, deltaB, output="columns"
+            )
+            self.assertEqual(delta, deltaC)
+            self.assertEqual([str(a) + b for a, b in zip(firsts, seconds)], strings)
+
+            (idx_a, idx_b), delta = operations.sum(
+                self.A, deltaA, letters, deltaB, 10, "indexes"
+            )
+            self.assertEqual(delta, deltaC)
+            self.assertEqual([self.A[i] for i in idx_a], firsts[:10])
+            self.assertEqual([letters[i] for i in idx_b], seconds[:10])
+            # resampled column is array of int64, the other a range
+            self.assertEqual(
+                sorted(type(column).__name__ for column in (idx_a, idx_b)),
+                ["array", "range"],
+            )
+
+            # diff works on every column alone
+            expected, delta = operations.diff(strings, deltaA, deltaB)
+            column, column_delta = operations.diff(seconds, deltaA, deltaB)
+            self.assertEqual(column_delta, delta)
+            self.assertEqual(column, [sample[-1] for sample in expected])
+
+        with self.assertRaises(ValueError):
+            operations.sum(self.A, deltaA, letters, deltaB, output="tuples")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import sys
+
+if sys.version_info[0] < 3:
+    print("You need Python 3 to run this script.")
+    sys.exit(1)
+
+import unittest
+from fractions import Fraction
+
+import operations
+import operations_array
+from operations_array import np
+
+# (deltaA, deltaB) pairs with deltaA > deltaB so dehash gets valid arguments
+delta_pairs = [
+    (Fraction(1), Fraction(1, 2)),
+    (Fraction(3, 2), Fraction(1)),
+    (Fraction(7, 3), Fraction(5, 4)),
+    (Fraction(2), Fraction(2, 3)),
+]
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestOperationsArray(unittest.TestCase):
+    def setUp(self):
+        self.A = list(range(1, 200))
+        self.B = [chr(ord("a") + i % 26) for i in range(200)]
+
+    def assertSame(self, scalar, array):
+        self.assertEqual(array[0].tolist(), scalar[0])
+        self.assertEqual(array[1], scalar[1])
+
+    def test_sum_diff(self):
+        for deltaA, deltaB in delta_pairs:
+            for first, second in ((deltaA, deltaB), (deltaB, deltaA)):
+                expected = operations.sum(self.A, first, self.B, second)
+                result = operations_array.sum(self.A, first, self.B, second)
+                self.assertSame(expected, result)
+
+                self.assertSame(
+                    operations.diff(self.A, first, second),
+                    operations_array.diff(self.A, first, second),
+                )
+
+    def test_hash_dehash(self):
+        for deltaA, deltaB in delta_pairs:
+            for first, second in ((deltaA, deltaB), (deltaB, deltaA)):
+                expected = operations.fractionhash(self.A, first, self.B, second)
+                result = operations_array.fractionhash(self.A, first, self.B, second)
+                self.assertSame(expected, result)
+
+                hashed_array, delta_hash = result
+                hashed = hashed_array.tolist()
+                self.assertSame(
+                    operations.dehasheven(hashed, delta_hash, first),
+                    operations_array.dehasheven(hashed_array, delta_hash, first),
+                )
+                self.assertSame(
+                    operations.dehashodd(hashed, delta_hash, second),
+                    operations_array.dehashodd(hashed_array, delta_hash, second),
+                )
+
+    def test_lengths(self):
+        for deltaA, deltaB in delta_pairs:
+            for first, second in ((deltaA, deltaB), (deltaB, deltaA)):
+                for la in range(0, 30, 7):
+                    A = self.A[:la]
+                    self.assertEqual(
+                        len(operations.diff(A, first, second)[0]),
+                        operations.diff_length(la, first, second),
+                    )
+                    for lb in range(0, 30, 5):
+                        B = self.B[:lb]
+                        self.assertSame(
+                            operations.sum(A, first, B, second, limit=10),
+                            operations_array.sum(A, first, B, second, length=10),
+                        )
+                        hashed, delta_hash = operations.fractionhash(
+                            A, first, B, second
+                        )
+                        self.assertEqual(
+                            len(hashed),
+                            operations.fractionhash_length(la, first, lb, second),
+                        )
+                        even, _ = operations.dehasheven(hashed, delta_hash, first)
+                        self.assertEqual(even, A[: len(even)])
+                        self.assertEqual(
+                            len(even),
+                            operations.dehasheven_length(
+                                len(hashed), delta_hash, first
+                            ),
+                        )
+
+    def test_multisum(self):
+        pairs = [
+            (self.A, Fraction(3, 2)),
+            (self.B, Fraction(1, 2)),
+            (self.A[:50], Fraction(7, 3)),
+            (self.B[:120], Fraction(1, 2)),
+        ]
+        expected, deltaC = operations.multisum(pairs)
+        columns, delta = operations_array.multisum(pairs)
+        self.assertEqual(delta, deltaC)
+        self.assertEqual([column.tolist() for column in columns], expected)
+
+        # Fastest series of an array is sliced, not gathered by indexes
+        B = np.asarray(self.B)
+        columns, _ = operations_array.multisum([(self.A, Fraction(3, 2)), (B, deltaC)])
+        self.assertTrue(np.shares_memory(columns[1], B))
+        indexes, _ = operations_array.multisum_indexes(
+            [len(self.A), len(B)], [Fraction(3, 2), deltaC]
+        )
+        self.assertEqual(indexes[1].tolist(), list(range(len(columns[1]))))
+
+    def test_sum_output(self):
+        A = np.arange(1, 200)
+        B = np.arange(1, 200) / 4
+        for deltaA, deltaB in delta_pairs:
+            for first, second in ((deltaA, deltaB), (deltaB, deltaA)):
+                (firsts, seconds), delta = operations_array.sum(
+                    A, first, B, second, output="columns"
+                )
+                expected, deltaC = operations.sum(
+                    A.tolist(), first, B.tolist(), second, output="columns"
+                )
+                self.assertEqual(delta, deltaC)
+                self.assertEqual((firsts.tolist(), seconds.tolist()), expected)
+                # Typed storage of inputs is kept
+                self.assertEqual(firsts.dtype, A.dtype)
+                self.assertEqual(seconds.dtype, B.dtype)
+
+                (idx_a, idx_b), _ = operations_array.sum(
+                    A, first, B, second, output="indexes"
+                )
+                self.assertEqual(idx_a.dtype, np.int64)
+                self.assertEqual(A[idx_a].tolist(), expected[0])
+                self.assertEqual(B[idx_b].tolist(), expected[1])
+
+    def test_long_series(self):
+        A = np.arange(1, 2 * 10 ** 5)
+        B = -np.arange(1, 2 * 10 ** 5)
+        hashed, delta_hash = operations_array.fractionhash(
+            A, Fraction(3), B, Fraction(2), length=10 ** 5
+        )
+        self.assertEqual(hashed.dtype, A.dtype)
+        even, _ = operations_array.dehasheven(
+            hashed, delta_hash, Fraction(3), length=10 ** 4
+        )
+        self.assertEqual(even.tolist(), A[: 10 ** 4].tolist())
+
+    def test_int64_overflow(self):
+        ratio = Fraction(2 ** 62 + 1, 2 ** 62)
+        expected = [(i * ratio.numerator) // ratio.denominator for i in range(8)]
+        self.assertEqual(operations_array.floor_indexes(8, ratio).tolist(), expected)
+        expected = [-(-(i * ratio.numerator) // ratio.denominator) for i in range(8)]
+        self.assertEqual(operations_array.ceil_indexes(8, ratio).tolist(), expected)